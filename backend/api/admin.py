@@ -2,6 +2,7 @@ from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin as BaseUserAdmin
 from django.contrib.auth.models import User
 from .models import Student, Resource, Borrow, Return, Report, UserProfile
+from .pagination import EstimatedCountPaginator
 
 class UserProfileInline(admin.StackedInline):
     model = UserProfile
@@ -19,27 +20,55 @@ class UserProfileAdmin(admin.ModelAdmin):
     list_display = ['user', 'user_level']
     search_fields = ['user__username', 'user_level']
 
+class LargeTableAdmin(admin.ModelAdmin):
+    """
+    Changelist settings for tables that grow into the millions: estimated
+    totals instead of COUNT(*) on unfiltered pages, and no second count of
+    the whole table next to filtered results.
+    """
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+
 @admin.register(Student)
-class StudentAdmin(admin.ModelAdmin):
+class StudentAdmin(LargeTableAdmin):
     search_fields = ['student_id', 'first_name', 'last_name', 'email']
     list_display = ['student_id', 'first_name', 'last_name', 'email']
 
 @admin.register(Resource)
-class ResourceAdmin(admin.ModelAdmin):
+class ResourceAdmin(LargeTableAdmin):
     search_fields = ['resource_id', 'title', 'author', 'resource_type']
     list_display = ['resource_id', 'title', 'author', 'status']
 
+# Related rows are joined in (list_select_related) so the __str__ of each
+# row costs no queries, FKs use autocomplete instead of <select>s listing
+# every student, resource or loan, and the date hierarchies and default
+# orderings run on indexed date columns.
 @admin.register(Borrow)
-class BorrowAdmin(admin.ModelAdmin):
+class BorrowAdmin(LargeTableAdmin):
     search_fields = ['student__first_name', 'student__last_name', 'resource__title']
-    list_display = ['student', 'resource', 'borrow_date']
+    list_display = ['student', 'resource', 'borrow_date', 'status']
+    list_filter = ['status']
+    autocomplete_fields = ['student', 'resource']
+    date_hierarchy = 'borrow_date'
+    ordering = ['-borrow_date']
+
+    def get_queryset(self, request):
+        # Joined here rather than in list_select_related because Return's
+        # borrow_record autocomplete lists borrows by __str__ too
+        return super().get_queryset(request).select_related('student', 'resource')
 
 @admin.register(Return)
-class ReturnAdmin(admin.ModelAdmin):
+class ReturnAdmin(LargeTableAdmin):
     search_fields = ['borrow_record__student__first_name', 'borrow_record__resource__title']
     list_display = ['borrow_record', 'return_date']
+    list_select_related = ['borrow_record__student', 'borrow_record__resource']
+    autocomplete_fields = ['borrow_record']
+    date_hierarchy = 'return_date'
+    ordering = ['-return_date']
 
 @admin.register(Report)
-class ReportAdmin(admin.ModelAdmin):
+class ReportAdmin(LargeTableAdmin):
     search_fields = ['report_type', 'start_date', 'end_date']
-    list_display = ['report_type', 'start_date', 'end_date']
+    list_display = ['report_type', 'start_date', 'end_date', 'generated_at']
+    date_hierarchy = 'generated_at'
+    ordering = ['-generated_at']
@@ -6,4 +6,7 @@ class ApiConfig(AppConfig):
 
     # Removed database query from ready() to avoid accessing DB during app initialization
     def ready(self):
-        pass
+        # Register the suggestion index, role cache and query metrics signal
+        # receivers; the index itself is loaded on the first suggest
+        # request, not here.
+        from . import suggest, permissions, metrics  # noqa: F401
@@ -0,0 +1,141 @@
+import asyncio
+import json
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import JsonResponse, StreamingHttpResponse
+from django.views.decorators.http import require_GET
+from .events import broker, RESYNC
+from .models import Student, Resource
+from .serializers import StudentSerializer, ResourceSerializer
+
+# Async read-only endpoints for kiosk polling. Under an ASGI server
+# (backend/asgi.py) a worker keeps serving other requests while one of
+# these waits on the database, instead of tying up a thread per request.
+# DRF 3.14 views are synchronous, so these are plain Django async views
+# using the async ORM; they are public reads like their DRF counterparts
+# and skip authentication.
+
+PAGE_SIZE = settings.REST_FRAMEWORK.get('PAGE_SIZE', 50)
+MAX_PAGE_SIZE = getattr(settings, 'API_MAX_PAGE_SIZE', 500)
+EVENTS_HEARTBEAT_SECONDS = getattr(settings, 'EVENTS_HEARTBEAT_SECONDS', 15)
+
+
+def not_found(message):
+    return JsonResponse({'detail': message}, status=404)
+
+
+@require_GET
+async def resource_list(request):
+    """
+    Resources ordered by resource_id, paged with `?after=<resource_id>`.
+    Filters: `?status=`, `?resource_type=`; page length: `?page_size=`.
+    """
+    try:
+        page_size = min(max(int(request.GET.get('page_size', PAGE_SIZE)), 1), MAX_PAGE_SIZE)
+    except ValueError:
+        return JsonResponse({'detail': 'page_size must be an integer.'}, status=400)
+
+    queryset = Resource.objects.order_by('resource_id')
+    for field in ('status', 'resource_type'):
+        if request.GET.get(field):
+            queryset = queryset.filter(**{field: request.GET[field]})
+    if request.GET.get('after'):
+        queryset = queryset.filter(resource_id__gt=request.GET['after'])
+
+    resources = [resource async for resource in queryset[:page_size + 1]]
+    next_url = None
+    if len(resources) > page_size:
+        resources = resources[:page_size]
+        params = request.GET.copy()
+        params['after'] = resources[-1].resource_id
+        next_url = request.build_absolute_uri(f"{request.path}?{urlencode(params)}")
+    return JsonResponse({'next': next_url, 'results': ResourceSerializer(resources, many=True).data})
+
+
+@require_GET
+async def resource_detail(request, pk):
+    try:
+        resource = await Resource.objects.aget(pk=pk)
+    except Resource.DoesNotExist:
+        return not_found('Resource not found.')
+    return JsonResponse(ResourceSerializer(resource).data)
+
+
+@require_GET
+async def resource_availability(request, pk):
+    """Whether a resource can be checked out, and when it is due back if not."""
+    resource = await (
+        Resource.objects.filter(pk=pk)
+        .values('resource_id', 'status', 'current_borrow', 'current_borrow__due_date').afirst()
+    )
+    if resource is None:
+        return not_found('Resource not found.')
+    return JsonResponse({
+        'resource_id': resource['resource_id'],
+        'status': resource['status'],
+        'available': resource['status'] == 'AVAILABLE' and resource['current_borrow'] is None,
+        'due_date': resource['current_borrow__due_date'],
+    })
+
+
+@require_GET
+async def student_lookup(request, student_id):
+    """A student by student_id, with whether they may borrow right now."""
+    try:
+        student = await Student.objects.aget(student_id=student_id)
+    except Student.DoesNotExist:
+        return not_found('Student not found.')
+    return JsonResponse({
+        **StudentSerializer(student).data, 'id': student.pk, 'can_borrow': student.current_borrow_id is None,
+    })
+
+
+def format_event(event):
+    lines = [f"id: {event['id']}"] if 'id' in event else []
+    lines.append(f"event: {event['event']}")
+    lines.append(f"data: {json.dumps(event.get('data', {}), cls=DjangoJSONEncoder)}")
+    return '\n'.join(lines) + '\n\n'
+
+
+@require_GET
+async def resource_events(request):
+    """
+    Server-sent events stream of resource status changes, one `status`
+    event per change with data `{"resource_id": ..., "status": ...}`.
+    Reconnecting clients send Last-Event-ID and get the events they missed;
+    a `resync` event means they missed too many and should reload the
+    catalogue. Streams stay open, so this needs an ASGI server: the WSGI
+    handler drains an async stream into memory before sending anything,
+    so there the endpoint answers 501 instead of hanging a worker.
+    """
+    if not isinstance(request, ASGIRequest):
+        return JsonResponse({'detail': 'Resource events need the ASGI server (backend/asgi.py).'}, status=501)
+    try:
+        last_event_id = int(request.headers.get('Last-Event-ID') or request.GET.get('last_event_id'))
+    except (TypeError, ValueError):
+        last_event_id = None
+    subscription = broker.subscribe(last_event_id)
+
+    async def stream():
+        try:
+            yield 'retry: 3000\n\n'
+            while True:
+                try:
+                    event = await asyncio.wait_for(subscription.get(), EVENTS_HEARTBEAT_SECONDS)
+                except asyncio.TimeoutError:
+                    # Comment line, keeps proxies from closing an idle stream
+                    yield ': keepalive\n\n'
+                    continue
+                yield format_event(event)
+                if event['event'] == RESYNC:
+                    return
+        finally:
+            subscription.close()
+
+    response = StreamingHttpResponse(stream(), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'
+    return response
@@ -0,0 +1,43 @@
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken
+from rest_framework_simplejwt.models import TokenUser
+from rest_framework_simplejwt.settings import api_settings
+from .revocation import is_revoked
+
+
+class RevocableJWTAuthentication(JWTAuthentication):
+    """
+    JWTAuthentication that also rejects access tokens whose session (`sid`
+    claim) was logged out through the token blacklist endpoint.
+    """
+
+    def get_validated_token(self, raw_token):
+        token = super().get_validated_token(raw_token)
+        if is_revoked(token.get('sid')):
+            raise InvalidToken('Token has been revoked')
+        return token
+
+
+class StatelessJWTAuthentication(RevocableJWTAuthentication):
+    """
+    Opt-in authentication for read-heavy views. Safe requests get a TokenUser
+    built from the verified claims (id, username, user_level) without loading
+    the User row; writes still load the real user.
+
+    A deactivated user keeps read access until the access token expires.
+    """
+
+    def authenticate(self, request):
+        if request.method not in SAFE_METHODS:
+            return super().authenticate(request)
+        header = self.get_header(request)
+        if header is None:
+            return None
+        raw_token = self.get_raw_token(header)
+        if raw_token is None:
+            return None
+        token = self.get_validated_token(raw_token)
+        if api_settings.USER_ID_CLAIM not in token:
+            raise InvalidToken('Token contained no recognizable user identification')
+        return TokenUser(token), token
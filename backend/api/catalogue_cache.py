@@ -0,0 +1,113 @@
+import hashlib
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+
+# The catalogue cache uses Django's cache framework. CATALOGUE_CACHE_ALIAS
+# picks the backend: the local-memory default works per process, while a
+# shared backend (Redis, Memcached) keeps several workers consistent.
+CACHE_ALIAS = getattr(settings, 'CATALOGUE_CACHE_ALIAS', 'default')
+CACHE_TIMEOUT = getattr(settings, 'CATALOGUE_CACHE_TIMEOUT', 300)
+
+VERSION_KEY = 'catalogue:version'
+STUDENT_VERSION_KEY = 'students:version'
+DETAIL_VERSION_PREFIX = 'catalogue:resource-version:'
+
+_counters = {'hits': 0, 'misses': 0}
+_counters_lock = threading.Lock()
+
+
+def get_cache():
+    return caches[CACHE_ALIAS]
+
+
+def catalogue_version():
+    """
+    Current catalogue version. List page keys embed it, so bumping it
+    orphans every cached list page at once.
+    """
+    # Seeded from the clock so an evicted counter never restarts at a
+    # version whose pages may still be cached.
+    return get_cache().get_or_set(VERSION_KEY, time.time_ns, None)
+
+
+def student_version():
+    """
+    Current version of the student list, moved on by every student write.
+    The student list ETag embeds it.
+    """
+    return get_cache().get_or_set(STUDENT_VERSION_KEY, time.time_ns, None)
+
+
+def list_key(request):
+    uri = request.build_absolute_uri()
+    return f"catalogue:list:v{catalogue_version()}:{hashlib.sha1(uri.encode()).hexdigest()}"
+
+
+def detail_key(resource_id):
+    """
+    Key for a resource's detail entry, embedding the resource's version.
+    Take it before reading the database: a read that races an invalidation
+    then stores the old state under a version nobody asks for anymore.
+    """
+    # Clock-seeded like catalogue_version(); an expired or evicted version
+    # only orphans the entry stored under it
+    version = get_cache().get_or_set(f"{DETAIL_VERSION_PREFIX}{resource_id}", time.time_ns, CACHE_TIMEOUT)
+    return f"catalogue:resource:{resource_id}:v{version}"
+
+
+def cache_get(key):
+    value = get_cache().get(key)
+    with _counters_lock:
+        _counters['hits' if value is not None else 'misses'] += 1
+    return value
+
+
+def cache_set(key, value):
+    get_cache().set(key, value, CACHE_TIMEOUT)
+
+
+def cache_stats():
+    with _counters_lock:
+        return dict(_counters)
+
+
+def invalidate_catalogue(resource_ids=()):
+    """
+    Orphan cached list pages and the detail entries of `resource_ids` by
+    moving their versions on.
+
+    Runs once the surrounding transaction commits, so a concurrent read
+    cannot re-cache the old state in between.
+    """
+    resource_ids = list(resource_ids)
+
+    def invalidate():
+        cache = get_cache()
+        try:
+            cache.incr(VERSION_KEY)
+        except ValueError:
+            cache.set(VERSION_KEY, time.time_ns(), None)
+        if resource_ids:
+            version = time.time_ns()
+            cache.set_many(
+                {f"{DETAIL_VERSION_PREFIX}{resource_id}": version for resource_id in resource_ids}, CACHE_TIMEOUT,
+            )
+
+    transaction.on_commit(invalidate)
+
+
+def invalidate_student_list():
+    """Move the student list version on once the surrounding transaction commits."""
+
+    def invalidate():
+        cache = get_cache()
+        try:
+            cache.incr(STUDENT_VERSION_KEY)
+        except ValueError:
+            cache.set(STUDENT_VERSION_KEY, time.time_ns(), None)
+
+    transaction.on_commit(invalidate)
@@ -0,0 +1,35 @@
+import hashlib
+
+# Validators for django.views.decorators.http.condition(), so a poll that
+# ends in 304 Not Modified never loads or serializes the rows themselves.
+# List ETags come from a version counter in the catalogue cache that every
+# write moves on after commit, so they cost no query at all; detail ETags
+# read one row's `updated_at` by primary key.
+
+
+def list_etag(version):
+    """
+    ETag for a list endpoint: changes whenever `version()` does (see
+    catalogue_version and student_version), and differs per URL and Accept
+    header.
+    """
+    def etag(request, *args, **kwargs):
+        raw = f"{version()}:{request.get_full_path()}:{request.META.get('HTTP_ACCEPT', '')}"
+        return hashlib.sha1(raw.encode()).hexdigest()
+    return etag
+
+
+def detail_last_modified(model):
+    def last_modified(request, pk, *args, **kwargs):
+        return model.objects.filter(pk=pk).values_list('updated_at', flat=True).first()
+    return last_modified
+
+
+def detail_etag(model):
+    def etag(request, pk, *args, **kwargs):
+        updated_at = model.objects.filter(pk=pk).values_list('updated_at', flat=True).first()
+        if updated_at is None:
+            return None
+        raw = f"{request.get_full_path()}:{updated_at.isoformat()}:{request.META.get('HTTP_ACCEPT', '')}"
+        return hashlib.sha1(raw.encode()).hexdigest()
+    return etag
@@ -0,0 +1,118 @@
+import asyncio
+import threading
+from collections import deque
+
+from django.conf import settings
+from django.db import transaction
+from django.utils.module_loading import import_string
+
+# Resource status changes are pushed to front-desk screens over server-sent
+# events (`/api/events/resources/`). Writers publish after their transaction
+# commits; the broker fans each event out to the open streams.
+#
+# InProcessBroker only reaches streams served by the same process. With
+# several workers, point EVENTS_BROKER at a class with the same publish()
+# and subscribe() methods (subscriptions offering async get() and close())
+# backed by a shared channel such as Redis pub/sub.
+EVENTS_BACKLOG = getattr(settings, 'EVENTS_BACKLOG', 1000)
+EVENTS_QUEUE_SIZE = getattr(settings, 'EVENTS_QUEUE_SIZE', 1000)
+
+# Tells a client it missed events and has to reload the catalogue. It carries
+# the id of the newest event, so the client's reconnect resumes after it.
+RESYNC = 'resync'
+
+
+class Subscription:
+    """
+    One open stream: an asyncio queue fed from any thread via its loop.
+    A subscriber that falls EVENTS_QUEUE_SIZE events behind is sent RESYNC
+    and dropped instead of holding events for it indefinitely.
+    """
+
+    def __init__(self, broker, loop):
+        self.broker = broker
+        self.loop = loop
+        self.queue = asyncio.Queue()
+        self.dropped = False
+
+    def deliver(self, event):
+        try:
+            self.loop.call_soon_threadsafe(self._put, event)
+        except RuntimeError:
+            # The loop has closed under us
+            self.broker.unsubscribe(self)
+
+    def _put(self, event):
+        if self.dropped:
+            return
+        if self.queue.qsize() >= EVENTS_QUEUE_SIZE:
+            self.broker.unsubscribe(self)
+            self.dropped = True
+            event = {'event': RESYNC, 'id': event['id']}
+        self.queue.put_nowait(event)
+
+    async def get(self):
+        return await self.queue.get()
+
+    def close(self):
+        self.broker.unsubscribe(self)
+
+
+class InProcessBroker:
+    """
+    Fan-out to the streams of this process. Events get increasing ids and
+    the last EVENTS_BACKLOG are kept, so a client reconnecting with
+    Last-Event-ID receives what it missed.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.subscribers = set()
+        self.backlog = deque(maxlen=EVENTS_BACKLOG)
+        self.last_id = 0
+
+    def publish(self, events):
+        with self.lock:
+            stamped = []
+            for event in events:
+                self.last_id += 1
+                stamped.append({**event, 'id': self.last_id})
+            self.backlog.extend(stamped)
+            subscribers = list(self.subscribers)
+        for subscriber in subscribers:
+            for event in stamped:
+                subscriber.deliver(event)
+
+    def subscribe(self, last_event_id=None):
+        subscription = Subscription(self, asyncio.get_running_loop())
+        with self.lock:
+            if last_event_id is not None and last_event_id < self.last_id:
+                oldest = self.backlog[0]['id'] if self.backlog else self.last_id + 1
+                if last_event_id + 1 < oldest:
+                    subscription.queue.put_nowait({'event': RESYNC, 'id': self.last_id})
+                else:
+                    for event in self.backlog:
+                        if event['id'] > last_event_id:
+                            subscription.queue.put_nowait(event)
+            self.subscribers.add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self.lock:
+            self.subscribers.discard(subscription)
+
+
+broker = import_string(getattr(settings, 'EVENTS_BROKER', 'api.events.InProcessBroker'))()
+
+
+def publish_resource_status(statuses):
+    """
+    Publish `{resource_id: status}` (None for a deleted resource) once the
+    current transaction commits.
+    """
+    events = [
+        {'event': 'status', 'data': {'resource_id': resource_id, 'status': status}}
+        for resource_id, status in statuses.items()
+    ]
+    if events:
+        transaction.on_commit(lambda: broker.publish(events))
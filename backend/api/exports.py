@@ -0,0 +1,91 @@
+import csv
+import io
+import zlib
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Max
+from django.utils import timezone
+from .models import Student, Resource, Borrow
+from .reports import chunked_values
+
+# Full or incremental dumps for the data warehouse. Rows are read with the
+# same keyset chunks as the reports, encoded into ~64KB pieces and, when the
+# client accepts it, gzipped on the fly, so an export never holds more than
+# one chunk in memory.
+EXPORT_FORMATS = ['ndjson', 'csv']
+EXPORT_PIECE_SIZE = 64 * 1024
+# `updated_at` is stamped when a row is saved, not when its transaction
+# commits, so the watermark trails the clock by this much to leave
+# in-flight transactions time to commit before their rows are passed over
+EXPORT_WATERMARK_LAG_SECONDS = getattr(settings, 'EXPORT_WATERMARK_LAG_SECONDS', 60)
+
+EXPORTS = {
+    'resources': (Resource, [
+        'resource_id', 'title', 'resource_type', 'author', 'publication_year', 'status', 'updated_at',
+    ]),
+    'students': (Student, [
+        'id', 'student_id', 'first_name', 'last_name', 'phone', 'email', 'updated_at',
+    ]),
+    'borrows': (Borrow, [
+        'id', 'student__student_id', 'resource__resource_id', 'borrow_date', 'due_date', 'status', 'updated_at',
+    ]),
+}
+
+
+def export_window(kind, updated_since=None):
+    """
+    Return (queryset, watermark) for an export. Only rows changed up to the
+    watermark (the newest `updated_at` at least EXPORT_WATERMARK_LAG_SECONDS
+    old) are included, so passing it back as `updated_since` next time picks
+    up what changed since. A transaction open longer than the lag can still
+    be missed.
+
+    Incremental pulls never report deleted rows; a full export is needed to
+    notice them.
+    """
+    model, _ = EXPORTS[kind]
+    cutoff = timezone.now() - timedelta(seconds=EXPORT_WATERMARK_LAG_SECONDS)
+    queryset = model.objects.filter(updated_at__lte=cutoff)
+    if updated_since is not None:
+        # >= so rows sharing the previous watermark's timestamp are not lost
+        queryset = queryset.filter(updated_at__gte=updated_since)
+    watermark = queryset.aggregate(last=Max('updated_at'))['last']
+    if watermark is None:
+        return queryset.none(), updated_since
+    return queryset.filter(updated_at__lte=watermark), watermark
+
+
+def encode_rows(kind, queryset, fmt):
+    """Yield the export as text pieces of about EXPORT_PIECE_SIZE characters."""
+    _, columns = EXPORTS[kind]
+    buffer = io.StringIO()
+    if fmt == 'csv':
+        writer = csv.writer(buffer)
+        writer.writerow(columns)
+        write = writer.writerow
+    else:
+        encoder = DjangoJSONEncoder()
+
+        def write(row):
+            buffer.write(encoder.encode(dict(zip(columns, row))))
+            buffer.write('\n')
+
+    for row in chunked_values(queryset, columns):
+        write(row)
+        if buffer.tell() >= EXPORT_PIECE_SIZE:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue()
+
+
+def gzip_pieces(pieces):
+    compressor = zlib.compressobj(wbits=31)  # 31: gzip container
+    for piece in pieces:
+        data = compressor.compress(piece.encode())
+        if data:
+            yield data
+    yield compressor.flush()
@@ -0,0 +1,195 @@
+import csv
+import json
+import time
+from collections import Counter
+
+from django.core.exceptions import ValidationError
+from django.db import connection, transaction
+from django.db.models import Q
+from .models import Student, Resource, ResourceTypeUtilization, bump_counters
+from .catalogue_cache import invalidate_catalogue, invalidate_student_list
+
+# Bulk import of student rosters and resource collections from CSV (with a
+# header row) or JSON Lines. Rows are read lazily and handled in batches:
+# one query per batch finds the existing rows behind the unique keys, rows
+# are validated in memory, and the valid ones are upserted with a single
+# bulk_create(update_conflicts=True). Each batch commits on its own, so a
+# bad row never rolls back its neighbours.
+IMPORT_BATCH_SIZE = 1000
+IMPORT_FORMATS = ['csv', 'jsonl']
+# Only the first errors are kept so the report stays small for huge files
+MAX_REPORTED_ERRORS = 1000
+
+
+class MalformedRow:
+    def __init__(self, message):
+        self.message = message
+
+
+def read_rows(stream, fmt):
+    """Yield one dict per record of a text stream (MalformedRow for bad JSON lines)."""
+    if fmt == 'csv':
+        yield from csv.DictReader(stream)
+        return
+    for line in stream:
+        if not line.strip():
+            continue
+        try:
+            row = json.loads(line)
+        except ValueError as exc:
+            yield MalformedRow(str(exc))
+            continue
+        yield row if isinstance(row, dict) else MalformedRow('Expected a JSON object.')
+
+
+class ImportReport:
+    def __init__(self):
+        self.created = 0
+        self.updated = 0
+        self.failed = 0
+        self.errors = []
+        self.started = time.perf_counter()
+
+    def error(self, row_number, errors):
+        self.failed += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append({'row': row_number, 'errors': errors})
+
+    def as_dict(self):
+        elapsed = time.perf_counter() - self.started
+        processed = self.created + self.updated + self.failed
+        return {
+            'processed': processed,
+            'created': self.created,
+            'updated': self.updated,
+            'failed': self.failed,
+            'errors': sorted(self.errors, key=lambda error: error['row']),
+            'errors_truncated': self.failed > len(self.errors),
+            'seconds': round(elapsed, 3),
+            'rows_per_second': round(processed / elapsed) if elapsed else processed,
+        }
+
+
+class StudentImporter:
+    model = Student
+    key = 'student_id'
+    fields = ['student_id', 'first_name', 'last_name', 'phone', 'email']
+    update_fields = ['first_name', 'last_name', 'phone', 'email', 'updated_at']
+
+    def existing(self, objs):
+        """Stored student_ids among `objs`; also notes who owns each email involved."""
+        query = Q(student_id__in=[obj.student_id for obj in objs]) | Q(email__in=[obj.email for obj in objs])
+        rows = list(Student.objects.filter(query).values_list('student_id', 'email'))
+        self.email_owners = {email: student_id for student_id, email in rows}
+        self.batch_emails = set()
+        return {student_id for student_id, _ in rows}
+
+    def conflicts(self, obj):
+        # student_id is the upsert key; an email may only stay with its own student
+        owner = self.email_owners.get(obj.email, obj.student_id)
+        if owner != obj.student_id:
+            return {'email': [f"Already used by student {owner}."]}
+        if obj.email in self.batch_emails:
+            return {'email': ['Duplicated earlier in this batch.']}
+        self.batch_emails.add(obj.email)
+        return None
+
+    def after_write(self, created, updated):
+        # bulk_create skips the post_save receiver that moves this on
+        invalidate_student_list()
+
+
+class ResourceImporter:
+    model = Resource
+    key = 'resource_id'
+    fields = ['resource_id', 'title', 'resource_type', 'author', 'publication_year']
+    # Status belongs to circulation and is never overwritten by an import
+    update_fields = ['title', 'resource_type', 'author', 'publication_year', 'updated_at']
+
+    def existing(self, objs):
+        return set(Resource.objects.filter(pk__in=[obj.resource_id for obj in objs]).values_list('pk', flat=True))
+
+    def conflicts(self, obj):
+        return None
+
+    def after_write(self, created, updated):
+        # bulk_create skips the post_save receivers that keep these current
+        totals = Counter(obj.resource_type for obj in created)
+        bump_counters(ResourceTypeUtilization, ('resource_type',),
+                      {(resource_type,): {'total': n} for resource_type, n in totals.items()})
+        invalidate_catalogue([obj.resource_id for obj in created + updated])
+
+
+IMPORTERS = {'students': StudentImporter, 'resources': ResourceImporter}
+
+
+def clean_value(value):
+    return value.strip() if isinstance(value, str) else value
+
+
+def import_batch(importer, numbered_rows, report):
+    objs = []
+    for row_number, row in numbered_rows:
+        if isinstance(row, MalformedRow):
+            report.error(row_number, {'non_field_errors': [row.message]})
+            continue
+        obj = importer.model(**{field: clean_value(row.get(field)) for field in importer.fields})
+        try:
+            obj.clean_fields(exclude=['status', 'updated_at'])
+        except ValidationError as exc:
+            report.error(row_number, exc.message_dict)
+            continue
+        objs.append((row_number, obj))
+    if not objs:
+        return
+
+    existing = importer.existing([obj for _, obj in objs])
+    seen, created, updated = set(), [], []
+    for row_number, obj in objs:
+        key = getattr(obj, importer.key)
+        if key in seen:
+            report.error(row_number, {importer.key: ['Duplicated earlier in this batch.']})
+            continue
+        errors = importer.conflicts(obj)
+        if errors:
+            report.error(row_number, errors)
+            continue
+        seen.add(key)
+        (updated if key in existing else created).append(obj)
+
+    if not created and not updated:
+        return
+    # MySQL upserts on any unique key and takes no conflict target
+    unique_fields = [importer.key] if connection.features.supports_update_conflicts_with_target else None
+    with transaction.atomic():
+        importer.model.objects.bulk_create(
+            created + updated, update_conflicts=True,
+            unique_fields=unique_fields, update_fields=importer.update_fields,
+        )
+        importer.after_write(created, updated)
+    report.created += len(created)
+    report.updated += len(updated)
+
+
+def import_records(kind, rows, batch_size=IMPORT_BATCH_SIZE):
+    """
+    Upsert `rows` (an iterable of dicts, e.g. from read_rows) as `kind`
+    ('students' or 'resources'). Returns the report dict with counts,
+    per-row errors (rows numbered from 1) and throughput.
+    """
+    importer = IMPORTERS[kind]()
+    report = ImportReport()
+    batch = []
+    row_number = 0
+    try:
+        for row_number, row in enumerate(rows, start=1):
+            batch.append((row_number, row))
+            if len(batch) == batch_size:
+                import_batch(importer, batch, report)
+                batch = []
+    except (csv.Error, UnicodeDecodeError) as exc:
+        # A broken CSV stream has no reliable place to resume from
+        batch.append((row_number + 1, MalformedRow(f"Could not read the rest of the file: {exc}")))
+    if batch:
+        import_batch(importer, batch, report)
+    return report.as_dict()
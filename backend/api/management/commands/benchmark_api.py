@@ -0,0 +1,353 @@
+import http.client
+import json
+import random
+import statistics
+import subprocess
+import threading
+import time
+from datetime import timedelta
+from urllib.parse import urlencode, urlsplit
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Max, Min
+from django.http.request import validate_host
+from django.test import Client
+from django.utils import timezone
+from rest_framework.pagination import Cursor
+from api.models import Student, Resource, Borrow, Report
+from api.pagination import LibraryCursorPagination, estimated_row_count
+from api.services import bulk_return
+
+# Scenarios in the order they run. `checkout` borrows free resources for
+# free students and `return` brings the same loans back, so a run leaves the
+# catalogue as it found it (plus the new history rows).
+SCENARIOS = ['list', 'filter', 'search', 'students', 'borrows', 'checkout', 'return', 'report']
+READ_SCENARIOS = ['list', 'filter', 'search', 'students', 'borrows']
+
+def client_host():
+    """A Host header that ALLOWED_HOSTS accepts, for in-process test client requests."""
+    allowed = settings.ALLOWED_HOSTS
+    if settings.DEBUG and not allowed:
+        # What Django accepts in DEBUG with ALLOWED_HOSTS left empty
+        allowed = ['.localhost', '127.0.0.1', '[::1]']
+    candidates = ['testserver', 'localhost'] + [host.lstrip('.') for host in allowed if host != '*']
+    return next((host for host in candidates if validate_host(host, allowed)), 'testserver')
+
+class Command(BaseCommand):
+    help = (
+        'Drive the main API endpoints and report p50/p95/p99 latency and throughput per scenario as JSON, '
+        'for comparison across commits. Runs in-process through the Django test client by default, or '
+        'against a running server with --base-url. Seed a dataset first (see seed_library). '
+        'Read requests start at random pages and vary their filters and search terms, so they are not '
+        'answered from the list cache. '
+        'Checkouts, returns and reports write to the database; generated report files are removed.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--base-url', help='Server to drive over HTTP (default: in-process test client)')
+        parser.add_argument('--concurrency', type=int, default=1,
+                            help='Concurrent clients (HTTP only; the test client runs one request at a time)')
+        parser.add_argument('--requests', type=int, default=200, help='Measured requests per scenario')
+        parser.add_argument('--report-requests', type=int, default=10, help='Measured requests for `report`')
+        parser.add_argument('--warmup', type=int, default=10, help='Unmeasured requests per read scenario')
+        parser.add_argument('--seed', type=int, default=1, help='Random seed for the read requests')
+        parser.add_argument('--scenario', action='append', choices=SCENARIOS, dest='scenarios',
+                            help='Run only this scenario (repeatable)')
+        parser.add_argument('--output', help='Write the JSON results to this file instead of stdout')
+        parser.add_argument('--baseline', help='Earlier JSON results to compare against')
+
+    def handle(self, *args, **kwargs):
+        self.base_url = kwargs['base_url']
+        self.concurrency = kwargs['concurrency'] if self.base_url else 1
+        count = kwargs['requests']
+        scenarios = [name for name in SCENARIOS if name in (kwargs['scenarios'] or SCENARIOS)]
+        if not Resource.objects.exists() or not Student.objects.exists():
+            raise CommandError('The database is empty; run seed_library first')
+
+        first_report = Report.objects.order_by('-pk').values_list('pk', flat=True).first() or 0
+        rng = random.Random(kwargs['seed'])
+        warmup = kwargs['warmup']
+        results = {}
+        borrow_ids = []
+        try:
+            for name in scenarios:
+                if name in READ_SCENARIOS:
+                    requests = [('GET', path, None) for path in self.read_paths(name, rng, warmup + count)]
+                    self.run(requests[:warmup])
+                    results[name] = self.run(requests[warmup:])
+                elif name == 'checkout':
+                    results[name], borrow_ids = self.checkout(count)
+                elif name == 'return':
+                    results[name] = self.return_loans(borrow_ids, count)
+                else:
+                    results[name] = self.report(kwargs['report_requests'])
+                self.stderr.write(self.summary(name, results[name]))
+        finally:
+            # Loans the run checked out but did not bring back (no `return`
+            # scenario, or failed returns) are returned directly
+            still_out = Borrow.objects.filter(pk__in=borrow_ids, status__in=Borrow.OPEN_STATUSES)
+            bulk_return([{'borrow_record_id': pk} for pk in still_out.values_list('pk', flat=True)])
+            for report in Report.objects.filter(pk__gt=first_report):
+                report.file.delete(save=False)
+                report.delete()
+
+        output = {
+            'commit': self.commit(),
+            'timestamp': timezone.now().isoformat(),
+            'mode': 'http' if self.base_url else 'test-client',
+            'base_url': self.base_url,
+            'concurrency': self.concurrency,
+            'dataset': {
+                'resources': estimated_row_count(Resource.objects.all()) or Resource.objects.count(),
+                'students': estimated_row_count(Student.objects.all()) or Student.objects.count(),
+                'borrows': estimated_row_count(Borrow.objects.all()) or Borrow.objects.count(),
+            },
+            'scenarios': results,
+        }
+        if kwargs['baseline']:
+            self.compare(kwargs['baseline'], results)
+        text = json.dumps(output, indent=2)
+        if kwargs['output']:
+            with open(kwargs['output'], 'w') as out:
+                out.write(text + '\n')
+        else:
+            self.stdout.write(text)
+
+    def read_paths(self, name, rng, count):
+        """
+        `count` GET paths for a read scenario. Each starts at a random page
+        and filters and search terms change from one request to the next, so
+        the run measures the database and serializers rather than cache hits.
+        """
+        if name == 'search':
+            words = set()
+            for title in self.sample(rng, Resource.objects.all(), 'title', 50):
+                words.update(title.lower().split())
+            words = sorted(words) or ['the']
+            types = [None, 'BOOK', 'MAGAZINE']
+            return [
+                self.page_path('/api/resources/', {
+                    'q': ' '.join(rng.sample(words, min(rng.randint(1, 2), len(words)))),
+                    'resource_type': rng.choice(types), 'page_size': 20,
+                })
+                for _ in range(count)
+            ]
+        if name in ('list', 'filter'):
+            # Any resource_id works as a starting point, filtered or not
+            positions = self.sample(rng, Resource.objects.all(), 'resource_id', count)
+            if name == 'list':
+                return [self.page_path('/api/resources/', {'page_size': 50}, p) for p in positions]
+            return [
+                self.page_path('/api/resources/', {
+                    'status': rng.choice(['AVAILABLE', 'BORROWED']),
+                    'resource_type': rng.choice(['BOOK', 'MAGAZINE', 'NEWSPAPER', 'OTHER']),
+                    'page_size': 50,
+                }, p)
+                for p in positions
+            ]
+        # Students and borrows page by integer id, so any id within the
+        # filtered rows' range will do
+        if name == 'students':
+            filters = [{}]
+            model, path = Student, '/api/students/'
+        else:
+            filters = [{'status': status} for status in ['ACTIVE', 'OVERDUE', 'RETURNED']]
+            model, path = Borrow, '/api/borrows/'
+        bounds = [model.objects.filter(**f).aggregate(low=Min('pk'), high=Max('pk')) for f in filters]
+        paths = []
+        for _ in range(count):
+            i = rng.randrange(len(filters))
+            position = rng.randint(bounds[i]['low'] or 0, (bounds[i]['high'] or 0) + 1)
+            paths.append(self.page_path(path, {**filters[i], 'page_size': 50}, position))
+        return paths
+
+    def sample(self, rng, queryset, field, k):
+        """`k` random values of `field` from `queryset`, streamed rather than loaded (reservoir sampling)."""
+        sample = []
+        for n, value in enumerate(queryset.order_by(field).values_list(field, flat=True).iterator(chunk_size=10000)):
+            if n < k:
+                sample.append(value)
+            else:
+                slot = rng.randrange(n + 1)
+                if slot < k:
+                    sample[slot] = value
+        rng.shuffle(sample)
+        # A table smaller than `k` repeats its rows
+        return [sample[i % len(sample)] for i in range(k)]
+
+    def page_path(self, path, params, position=None):
+        """`path` with `params`, starting at the cursor `position` if one is given."""
+        paginator = LibraryCursorPagination()
+        paginator.base_url = f"{path}?{urlencode({k: v for k, v in params.items() if v is not None})}"
+        if position is None:
+            return paginator.base_url
+        return paginator.encode_cursor(Cursor(offset=0, reverse=False, position=position))
+
+    def checkout(self, count):
+        students = list(
+            Student.objects.filter(current_borrow__isnull=True).order_by('pk').values_list('student_id', flat=True)[:count]
+        )
+        resources = list(
+            Resource.objects.filter(status='AVAILABLE').order_by('pk').values_list('pk', flat=True)[:count]
+        )
+        due = (timezone.localdate() + timedelta(days=14)).isoformat()
+        requests = [
+            ('POST', '/api/borrows/', {'student_id': student_id, 'resource_id': resource_id, 'due_date': due})
+            for student_id, resource_id in zip(students, resources)
+        ]
+        if len(requests) < count:
+            self.stderr.write(self.style.WARNING(f"Only {len(requests)} free student/resource pairs for checkout"))
+        result = self.run(requests)
+        return result, result.pop('ids')
+
+    def return_loans(self, borrow_ids, count):
+        if not borrow_ids:
+            # Without a checkout run, bring back loans that are already out
+            borrow_ids = list(
+                Borrow.objects.filter(status__in=Borrow.OPEN_STATUSES).order_by('pk').values_list('pk', flat=True)[:count]
+            )
+        result = self.run([('POST', '/api/returns/', {'borrow_record_id': pk}) for pk in borrow_ids[:count]])
+        result.pop('ids')
+        return result
+
+    def report(self, count):
+        # Ranges ending today are never served from a stored file
+        today = timezone.localdate()
+        requests = [
+            ('POST', '/api/reports/generate/', {
+                'report_type': 'BORROW', 'start_date': (today - timedelta(days=7)).isoformat(),
+                'end_date': today.isoformat(),
+            })
+        ] * count
+        result = self.run(requests)
+        result.pop('ids')
+        return result
+
+    def run(self, requests):
+        """Send `requests` as (method, path, body) and return their timing summary."""
+        timings, errors, ids = [], [], []
+        lock = threading.Lock()
+        pending = iter(requests)
+
+        def worker():
+            send = self.http_sender() if self.base_url else self.client_sender()
+            while True:
+                with lock:
+                    request = next(pending, None)
+                if request is None:
+                    break
+                started = time.perf_counter()
+                try:
+                    status, body = send(*request)
+                except (OSError, http.client.HTTPException) as exc:
+                    status, body = type(exc).__name__, None
+                elapsed = time.perf_counter() - started
+                with lock:
+                    timings.append(elapsed)
+                    if status not in (200, 201):
+                        errors.append(status)
+                    elif request[0] == 'POST' and body:
+                        ids.append(json.loads(body).get('id'))
+
+        started = time.perf_counter()
+        if self.base_url:
+            threads = [threading.Thread(target=worker) for _ in range(self.concurrency)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        else:
+            # The test client shares this thread's database connection
+            worker()
+        return self.summarize(requests, timings, errors, time.perf_counter() - started, ids)
+
+    def client_sender(self):
+        client = Client(HTTP_HOST=client_host())
+
+        def send(method, path, body):
+            if method == 'GET':
+                response = client.get(path)
+            else:
+                response = client.post(path, body, content_type='application/json')
+            return response.status_code, response.content
+
+        return send
+
+    def http_sender(self):
+        target = urlsplit(self.base_url)
+        state = {'connection': None}
+
+        def send(method, path, body):
+            # One persistent connection per client, reopened after errors
+            if state['connection'] is None:
+                state['connection'] = http.client.HTTPConnection(target.hostname, target.port or 80, timeout=60)
+            headers = {'Host': target.netloc}
+            payload = None
+            if body is not None:
+                payload = json.dumps(body)
+                headers['Content-Type'] = 'application/json'
+            try:
+                state['connection'].request(method, path, body=payload, headers=headers)
+                response = state['connection'].getresponse()
+                return response.status, response.read()
+            except (OSError, http.client.HTTPException):
+                state['connection'].close()
+                state['connection'] = None
+                raise
+
+        return send
+
+    def summarize(self, requests, timings, errors, elapsed, ids):
+        timings = sorted(timings)
+        method, path, _ = requests[0] if requests else ('GET', None, None)
+        # Read paths vary per request; report the endpoint they share
+        path = urlsplit(path).path if path else path
+
+        def percentile(p):
+            return round(timings[min(len(timings) - 1, int(len(timings) * p))] * 1000, 2) if timings else None
+
+        return {
+            'method': method,
+            'path': path,
+            'distinct_requests': len({(r[1], json.dumps(r[2], sort_keys=True)) for r in requests}),
+            'requests': len(timings),
+            'errors': len(errors),
+            'error_statuses': sorted({str(status) for status in errors}),
+            'p50_ms': round(statistics.median(timings) * 1000, 2) if timings else None,
+            'p95_ms': percentile(0.95),
+            'p99_ms': percentile(0.99),
+            'mean_ms': round(statistics.mean(timings) * 1000, 2) if timings else None,
+            'max_ms': round(timings[-1] * 1000, 2) if timings else None,
+            'throughput_rps': round(len(timings) / elapsed, 1) if elapsed else None,
+            'ids': ids,
+        }
+
+    def summary(self, name, result):
+        line = (
+            f"{name}: {result['requests']} requests, {result['throughput_rps']} req/s, "
+            f"p50={result['p50_ms']}ms p95={result['p95_ms']}ms p99={result['p99_ms']}ms errors={result['errors']}"
+        )
+        return self.style.SUCCESS(line) if not result['errors'] else self.style.WARNING(line)
+
+    def compare(self, path, results):
+        with open(path) as baseline_file:
+            baseline = json.load(baseline_file)
+        self.stderr.write(f"Compared with {baseline.get('commit') or path}:")
+        for name, result in results.items():
+            before = baseline.get('scenarios', {}).get(name)
+            if not before:
+                continue
+            changes = []
+            for key in ['p50_ms', 'p95_ms', 'p99_ms', 'throughput_rps']:
+                if before.get(key) and result.get(key) is not None:
+                    changes.append(f"{key} {before[key]} -> {result[key]} ({(result[key] / before[key] - 1) * 100:+.1f}%)")
+            self.stderr.write(f"  {name}: {', '.join(changes)}")
+
+    def commit(self):
+        try:
+            return subprocess.run(
+                ['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, check=True,
+            ).stdout.strip()
+        except (OSError, subprocess.CalledProcessError):
+            return None
@@ -0,0 +1,105 @@
+import statistics
+import time
+from datetime import date, timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.test import Client
+from api.models import Student, Resource, Borrow
+from .benchmark_api import client_host
+
+class Rollback(Exception):
+    pass
+
+class Command(BaseCommand):
+    help = (
+        'Seed a temporary dataset and time checkouts and list requests. '
+        'Everything runs inside a transaction that is rolled back at the end. '
+        'Run it before and after "migrate api" to compare index changes.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--resources', type=int, default=20000, help='Number of resources to seed')
+        parser.add_argument('--students', type=int, default=5000, help='Number of students to seed')
+        parser.add_argument('--history', type=int, default=50000, help='Number of returned borrows to seed')
+        parser.add_argument('--checkouts', type=int, default=200, help='Number of checkouts to time')
+        parser.add_argument('--requests', type=int, default=50, help='Number of list requests to time per URL')
+
+    def handle(self, *args, **kwargs):
+        try:
+            with transaction.atomic():
+                self.seed(kwargs['resources'], kwargs['students'], kwargs['history'])
+                self.report('checkout', self.time_checkouts(kwargs['checkouts']))
+                client = Client(HTTP_HOST=client_host())
+                for url in ['/api/resources/', '/api/resources/?status=AVAILABLE',
+                            '/api/borrows/?status=ACTIVE', '/api/returns/']:
+                    self.report(f"GET {url}", self.time_requests(client, url, kwargs['requests']))
+                raise Rollback
+        except Rollback:
+            pass
+
+    def seed(self, resources, students, history):
+        started = time.perf_counter()
+        Resource.objects.bulk_create(
+            [Resource(resource_id=f"BENCH-R{i}", title=f"Benchmark title {i}",
+                      resource_type=Resource.RESOURCE_TYPES[i % 4][0], author=f"Author {i % 500}",
+                      publication_year=1950 + i % 70) for i in range(resources)],
+            batch_size=1000,
+        )
+        Student.objects.bulk_create(
+            [Student(student_id=f"B{i:010d}", first_name=f"First{i}", last_name=f"Last{i}",
+                     phone='09000000000', email=f"bench{i}@example.com") for i in range(students)],
+            batch_size=1000,
+        )
+        resource_ids = list(Resource.objects.filter(resource_id__startswith='BENCH-R').values_list('pk', flat=True))
+        student_ids = list(Student.objects.filter(email__startswith='bench').values_list('pk', flat=True))
+        due = date.today() - timedelta(days=30)
+        Borrow.objects.bulk_create(
+            [Borrow(student_id=student_ids[i % len(student_ids)], resource_id=resource_ids[i % len(resource_ids)],
+                    due_date=due, status='RETURNED') for i in range(history)],
+            batch_size=1000,
+        )
+        self.stdout.write(f"Seeded {resources} resources, {students} students and {history} borrows "
+                          f"in {time.perf_counter() - started:.1f}s")
+
+    def time_checkouts(self, count):
+        students = list(Student.objects.filter(email__startswith='bench')[:count])
+        resources = list(Resource.objects.filter(resource_id__startswith='BENCH-R', status='AVAILABLE')[:count])
+        due = date.today() + timedelta(days=14)
+        timings = []
+        for student, resource in zip(students, resources):
+            started = time.perf_counter()
+            Borrow.objects.create(student=student, resource=resource, due_date=due)
+            timings.append(time.perf_counter() - started)
+        return timings
+
+    def time_requests(self, client, url, count):
+        # Repeating one URL would time the list cache, so walk the pages
+        # through their `next` links; past the last page, start over with
+        # another page size
+        timings = []
+        page_size = 50
+        page_url = None
+        for _ in range(count):
+            if page_url is None:
+                page_url = f"{url}{'&' if '?' in url else '?'}page_size={page_size}"
+                page_size += 1
+            started = time.perf_counter()
+            response = client.get(page_url)
+            timings.append(time.perf_counter() - started)
+            if response.status_code != 200:
+                self.stdout.write(self.style.ERROR(f"GET {page_url} returned {response.status_code}"))
+                break
+            page_url = response.json()['next']
+        return timings
+
+    def report(self, label, timings):
+        if not timings:
+            self.stdout.write(self.style.WARNING(f"{label}: no samples"))
+            return
+        timings = sorted(timings)
+        p95 = timings[min(len(timings) - 1, int(len(timings) * 0.95))]
+        self.stdout.write(self.style.SUCCESS(
+            f"{label}: n={len(timings)} mean={statistics.mean(timings) * 1000:.2f}ms "
+            f"p50={statistics.median(timings) * 1000:.2f}ms p95={p95 * 1000:.2f}ms"
+        ))
@@ -0,0 +1,84 @@
+import time
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+from rest_framework.permissions import BasePermission, IsAuthenticated
+from rest_framework.test import APIRequestFactory
+from rest_framework_simplejwt.tokens import AccessToken
+from api.authentication import RevocableJWTAuthentication, StatelessJWTAuthentication
+from api.models import UserProfile
+from api.permissions import IsLibrarian
+from api.views import ResourceListCreate, MyTokenObtainPairSerializer
+
+class Rollback(Exception):
+    pass
+
+class ProfileLookupIsLibrarian(BasePermission):
+    """The previous IsLibrarian, which loaded the profile on every request."""
+
+    def has_permission(self, request, view):
+        user = request.user
+        if not user or not user.is_authenticated:
+            return False
+        return hasattr(user, 'profile') and user.profile.user_level in ['librarian', 'admin']
+
+class Command(BaseCommand):
+    help = (
+        'Measure requests per second and queries per request on GET /api/resources/ '
+        'behind a librarian-only permission, comparing authentication and role resolution strategies. '
+        'The benchmark user is created inside a transaction that is rolled back.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=2000, help='Number of requests per strategy')
+
+    def handle(self, *args, **kwargs):
+        try:
+            with transaction.atomic():
+                user = User.objects.create_user(username='permission-benchmark', password='unused')
+                UserProfile.objects.create(user=user, user_level='librarian')
+                with_claim = str(MyTokenObtainPairSerializer.get_token(user).access_token)
+                without_claim = str(AccessToken.for_user(user))
+
+                database_user = RevocableJWTAuthentication
+                cases = [
+                    ('authenticated only (baseline)', database_user, IsAuthenticated, with_claim),
+                    ('profile lookup (previous)', database_user, ProfileLookupIsLibrarian, with_claim),
+                    ('user_level claim', database_user, IsLibrarian, with_claim),
+                    ('cached user_level (no claim)', database_user, IsLibrarian, without_claim),
+                    ('stateless token user + claim', StatelessJWTAuthentication, IsLibrarian, with_claim),
+                ]
+                for label, authentication_class, permission_class, token in cases:
+                    self.run_case(label, authentication_class, permission_class, token, kwargs['requests'])
+                raise Rollback
+        except Rollback:
+            pass
+
+    def run_case(self, label, authentication_class, permission_class, token, count):
+        view = ResourceListCreate.as_view(
+            authentication_classes=[authentication_class], permission_classes=[permission_class],
+        )
+        factory = APIRequestFactory()
+
+        def request():
+            response = view(factory.get('/api/resources/', {'page_size': 1}, HTTP_AUTHORIZATION=f'Bearer {token}'))
+            response.render()
+            return response
+
+        # Warm the catalogue and role caches so only per-request work is measured
+        response = request()
+        if response.status_code != 200:
+            self.stdout.write(self.style.ERROR(f"{label}: GET returned {response.status_code}"))
+            return
+        with CaptureQueriesContext(connection) as queries:
+            request()
+
+        started = time.perf_counter()
+        for _ in range(count):
+            request()
+        elapsed = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(
+            f"{label}: {count / elapsed:.0f} req/s, {len(queries)} queries/request"
+        ))
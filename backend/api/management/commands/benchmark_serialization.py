@@ -0,0 +1,76 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import F
+from rest_framework import serializers
+from api.models import Resource
+from api.serializers import ResourceSerializer
+
+class Rollback(Exception):
+    pass
+
+class PreviousResourceSerializer(serializers.ModelSerializer):
+    """ResourceSerializer as it was, with `year` as a method field."""
+    year = serializers.SerializerMethodField()
+
+    class Meta:
+        model = Resource
+        fields = ['resource_id', 'title', 'resource_type', 'author', 'publication_year', 'status', 'year']
+
+    def get_year(self, obj):
+        return obj.publication_year
+
+class Command(BaseCommand):
+    help = (
+        'Measure CPU time per 10k rows to load and serialize resources: ModelSerializer over model '
+        'instances (`year` as a method field and as a source alias) against the `.values_list()` list path. '
+        'The rows are seeded inside a transaction that is rolled back.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=10000, help='Number of resources to seed and serialize')
+        parser.add_argument('--repeat', type=int, default=5, help='Runs per strategy; the fastest is reported')
+
+    def handle(self, *args, **kwargs):
+        rows, repeat = kwargs['rows'], kwargs['repeat']
+        try:
+            with transaction.atomic():
+                Resource.objects.bulk_create(
+                    [Resource(resource_id=f"SER-R{i}", title=f"Serialization title {i}",
+                              resource_type=Resource.RESOURCE_TYPES[i % 4][0], author=f"Author {i % 500}",
+                              publication_year=1950 + i % 70) for i in range(rows)],
+                    batch_size=1000,
+                )
+                queryset = Resource.objects.filter(resource_id__startswith='SER-R').order_by('resource_id')
+                fields = ResourceSerializer.Meta.fields
+                columns = [
+                    name if field.source == name else F(field.source)
+                    for name, field in ResourceSerializer().fields.items()
+                ]
+
+                self.report('ModelSerializer, year method field (previous)', rows, repeat,
+                            lambda: list(queryset.all()), lambda items: PreviousResourceSerializer(items, many=True).data)
+                self.report('ModelSerializer', rows, repeat,
+                            lambda: list(queryset.all()), lambda items: ResourceSerializer(items, many=True).data)
+                self.report('values_list rows', rows, repeat,
+                            lambda: list(queryset.values_list(*columns)),
+                            lambda items: [dict(zip(fields, row)) for row in items])
+                raise Rollback
+        except Rollback:
+            pass
+
+    def report(self, label, rows, repeat, load, serialize):
+        load_times, serialize_times = [], []
+        for _ in range(repeat):
+            started = time.process_time()
+            items = load()
+            loaded = time.process_time()
+            serialize(items)
+            load_times.append(loaded - started)
+            serialize_times.append(time.process_time() - loaded)
+        scale = 10000 / rows * 1000
+        self.stdout.write(self.style.SUCCESS(
+            f"{label}: load {min(load_times) * scale:.0f}ms + serialize {min(serialize_times) * scale:.0f}ms "
+            f"CPU per 10k rows"
+        ))
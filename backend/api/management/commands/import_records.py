@@ -0,0 +1,38 @@
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+from api.imports import IMPORTERS, IMPORT_FORMATS, IMPORT_BATCH_SIZE, read_rows, import_records
+
+class Command(BaseCommand):
+    help = (
+        'Upsert students or resources from a CSV (with header row) or JSON Lines file. '
+        'Students are matched on student_id and resources on resource_id.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('kind', choices=sorted(IMPORTERS), help='What the file contains')
+        parser.add_argument('path', help='File to import')
+        parser.add_argument('--format', choices=IMPORT_FORMATS,
+                            help='File format (default: taken from the file extension)')
+        parser.add_argument('--batch-size', type=int, default=IMPORT_BATCH_SIZE, help='Rows per upsert batch')
+        parser.add_argument('--show-errors', type=int, default=20, help='Number of row errors to print')
+
+    def handle(self, *args, **kwargs):
+        path = Path(kwargs['path'])
+        fmt = kwargs['format'] or path.suffix.lstrip('.').lower()
+        if fmt not in IMPORT_FORMATS:
+            raise CommandError(f"Cannot tell the format of {path.name}; pass --format")
+        if not path.exists():
+            raise CommandError(f"{path} does not exist")
+
+        with path.open(encoding='utf-8-sig', newline='') as stream:
+            report = import_records(kwargs['kind'], read_rows(stream, fmt), kwargs['batch_size'])
+
+        for error in report['errors'][:kwargs['show_errors']]:
+            self.stdout.write(self.style.WARNING(f"row {error['row']}: {error['errors']}"))
+        if report['failed'] > kwargs['show_errors']:
+            self.stdout.write(self.style.WARNING(f"... {report['failed'] - kwargs['show_errors']} more failed rows"))
+        self.stdout.write(self.style.SUCCESS(
+            f"Imported {report['processed']} rows: {report['created']} created, {report['updated']} updated, "
+            f"{report['failed']} failed in {report['seconds']:.2f}s ({report['rows_per_second']} rows/s)"
+        ))
@@ -0,0 +1,94 @@
+import http.client
+import statistics
+import threading
+import time
+from urllib.parse import urlsplit
+
+from django.core.management.base import BaseCommand, CommandError
+from api.models import Student, Resource
+
+class Command(BaseCommand):
+    help = (
+        'Load-test the catalogue read endpoints of a running server, sync (DRF) and async side by side. '
+        'To compare deployments, run it against the same database served by WSGI '
+        '(e.g. "gunicorn backend.wsgi --workers 1 --threads 4") and by ASGI '
+        '(e.g. "uvicorn backend.asgi:application --workers 1") at the same worker count.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--base-url', default='http://127.0.0.1:8000', help='Server to test')
+        parser.add_argument('--concurrency', type=int, default=50, help='Concurrent clients')
+        parser.add_argument('--requests', type=int, default=2000, help='Requests per endpoint')
+        parser.add_argument('--resource-id', help='Resource used for detail requests (default: first resource)')
+        parser.add_argument('--student-id', help='Student used for lookups (default: first student)')
+
+    def handle(self, *args, **kwargs):
+        resource_id = kwargs['resource_id'] or Resource.objects.order_by('pk').values_list('pk', flat=True).first()
+        student = Student.objects.order_by('pk').values_list('pk', 'student_id').first()
+        if kwargs['student_id']:
+            student = (None, kwargs['student_id'])
+        if resource_id is None or student is None:
+            raise CommandError('Need at least one resource and one student, or --resource-id and --student-id')
+
+        endpoints = [
+            ('/api/resources/?page_size=20', '/api/async/resources/?page_size=20'),
+            (f'/api/resources/{resource_id}/', f'/api/async/resources/{resource_id}/'),
+            (None, f'/api/async/resources/{resource_id}/availability/'),
+            (f'/api/students/{student[0]}/' if student[0] else None, f'/api/async/students/{student[1]}/'),
+        ]
+        target = urlsplit(kwargs['base_url'])
+        for paths in endpoints:
+            for path in paths:
+                if path:
+                    self.report(path, *self.run(target, path, kwargs['concurrency'], kwargs['requests']))
+
+    def run(self, target, path, concurrency, count):
+        remaining = [count]
+        lock = threading.Lock()
+        timings, errors = [], []
+
+        def client():
+            # One persistent connection per client, like a polling kiosk
+            connection = http.client.HTTPConnection(target.hostname, target.port or 80, timeout=30)
+            local_timings = []
+            while True:
+                with lock:
+                    if remaining[0] == 0:
+                        break
+                    remaining[0] -= 1
+                started = time.perf_counter()
+                try:
+                    connection.request('GET', path, headers={'Host': target.netloc})
+                    response = connection.getresponse()
+                    response.read()
+                    if response.status != 200:
+                        errors.append(response.status)
+                except (OSError, http.client.HTTPException) as exc:
+                    errors.append(type(exc).__name__)
+                    connection.close()
+                    connection = http.client.HTTPConnection(target.hostname, target.port or 80, timeout=30)
+                local_timings.append(time.perf_counter() - started)
+            connection.close()
+            with lock:
+                timings.extend(local_timings)
+
+        threads = [threading.Thread(target=client) for _ in range(concurrency)]
+        started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return timings, errors, time.perf_counter() - started
+
+    def report(self, path, timings, errors, elapsed):
+        timings = sorted(timings)
+
+        def percentile(p):
+            return timings[min(len(timings) - 1, int(len(timings) * p))] * 1000
+
+        line = (
+            f"GET {path}: {len(timings) / elapsed:.0f} req/s "
+            f"p50={statistics.median(timings) * 1000:.1f}ms p95={percentile(0.95):.1f}ms "
+            f"p99={percentile(0.99):.1f}ms errors={len(errors)}"
+        )
+        self.stdout.write(self.style.SUCCESS(line) if not errors else self.style.WARNING(line))
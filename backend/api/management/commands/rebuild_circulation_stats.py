@@ -0,0 +1,65 @@
+import time
+from collections import Counter, defaultdict
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count
+from api.models import (
+    Resource, Borrow, Return,
+    DailyCirculation, StudentCirculation, ResourceTypeUtilization,
+)
+
+class Command(BaseCommand):
+    help = 'Recompute the circulation statistics tables from the Borrow, Return and Resource tables'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000, help='Rows per bulk insert')
+
+    def handle(self, *args, **kwargs):
+        batch_size = kwargs['batch_size']
+        started = time.perf_counter()
+
+        daily = defaultdict(Counter)
+        for row in Borrow.objects.values('borrow_date', 'resource__resource_type').annotate(n=Count('id')).order_by():
+            daily[(row['borrow_date'], row['resource__resource_type'])]['borrows'] += row['n']
+        for row in (Return.objects.values('return_date', 'borrow_record__resource__resource_type')
+                    .annotate(n=Count('id')).order_by()):
+            daily[(row['return_date'], row['borrow_record__resource__resource_type'])]['returns'] += row['n']
+
+        per_student = defaultdict(Counter)
+        for row in Borrow.objects.values('student_id').annotate(n=Count('id')).order_by():
+            per_student[row['student_id']]['borrows'] += row['n']
+        for row in Return.objects.values('borrow_record__student_id').annotate(n=Count('id')).order_by():
+            per_student[row['borrow_record__student_id']]['returns'] += row['n']
+
+        utilization = defaultdict(Counter)
+        for row in Resource.objects.values('resource_type').annotate(n=Count('pk')).order_by():
+            utilization[row['resource_type']]['total'] += row['n']
+        for row in (Borrow.objects.filter(status__in=Borrow.OPEN_STATUSES)
+                    .values('resource__resource_type').annotate(n=Count('id')).order_by()):
+            utilization[row['resource__resource_type']]['on_loan'] += row['n']
+
+        with transaction.atomic():
+            DailyCirculation.objects.all().delete()
+            StudentCirculation.objects.all().delete()
+            ResourceTypeUtilization.objects.all().delete()
+            DailyCirculation.objects.bulk_create(
+                [DailyCirculation(date=day, resource_type=resource_type, **counts)
+                 for (day, resource_type), counts in daily.items()],
+                batch_size=batch_size,
+            )
+            StudentCirculation.objects.bulk_create(
+                [StudentCirculation(student_id=student_pk, **counts) for student_pk, counts in per_student.items()],
+                batch_size=batch_size,
+            )
+            ResourceTypeUtilization.objects.bulk_create(
+                [ResourceTypeUtilization(resource_type=resource_type, **counts)
+                 for resource_type, counts in utilization.items()],
+                batch_size=batch_size,
+            )
+
+        elapsed = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(
+            f"Rebuilt {len(daily)} daily rows, {len(per_student)} student rows and "
+            f"{len(utilization)} utilization rows in {elapsed:.2f}s"
+        ))
@@ -0,0 +1,198 @@
+import random
+import time
+from contextlib import contextmanager
+from datetime import timedelta
+
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.core.management.color import no_style
+from django.db import connection, transaction
+from django.db.models import Max, OuterRef, Subquery
+from django.utils import timezone
+from api.models import Student, Resource, Borrow, Return
+from api.catalogue_cache import invalidate_catalogue, invalidate_student_list
+
+TITLE_WORDS = [
+    'history', 'science', 'garden', 'river', 'winter', 'empire', 'music', 'ocean', 'city', 'shadow',
+    'journey', 'light', 'machine', 'island', 'mountain', 'secret', 'letters', 'silver', 'forest', 'night',
+    'language', 'atlas', 'kingdom', 'storm', 'memory', 'physics', 'chemistry', 'poetry', 'design', 'voyage',
+    'modern', 'ancient', 'little', 'last', 'hidden', 'golden', 'northern', 'quiet', 'lost', 'endless',
+]
+FIRST_NAMES = [
+    'Ali', 'Sara', 'Reza', 'Maryam', 'John', 'Emma', 'Omar', 'Lina', 'David', 'Nora',
+    'Hassan', 'Zahra', 'Peter', 'Anna', 'Amir', 'Leila', 'James', 'Mina', 'Karim', 'Olivia',
+]
+LAST_NAMES = [
+    'Ahmadi', 'Smith', 'Karimi', 'Brown', 'Hosseini', 'Taylor', 'Rezaei', 'Wilson', 'Moradi', 'Clark',
+    'Jafari', 'Walker', 'Rahimi', 'Young', 'Sadeghi', 'King', 'Ghasemi', 'Wright', 'Najafi', 'Scott',
+]
+# Share of each resource type in the collection
+RESOURCE_TYPE_WEIGHTS = [('BOOK', 70), ('MAGAZINE', 15), ('NEWSPAPER', 10), ('OTHER', 5)]
+LOAN_DAYS = 14
+SEED_EMAIL_DOMAIN = 'seed.example.com'
+
+@contextmanager
+def historical_dates():
+    """Let bulk_create keep the generated borrow/return dates instead of stamping today."""
+    fields = [Borrow._meta.get_field('borrow_date'), Return._meta.get_field('return_date')]
+    for field in fields:
+        field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field in fields:
+            field.auto_now_add = True
+
+class Command(BaseCommand):
+    help = (
+        'Bulk-generate a synthetic library: resources, students, a borrow/return history and a set '
+        'of open loans, e.g. "seed_library --resources 1000000 --students 100000 --borrows 5000000". '
+        'Generation is deterministic for a given --seed. Rows are inserted with bulk_create in batches '
+        'and the circulation statistics are rebuilt at the end.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--resources', type=int, default=20000, help='Number of resources')
+        parser.add_argument('--students', type=int, default=5000, help='Number of students')
+        parser.add_argument('--borrows', type=int, default=100000, help='Number of borrows, open loans included')
+        parser.add_argument('--open-loans', type=float, default=0.2,
+                            help='Share of students with a loan still out (default 0.2)')
+        parser.add_argument('--days', type=int, default=730, help='How far back the history goes')
+        parser.add_argument('--batch-size', type=int, default=5000, help='Rows per bulk insert')
+        parser.add_argument('--seed', type=int, default=1, help='Random seed')
+
+    def handle(self, *args, **kwargs):
+        if Student.objects.filter(email__endswith=f"@{SEED_EMAIL_DOMAIN}").exists():
+            raise CommandError('This database already holds a seeded library; seed an empty database instead')
+        rng = random.Random(kwargs['seed'])
+        self.batch_size = kwargs['batch_size']
+        self.today = timezone.localdate()
+        started = time.perf_counter()
+
+        student_pks = self.seed_students(rng, kwargs['students'])
+        resource_ids = self.seed_resources(rng, kwargs['resources'])
+        open_loans = min(int(len(student_pks) * kwargs['open_loans']), len(resource_ids), kwargs['borrows'])
+        with historical_dates():
+            self.seed_borrows(rng, student_pks, resource_ids, kwargs['borrows'] - open_loans, kwargs['days'])
+            first_open = self.seed_open_loans(rng, student_pks, resource_ids, open_loans)
+        self.point_at_open_loans(first_open)
+        self.reset_sequences()
+
+        self.stdout.write('Rebuilding circulation statistics...')
+        call_command('rebuild_circulation_stats', batch_size=self.batch_size, stdout=self.stdout)
+        invalidate_catalogue()
+        invalidate_student_list()
+        self.stdout.write(self.style.SUCCESS(
+            f"Seeded {len(resource_ids)} resources, {len(student_pks)} students and {kwargs['borrows']} borrows "
+            f"({open_loans} open) in {time.perf_counter() - started:.1f}s"
+        ))
+
+    def insert(self, model, objs):
+        with transaction.atomic():
+            model.objects.bulk_create(objs, batch_size=self.batch_size)
+
+    def progress(self, label, done, total, started):
+        # About ten lines per phase, whatever the size
+        step = max(total // 10, 1)
+        if done != total and (done - self.batch_size) // step == done // step:
+            return
+        elapsed = time.perf_counter() - started
+        self.stdout.write(f"  {label}: {done}/{total} ({done / elapsed if elapsed else done:.0f} rows/s)")
+
+    def next_pk(self, model):
+        return (model.objects.aggregate(last=Max('pk'))['last'] or 0) + 1
+
+    def seed_students(self, rng, count):
+        # Primary keys are assigned here so borrows can refer to them
+        # without reading the students back
+        first_pk = self.next_pk(Student)
+        started = time.perf_counter()
+        for start in range(0, count, self.batch_size):
+            self.insert(Student, [
+                Student(pk=first_pk + i, student_id=f"S{i:010d}", first_name=rng.choice(FIRST_NAMES),
+                        last_name=rng.choice(LAST_NAMES), phone=f"09{rng.randrange(10 ** 9):09d}",
+                        email=f"student{i}@{SEED_EMAIL_DOMAIN}")
+                for i in range(start, min(start + self.batch_size, count))
+            ])
+            self.progress('students', min(start + self.batch_size, count), count, started)
+        return list(range(first_pk, first_pk + count))
+
+    def seed_resources(self, rng, count):
+        types, weights = zip(*RESOURCE_TYPE_WEIGHTS)
+        started = time.perf_counter()
+        for start in range(0, count, self.batch_size):
+            size = min(start + self.batch_size, count) - start
+            self.insert(Resource, [
+                Resource(resource_id=f"SEED-R{i:09d}",
+                         title=' '.join(rng.sample(TITLE_WORDS, rng.randint(2, 4))).capitalize(),
+                         resource_type=resource_type,
+                         author=f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}",
+                         publication_year=rng.randint(1900, self.today.year))
+                for i, resource_type in zip(range(start, start + size), rng.choices(types, weights, k=size))
+            ])
+            self.progress('resources', start + size, count, started)
+        return [f"SEED-R{i:09d}" for i in range(count)]
+
+    def popular(self, rng, items):
+        # Squaring skews picks towards the front of the list: a few titles
+        # circulate a lot, most rarely
+        return items[int(len(items) * rng.random() ** 2)]
+
+    def seed_borrows(self, rng, student_pks, resource_ids, count, days):
+        """Returned loans spread over the last `days` days, each with its Return row."""
+        first_pk = self.next_pk(Borrow)
+        first_return_pk = self.next_pk(Return)
+        started = time.perf_counter()
+        for start in range(0, count, self.batch_size):
+            borrows, returns = [], []
+            for i in range(start, min(start + self.batch_size, count)):
+                borrow_date = self.today - timedelta(days=rng.randint(LOAN_DAYS * 2, max(days, LOAN_DAYS * 2)))
+                borrow = Borrow(pk=first_pk + i, student_id=rng.choice(student_pks),
+                                resource_id=self.popular(rng, resource_ids), borrow_date=borrow_date,
+                                due_date=borrow_date + timedelta(days=LOAN_DAYS), status='RETURNED')
+                borrows.append(borrow)
+                returns.append(Return(pk=first_return_pk + i, borrow_record_id=borrow.pk,
+                                      return_date=borrow_date + timedelta(days=rng.randint(1, LOAN_DAYS * 2)),
+                                      condition_notes=rng.choice(['', '', '', 'Good', 'Worn cover', 'Pages marked'])))
+            with transaction.atomic():
+                Borrow.objects.bulk_create(borrows, batch_size=self.batch_size)
+                Return.objects.bulk_create(returns, batch_size=self.batch_size)
+            self.progress('returned borrows', start + len(borrows), count, started)
+
+    def seed_open_loans(self, rng, student_pks, resource_ids, count):
+        """Loans still out: distinct students and resources, some of them past due."""
+        first_pk = self.next_pk(Borrow)
+        students = rng.sample(student_pks, count)
+        resources = rng.sample(resource_ids, count)
+        for start in range(0, count, self.batch_size):
+            borrows = []
+            for i in range(start, min(start + self.batch_size, count)):
+                borrow_date = self.today - timedelta(days=rng.randint(0, LOAN_DAYS * 2))
+                due_date = borrow_date + timedelta(days=LOAN_DAYS)
+                borrows.append(Borrow(pk=first_pk + i, student_id=students[i], resource_id=resources[i],
+                                      borrow_date=borrow_date, due_date=due_date,
+                                      status='ACTIVE' if due_date >= self.today else 'OVERDUE'))
+            self.insert(Borrow, borrows)
+        self.stdout.write(f"  open loans: {count}")
+        return first_pk
+
+    def point_at_open_loans(self, first_open):
+        """Set the current-loan pointers and BORROWED status with set-based UPDATEs."""
+        open_loans = Borrow.objects.filter(pk__gte=first_open, status__in=Borrow.OPEN_STATUSES)
+        with transaction.atomic():
+            Student.objects.filter(pk__in=open_loans.values('student_id')).update(
+                current_borrow=Subquery(open_loans.filter(student=OuterRef('pk')).values('pk')[:1]),
+            )
+            Resource.objects.filter(pk__in=open_loans.values('resource_id')).update(
+                status='BORROWED',
+                current_borrow=Subquery(open_loans.filter(resource=OuterRef('pk')).values('pk')[:1]),
+            )
+
+    def reset_sequences(self):
+        # Explicit primary keys leave PostgreSQL sequences behind; MySQL and
+        # SQLite move their counters on insert
+        statements = connection.ops.sequence_reset_sql(no_style(), [Student, Borrow, Return])
+        if statements:
+            with connection.cursor() as cursor:
+                for sql in statements:
+                    cursor.execute(sql)
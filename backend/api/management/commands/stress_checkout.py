@@ -0,0 +1,93 @@
+import threading
+from datetime import date, timedelta
+
+from django.core.exceptions import ValidationError
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, DatabaseError
+from api.models import Student, Resource, Borrow, Return
+from api.services import checkout, return_borrow
+
+class Command(BaseCommand):
+    help = (
+        'Race several threads checking out the same resource, then returning the resulting borrow, '
+        'and verify that exactly one checkout and one return win. '
+        'Uses committed rows in the configured database and removes them afterwards.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--threads', type=int, default=8, help='Concurrent checkouts per round')
+        parser.add_argument('--rounds', type=int, default=20, help='Number of rounds')
+
+    def handle(self, *args, **kwargs):
+        threads = kwargs['threads']
+        rounds = kwargs['rounds']
+        students = [
+            Student(student_id=f"X{i:010d}", first_name='Stress', last_name=str(i),
+                    phone='09000000000', email=f"stress{i}@example.com")
+            for i in range(threads)
+        ]
+        Student.objects.bulk_create(students)
+        student_ids = [s.student_id for s in students]
+        failures = 0
+        try:
+            for round_no in range(rounds):
+                resource = Resource.objects.create(
+                    resource_id=f"STRESS-{round_no}", title='Stress test', resource_type='OTHER',
+                    author='Stress', publication_year=2000,
+                )
+                due = date.today() + timedelta(days=14)
+                winners, errors = self.race(lambda student_id: checkout(student_id, resource.resource_id, due),
+                                            student_ids)
+                active = Borrow.objects.filter(resource=resource, status='ACTIVE').count()
+                if winners != 1 or active != 1:
+                    failures += 1
+                    self.stdout.write(self.style.ERROR(
+                        f"Round {round_no}: {winners} checkouts succeeded, {active} active borrows"
+                    ))
+                else:
+                    borrow_id = Borrow.objects.get(resource=resource).pk
+                    returned, duplicates = self.race(lambda _: return_borrow(borrow_id), student_ids)
+                    returns = Return.objects.filter(borrow_record_id=borrow_id).count()
+                    if returned != 1 or returns != 1:
+                        failures += 1
+                        self.stdout.write(self.style.ERROR(
+                            f"Round {round_no}: {returned} returns succeeded, {returns} return rows"
+                        ))
+                    else:
+                        self.stdout.write(f"Round {round_no}: 1 checkout and 1 return won, "
+                                          f"{errors} checkouts and {duplicates} returns rejected")
+                # Free the students for the next round
+                Borrow.objects.filter(resource=resource).delete()
+                resource.delete()
+        finally:
+            Student.objects.filter(student_id__in=student_ids).delete()
+
+        if failures:
+            raise CommandError(f"{failures} of {rounds} rounds allowed a double checkout or return")
+        self.stdout.write(self.style.SUCCESS(
+            f"All {rounds} rounds had exactly one successful checkout and one successful return"
+        ))
+
+    def race(self, action, student_ids):
+        barrier = threading.Barrier(len(student_ids))
+        results = []
+        lock = threading.Lock()
+
+        def worker(student_id):
+            barrier.wait()
+            try:
+                action(student_id)
+                outcome = True
+            except (ValidationError, DatabaseError):
+                outcome = False
+            finally:
+                connection.close()
+            with lock:
+                results.append(outcome)
+
+        workers = [threading.Thread(target=worker, args=(student_id,)) for student_id in student_ids]
+        for worker_thread in workers:
+            worker_thread.start()
+        for worker_thread in workers:
+            worker_thread.join()
+        return results.count(True), results.count(False)
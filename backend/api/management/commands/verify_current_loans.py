@@ -0,0 +1,96 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+from api.models import Student, Resource, Borrow
+from api.catalogue_cache import invalidate_catalogue
+from api.events import publish_resource_status
+
+class Command(BaseCommand):
+    help = (
+        'Check the current_borrow pointers on students and resources, and resource status, '
+        'against the open loans in the Borrow table. With --repair, fix any drift; '
+        'otherwise exit with an error when drift is found.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--repair', action='store_true', help='Rewrite drifted pointers and statuses')
+        parser.add_argument('--batch-size', type=int, default=1000, help='Rows per UPDATE statement')
+
+    def handle(self, *args, **kwargs):
+        started = time.perf_counter()
+
+        # The newest open loan is the one the pointers should hold
+        student_loans, resource_loans = {}, {}
+        doubled_students, doubled_resources = set(), set()
+        for pk, student_pk, resource_pk in (
+            Borrow.objects.filter(status__in=Borrow.OPEN_STATUSES).order_by('pk')
+            .values_list('pk', 'student_id', 'resource_id')
+        ):
+            if student_pk in student_loans:
+                doubled_students.add(student_pk)
+            if resource_pk in resource_loans:
+                doubled_resources.add(resource_pk)
+            student_loans[student_pk] = pk
+            resource_loans[resource_pk] = pk
+
+        stored = dict(Student.objects.filter(current_borrow__isnull=False).values_list('pk', 'current_borrow_id'))
+        student_drift = {
+            pk: student_loans.get(pk) for pk in student_loans.keys() | stored.keys()
+            if student_loans.get(pk) != stored.get(pk)
+        }
+
+        stored = {
+            pk: (loan, status) for pk, loan, status in
+            Resource.objects.filter(Q(current_borrow__isnull=False) | Q(status='BORROWED'))
+            .values_list('pk', 'current_borrow_id', 'status')
+        }
+        resource_drift = {}
+        for pk in resource_loans.keys() | stored.keys():
+            loan = resource_loans.get(pk)
+            expected = (loan, 'AVAILABLE' if loan is None else 'BORROWED')
+            if stored.get(pk, (None, 'AVAILABLE')) != expected:
+                resource_drift[pk] = expected
+
+        for label, doubled in [('students', doubled_students), ('resources', doubled_resources)]:
+            if doubled:
+                self.stdout.write(self.style.WARNING(
+                    f"{len(doubled)} {label} have more than one open loan; the newest one is kept: "
+                    f"{', '.join(map(str, sorted(doubled)[:20]))}"
+                ))
+        summary = f"{len(student_drift)} students and {len(resource_drift)} resources out of step with Borrow"
+
+        if kwargs['repair'] and (student_drift or resource_drift):
+            self.repair(student_drift, resource_drift, kwargs['batch_size'])
+            self.stdout.write(self.style.SUCCESS(
+                f"Repaired {summary} in {time.perf_counter() - started:.2f}s"
+            ))
+        elif student_drift or resource_drift:
+            raise CommandError(f"{summary}; run with --repair to fix them")
+        else:
+            self.stdout.write(self.style.SUCCESS(
+                f"All current-loan pointers match the Borrow table ({len(student_loans)} open loans checked "
+                f"in {time.perf_counter() - started:.2f}s)"
+            ))
+
+    def repair(self, student_drift, resource_drift, batch_size):
+        now = timezone.now()
+        students = [Student(pk=pk, current_borrow_id=loan) for pk, loan in student_drift.items()]
+        resources = [
+            Resource(pk=pk, current_borrow_id=loan, status=status, updated_at=now)
+            for pk, (loan, status) in resource_drift.items()
+        ]
+        with transaction.atomic():
+            # Clear first so moving a pointer never trips the unique constraint
+            for model, pks in [(Student, list(student_drift)), (Resource, list(resource_drift))]:
+                for start in range(0, len(pks), batch_size):
+                    model.objects.filter(pk__in=pks[start:start + batch_size]).update(current_borrow=None)
+            Student.objects.bulk_update(
+                [student for student in students if student.current_borrow_id is not None],
+                ['current_borrow'], batch_size=batch_size,
+            )
+            Resource.objects.bulk_update(resources, ['current_borrow', 'status', 'updated_at'], batch_size=batch_size)
+            invalidate_catalogue(list(resource_drift))
+            publish_resource_status({resource.pk: resource.status for resource in resources})
@@ -0,0 +1,206 @@
+import json
+import logging
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+from .catalogue_cache import cache_stats
+
+# Request metrics, aggregated per process and served in the Prometheus text
+# format at /api/metrics/. Each worker reports its own numbers; Prometheus
+# sums them across the scraped instances. MetricsMiddleware opens a
+# RequestStats for each request, the database execute wrapper below adds
+# every query to it, and the totals are folded into the histograms when
+# the response leaves the middleware.
+SLOW_REQUEST_SECONDS = getattr(settings, 'SLOW_REQUEST_SECONDS', 1.0)
+# At most this many statements are kept per request for the slow-request log
+SLOW_REQUEST_MAX_QUERIES = 50
+
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+
+logger = logging.getLogger('api.metrics')
+
+_current = ContextVar('request_stats', default=None)
+
+
+class RequestStats:
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.queries = 0
+        self.db_seconds = 0.0
+        self.statements = []
+
+    def add_query(self, sql, seconds):
+        self.queries += 1
+        self.db_seconds += seconds
+        if len(self.statements) < SLOW_REQUEST_MAX_QUERIES:
+            self.statements.append((sql, seconds))
+
+
+def record_query(execute, sql, params, many, context):
+    stats = _current.get()
+    if stats is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        stats.add_query(sql, time.perf_counter() - started)
+
+
+@contextmanager
+def track_queries():
+    """Collect the database queries run in this context into a RequestStats."""
+    stats = RequestStats()
+    token = _current.set(stats)
+    try:
+        yield stats
+    finally:
+        _current.reset(token)
+
+
+@receiver(connection_created)
+def wrap_connection(sender, connection, **kwargs):
+    if record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(record_query)
+
+
+class Histogram:
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+
+
+class Registry:
+    """Counters and histograms keyed by (metric name, label values)."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.counters = {}
+        self.histograms = {}
+
+    def inc(self, name, labels, value=1):
+        with self.lock:
+            key = (name, labels)
+            self.counters[key] = self.counters.get(key, 0) + value
+
+    def observe(self, name, labels, value, buckets):
+        with self.lock:
+            key = (name, labels)
+            if key not in self.histograms:
+                self.histograms[key] = Histogram(buckets)
+            self.histograms[key].observe(value)
+
+    def snapshot(self):
+        with self.lock:
+            counters = dict(self.counters)
+            histograms = {
+                key: (histogram.buckets, list(histogram.counts), histogram.sum)
+                for key, histogram in self.histograms.items()
+            }
+        return counters, histograms
+
+
+registry = Registry()
+
+HELP = {
+    'readingroom_http_requests_total': ('counter', 'Requests handled, by route, method and status code.'),
+    'readingroom_http_request_duration_seconds': (
+        'histogram', 'Time until the response left the middleware (headers only for streaming responses).',
+    ),
+    'readingroom_http_request_db_queries': ('histogram', 'Database queries run while handling a request.'),
+    'readingroom_http_request_db_seconds': ('histogram', 'Time spent in database queries per request.'),
+    'readingroom_http_response_size_bytes': ('histogram', 'Response body size (non-streaming responses).'),
+    'readingroom_http_slow_requests_total': ('counter', 'Requests slower than SLOW_REQUEST_SECONDS.'),
+    'readingroom_catalogue_cache_total': ('counter', 'Catalogue cache lookups, by result.'),
+}
+
+
+def route_of(request):
+    match = getattr(request, 'resolver_match', None)
+    # The route pattern, not the path, keeps label cardinality bounded
+    return match.route if match is not None else 'unmatched'
+
+
+def record_request(request, response, stats):
+    elapsed = time.perf_counter() - stats.started
+    route = route_of(request)
+    labels = (('route', route), ('method', request.method))
+    registry.inc('readingroom_http_requests_total', labels + (('status', str(response.status_code)),))
+    registry.observe('readingroom_http_request_duration_seconds', labels, elapsed, DURATION_BUCKETS)
+    registry.observe('readingroom_http_request_db_queries', labels, stats.queries, QUERY_COUNT_BUCKETS)
+    registry.observe('readingroom_http_request_db_seconds', labels, stats.db_seconds, DURATION_BUCKETS)
+    size = None if response.streaming else len(response.content)
+    if size is not None:
+        registry.observe('readingroom_http_response_size_bytes', labels, size, SIZE_BUCKETS)
+
+    if elapsed >= SLOW_REQUEST_SECONDS:
+        registry.inc('readingroom_http_slow_requests_total', labels)
+        entry = {
+            'event': 'slow_request',
+            'method': request.method,
+            'path': request.path,
+            'route': route,
+            'status': response.status_code,
+            'duration_ms': round(elapsed * 1000, 1),
+            'db_queries': stats.queries,
+            'db_ms': round(stats.db_seconds * 1000, 1),
+            'response_bytes': size,
+            # Statement text only; parameters may hold personal data
+            'sql': [{'sql': sql, 'ms': round(seconds * 1000, 2)} for sql, seconds in stats.statements],
+            'sql_truncated': stats.queries > len(stats.statements),
+        }
+        logger.warning(json.dumps(entry), extra={'slow_request': entry})
+
+
+def escape_label(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def format_labels(labels):
+    if not labels:
+        return ''
+    return '{' + ','.join(f'{name}="{escape_label(value)}"' for name, value in labels) + '}'
+
+
+def format_number(value):
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+def render_metrics():
+    """All metrics of this process in the Prometheus text exposition format."""
+    counters, histograms = registry.snapshot()
+    for result, n in cache_stats().items():
+        counters[('readingroom_catalogue_cache_total', (('result', result),))] = n
+
+    lines = []
+    for name, (kind, text) in HELP.items():
+        lines.append(f"# HELP {name} {text}")
+        lines.append(f"# TYPE {name} {kind}")
+        if kind == 'counter':
+            for (metric, labels), value in sorted(counters.items()):
+                if metric == name:
+                    lines.append(f"{name}{format_labels(labels)} {format_number(value)}")
+            continue
+        for (metric, labels), (buckets, counts, total) in sorted(histograms.items()):
+            if metric != name:
+                continue
+            cumulative = 0
+            for bound, count in zip(buckets + ('+Inf',), counts):
+                cumulative += count
+                lines.append(f"{name}_bucket{format_labels(labels + (('le', bound),))} {cumulative}")
+            lines.append(f"{name}_sum{format_labels(labels)} {format_number(total)}")
+            lines.append(f"{name}_count{format_labels(labels)} {cumulative}")
+    return '\n'.join(lines) + '\n'
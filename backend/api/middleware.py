@@ -1,8 +1,42 @@
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
 from django.utils.deprecation import MiddlewareMixin
-from django.views.decorators.csrf import csrf_exempt
+from .metrics import track_queries, record_request
 
 class CsrfExemptMiddleware(MiddlewareMixin):
     def process_view(self, request, callback, callback_args, callback_kwargs):
+        # Mark the request rather than calling the view here, so async views
+        # are awaited by the handler like any other view
         if request.path.startswith('/api/'):
-            return csrf_exempt(callback)(request, *callback_args, **callback_kwargs)
+            request._dont_enforce_csrf_checks = True
         return None
+
+
+class MetricsMiddleware:
+    """
+    Time every request and count its database queries, feeding the
+    per-process metrics served at /api/metrics/ and the slow-request log.
+    Works for sync and async views alike; for streaming responses only the
+    time to the headers is measured.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        with track_queries() as stats:
+            response = self.get_response(request)
+        record_request(request, response, stats)
+        return response
+
+    async def __acall__(self, request):
+        with track_queries() as stats:
+            response = await self.get_response(request)
+        record_request(request, response, stats)
+        return response
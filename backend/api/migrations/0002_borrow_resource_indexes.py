@@ -0,0 +1,33 @@
+# Generated by Django 5.2.18 on 2026-10-18 16:23
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='borrow',
+            index=models.Index(fields=['resource', 'status'], name='borrow_resource_status_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='borrow',
+            index=models.Index(fields=['student', 'status'], name='borrow_student_status_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='borrow',
+            index=models.Index(fields=['status', 'due_date'], name='borrow_status_due_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='resource',
+            index=models.Index(fields=['status'], name='resource_status_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='resource',
+            index=models.Index(fields=['resource_type'], name='resource_type_idx'),
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.2.18 on 2026-10-18 16:27
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0002_borrow_resource_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='JobWatermark',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=50, unique=True)),
+                ('watermark', models.DateField()),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.AlterField(
+            model_name='return',
+            name='borrow_record',
+            field=models.ForeignKey(limit_choices_to={'status__in': ['ACTIVE', 'OVERDUE']}, on_delete=django.db.models.deletion.CASCADE, to='api.borrow'),
+        ),
+    ]
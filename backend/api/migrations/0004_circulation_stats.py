@@ -0,0 +1,44 @@
+# Generated by Django 5.2.18 on 2026-10-18 16:29
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0003_job_watermark_overdue'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ResourceTypeUtilization',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('resource_type', models.CharField(choices=[('BOOK', 'Book'), ('MAGAZINE', 'Magazine'), ('NEWSPAPER', 'Newspaper'), ('OTHER', 'Other')], max_length=10, unique=True)),
+                ('total', models.IntegerField(default=0)),
+                ('on_loan', models.IntegerField(default=0)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='StudentCirculation',
+            fields=[
+                ('student', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='circulation', serialize=False, to='api.student')),
+                ('borrows', models.PositiveIntegerField(default=0)),
+                ('returns', models.PositiveIntegerField(default=0)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='DailyCirculation',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('resource_type', models.CharField(choices=[('BOOK', 'Book'), ('MAGAZINE', 'Magazine'), ('NEWSPAPER', 'Newspaper'), ('OTHER', 'Other')], max_length=10)),
+                ('borrows', models.PositiveIntegerField(default=0)),
+                ('returns', models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('date', 'resource_type'), name='daily_circulation_unique')],
+            },
+        ),
+    ]
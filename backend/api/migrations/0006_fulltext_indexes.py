@@ -0,0 +1,33 @@
+from django.db import migrations
+
+# FULLTEXT indexes for SEARCH_ENGINE = 'mysql'. Other databases use the
+# in-process index from api/search.py and need no schema change.
+FULLTEXT_INDEXES = [
+    ('api_resource', 'resource_fulltext', ['title', 'author', 'resource_id']),
+    ('api_student', 'student_fulltext', ['first_name', 'last_name', 'student_id', 'email']),
+]
+
+
+def add_fulltext_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'mysql':
+        return
+    for table, name, columns in FULLTEXT_INDEXES:
+        schema_editor.execute(f"ALTER TABLE {table} ADD FULLTEXT INDEX {name} ({', '.join(columns)})")
+
+
+def drop_fulltext_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'mysql':
+        return
+    for table, name, columns in FULLTEXT_INDEXES:
+        schema_editor.execute(f"ALTER TABLE {table} DROP INDEX {name}")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0005_updated_at'),
+    ]
+
+    operations = [
+        migrations.RunPython(add_fulltext_indexes, drop_fulltext_indexes),
+    ]
@@ -0,0 +1,46 @@
+# Generated by Django 5.2.18 on 2026-10-18 16:52
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def point_at_open_loans(apps, schema_editor):
+    Borrow = apps.get_model('api', 'Borrow')
+    Student = apps.get_model('api', 'Student')
+    Resource = apps.get_model('api', 'Resource')
+    # The newest open loan wins if the data ever held more than one
+    student_loans, resource_loans = {}, {}
+    for pk, student_id, resource_id in (
+        Borrow.objects.filter(status__in=['ACTIVE', 'OVERDUE']).order_by('pk').values_list('pk', 'student_id', 'resource_id')
+    ):
+        student_loans[student_id] = pk
+        resource_loans[resource_id] = pk
+    Student.objects.bulk_update(
+        [Student(pk=pk, current_borrow_id=loan) for pk, loan in student_loans.items()],
+        ['current_borrow'], batch_size=1000,
+    )
+    Resource.objects.bulk_update(
+        [Resource(pk=pk, current_borrow_id=loan) for pk, loan in resource_loans.items()],
+        ['current_borrow'], batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0007_revoked_tokens'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='resource',
+            name='current_borrow',
+            field=models.OneToOneField(blank=True, editable=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='api.borrow'),
+        ),
+        migrations.AddField(
+            model_name='student',
+            name='current_borrow',
+            field=models.OneToOneField(blank=True, editable=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='api.borrow'),
+        ),
+        migrations.RunPython(point_at_open_loans, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 5.2.18 on 2026-10-18 16:54
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0008_current_loan'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='borrow',
+            index=models.Index(fields=['borrow_date'], name='borrow_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='report',
+            index=models.Index(fields=['generated_at'], name='report_generated_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='return',
+            index=models.Index(fields=['return_date'], name='return_date_idx'),
+        ),
+    ]
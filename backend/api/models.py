@@ -1,10 +1,18 @@
-from django.db import models
+from collections import Counter, defaultdict
+from functools import reduce
+from operator import or_
+
+from django.db import models, transaction
+from django.db.models import F, Q
 from django.contrib.auth import get_user_model
 from django.core.exceptions import ValidationError
+from django.utils import timezone
+from .catalogue_cache import invalidate_catalogue, invalidate_student_list
+from .events import publish_resource_status
 
 User = get_user_model()
 
-from django.db.models.signals import post_save
+from django.db.models.signals import post_save, post_delete
 from django.dispatch import receiver
 
 class UserProfile(models.Model):
@@ -36,6 +44,12 @@ class Student(models.Model):
     last_name = models.CharField(max_length=100)
     phone = models.CharField(max_length=11)
     email = models.EmailField(unique=True)
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
+    # The open loan, if any; kept by checkout and return (see Borrow.save,
+    # Return.save and services), checked by verify_current_loans
+    current_borrow = models.OneToOneField(
+        'Borrow', on_delete=models.SET_NULL, null=True, blank=True, editable=False, related_name='+',
+    )
 
     def __str__(self):
         return f"{self.first_name} {self.last_name} ({self.student_id})"
@@ -59,6 +73,17 @@ class Resource(models.Model):
     author = models.CharField(max_length=100)
     publication_year = models.PositiveIntegerField()
     status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='AVAILABLE')
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
+    # The open loan, if any; maintained like Student.current_borrow
+    current_borrow = models.OneToOneField(
+        'Borrow', on_delete=models.SET_NULL, null=True, blank=True, editable=False, related_name='+',
+    )
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['status'], name='resource_status_idx'),
+            models.Index(fields=['resource_type'], name='resource_type_idx'),
+        ]
 
     def __str__(self):
         return f"{self.title} ({self.resource_id})"
@@ -69,38 +94,100 @@ class Borrow(models.Model):
         ('RETURNED', 'Returned'),
         ('OVERDUE', 'Overdue'),
     ]
+    # Statuses of a loan that still holds its resource
+    OPEN_STATUSES = ['ACTIVE', 'OVERDUE']
 
     student = models.ForeignKey(Student, on_delete=models.CASCADE)
     resource = models.ForeignKey(Resource, on_delete=models.CASCADE)
     borrow_date = models.DateField(auto_now_add=True)
     due_date = models.DateField()
     status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='ACTIVE')
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
+
+    class Meta:
+        indexes = [
+            # Availability checks in clean() filter on (resource|student, status)
+            models.Index(fields=['resource', 'status'], name='borrow_resource_status_idx'),
+            models.Index(fields=['student', 'status'], name='borrow_student_status_idx'),
+            # Overdue scans look for ACTIVE borrows past their due date
+            models.Index(fields=['status', 'due_date'], name='borrow_status_due_idx'),
+            # Admin date hierarchy and default ordering
+            models.Index(fields=['borrow_date'], name='borrow_date_idx'),
+        ]
 
     def clean(self):
-        # Check if resource is already borrowed
-        if self.status == 'ACTIVE' and Borrow.objects.filter(
-            resource=self.resource,
-            status='ACTIVE'
-        ).exclude(pk=self.pk).exists():
+        # The current-loan pointers answer both checks without scanning Borrow.
+        # OVERDUE loans are open too, so they may not take another loan's place.
+        is_open = self.status in self.OPEN_STATUSES
+        if is_open and self.resource.current_borrow_id not in (None, self.pk):
             raise ValidationError('This resource is already borrowed by another student')
 
-        # Check if student has unreturned books
-        if self.status == 'ACTIVE' and Borrow.objects.filter(
-            student=self.student,
-            status='ACTIVE'
-        ).exclude(pk=self.pk).exists():
+        if is_open and self.student.current_borrow_id not in (None, self.pk):
             raise ValidationError('This student has unreturned books and cannot borrow more')
 
     def save(self, *args, **kwargs):
-        self.full_clean()
-        is_new = self.pk is None
-        
-        # Update resource status when borrowing
-        if is_new and self.status == 'ACTIVE':
-            self.resource.status = 'BORROWED'
-            self.resource.save()
-            
-        super().save(*args, **kwargs)
+        if self.pk is not None or self.status != 'ACTIVE':
+            self.full_clean()
+            with transaction.atomic(savepoint=False):
+                super().save(*args, **kwargs)
+                self.sync_current_loan()
+            return
+
+        # New loan: the row is inserted first so the student and the
+        # resource can be claimed with conditional UPDATEs that also point
+        # them at it. The student UPDATE locks the student row, so the same
+        # student cannot check out twice concurrently, and only one desk can
+        # flip the resource from AVAILABLE. A failed claim raises, which
+        # rolls the insert back with the transaction. Both rows are looked
+        # up first (unless already loaded) because MySQL checks foreign keys
+        # at the INSERT, which would fail with an IntegrityError instead.
+        self.clean_fields(exclude=['student', 'resource'])
+        with transaction.atomic(savepoint=False):
+            if not Borrow.student.is_cached(self) and not Student.objects.filter(pk=self.student_id).exists():
+                raise ValidationError('Student not found')
+            if not Borrow.resource.is_cached(self):
+                resource = Resource.objects.filter(pk=self.resource_id).only('resource_type').first()
+                if resource is None:
+                    raise ValidationError('Resource not found')
+                self.resource = resource
+            super().save(*args, **kwargs)
+            try:
+                self.claim_loan()
+            except ValidationError:
+                self.pk = None
+                self._state.adding = True
+                raise
+            invalidate_catalogue([self.resource_id])
+            publish_resource_status({self.resource_id: 'BORROWED'})
+
+            record_circulation(borrowed=[(self.borrow_date, self.resource.resource_type, self.student_id)])
+
+    def claim_loan(self):
+        claimed = Student.objects.filter(pk=self.student_id, current_borrow__isnull=True).update(
+            current_borrow=self.pk,
+        )
+        if not claimed:
+            raise ValidationError('This student has unreturned books and cannot borrow more')
+
+        claimed = Resource.objects.filter(pk=self.resource_id, status='AVAILABLE').update(
+            status='BORROWED', current_borrow=self.pk, updated_at=timezone.now(),
+        )
+        if not claimed:
+            raise ValidationError('This resource is already borrowed by another student')
+        if Borrow.student.is_cached(self):
+            self.student.current_borrow_id = self.pk
+        self.resource.status = 'BORROWED'
+        self.resource.current_borrow_id = self.pk
+
+    def sync_current_loan(self):
+        """Point the student and resource at this borrow while it is open, and away from it otherwise."""
+        Student.objects.filter(current_borrow=self.pk).update(current_borrow=None)
+        Resource.objects.filter(current_borrow=self.pk).update(current_borrow=None)
+        if self.status in self.OPEN_STATUSES:
+            # clean() has checked the pointers are free; the condition keeps
+            # a concurrent loan's pointer from being overwritten
+            Student.objects.filter(pk=self.student_id, current_borrow__isnull=True).update(current_borrow=self.pk)
+            Resource.objects.filter(pk=self.resource_id, current_borrow__isnull=True).update(current_borrow=self.pk)
 
     def __str__(self):
         return f"{self.student} borrowed {self.resource}"
@@ -118,23 +205,200 @@ class Report(models.Model):
     end_date = models.DateField()
     file = models.FileField(upload_to='reports/', blank=True)
 
+    class Meta:
+        indexes = [
+            # Admin date hierarchy and default ordering
+            models.Index(fields=['generated_at'], name='report_generated_idx'),
+        ]
+
     def __str__(self):
         return f"{self.get_report_type_display()} Report ({self.start_date} to {self.end_date})"
+class JobWatermark(models.Model):
+    """
+    Progress marker for incremental maintenance jobs, one row per job.
+    """
+    name = models.CharField(max_length=50, unique=True)
+    watermark = models.DateField()
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.name} @ {self.watermark}"
+
+class RevokedToken(models.Model):
+    """
+    A logged-out session, identified by its refresh token's jti. Access
+    tokens carry that jti as their `sid` claim. Rows can be dropped once
+    `expires_at` has passed.
+    """
+    jti = models.CharField(max_length=255, unique=True)
+    expires_at = models.DateTimeField(db_index=True)
+    revoked_at = models.DateTimeField(auto_now_add=True, db_index=True)
+
+    def __str__(self):
+        return self.jti
+
 class Return(models.Model):
-    borrow_record = models.ForeignKey(Borrow, on_delete=models.CASCADE, limit_choices_to={'status': 'ACTIVE'})
+    borrow_record = models.ForeignKey(Borrow, on_delete=models.CASCADE, limit_choices_to={'status__in': Borrow.OPEN_STATUSES})
     return_date = models.DateField(auto_now_add=True)
     condition_notes = models.TextField(blank=True)
 
+    class Meta:
+        indexes = [
+            # Admin date hierarchy and default ordering
+            models.Index(fields=['return_date'], name='return_date_idx'),
+        ]
+
     def save(self, *args, **kwargs):
-        # Update borrow record status
-        self.borrow_record.status = 'RETURNED'
-        self.borrow_record.save()
-        
-        # Update resource status
-        self.borrow_record.resource.status = 'AVAILABLE'
-        self.borrow_record.resource.save()
-        
-        super().save(*args, **kwargs)
+        if self.pk is not None:
+            # Editing an existing return (e.g. its notes) changes no loan state
+            super().save(*args, **kwargs)
+            return
+
+        # New return: the loan is closed with a conditional UPDATE, so of two
+        # concurrent returns of the same borrow only one gets a row back and
+        # the other is rejected. The resource is freed with a plain UPDATE
+        # instead of loading and re-validating the instances.
+        with transaction.atomic(savepoint=False):
+            if Return.borrow_record.is_cached(self) and Borrow.resource.is_cached(self.borrow_record):
+                borrow = self.borrow_record
+                resource_id, resource_type, student_id = borrow.resource_id, borrow.resource.resource_type, borrow.student_id
+            else:
+                loan = Borrow.objects.filter(pk=self.borrow_record_id).values_list(
+                    'resource_id', 'resource__resource_type', 'student_id',
+                ).first()
+                if loan is None:
+                    raise ValidationError('Borrow record not found')
+                resource_id, resource_type, student_id = loan
+
+            now = timezone.now()
+            closed = Borrow.objects.filter(pk=self.borrow_record_id, status__in=Borrow.OPEN_STATUSES).update(
+                status='RETURNED', updated_at=now,
+            )
+            if not closed:
+                raise ValidationError('This borrow record has already been returned')
+            Resource.objects.filter(pk=resource_id).update(status='AVAILABLE', current_borrow=None, updated_at=now)
+            Student.objects.filter(pk=student_id, current_borrow=self.borrow_record_id).update(current_borrow=None)
+            if Return.borrow_record.is_cached(self):
+                self.borrow_record.status = 'RETURNED'
+                if Borrow.resource.is_cached(self.borrow_record):
+                    self.borrow_record.resource.status = 'AVAILABLE'
+                    self.borrow_record.resource.current_borrow_id = None
+                if Borrow.student.is_cached(self.borrow_record):
+                    self.borrow_record.student.current_borrow_id = None
+            invalidate_catalogue([resource_id])
+            publish_resource_status({resource_id: 'AVAILABLE'})
+
+            super().save(*args, **kwargs)
+            record_circulation(returned=[(self.return_date, resource_type, student_id)])
 
     def __str__(self):
-        return f"Return of {self.borrow_record.resource} by {self.borrow_record.student}"
\ No newline at end of file
+        return f"Return of {self.borrow_record.resource} by {self.borrow_record.student}"
+
+# Circulation statistics, kept up to date by record_circulation() inside the
+# checkout/return transactions. `rebuild_circulation_stats` recomputes them.
+
+class DailyCirculation(models.Model):
+    date = models.DateField()
+    resource_type = models.CharField(max_length=10, choices=Resource.RESOURCE_TYPES)
+    borrows = models.PositiveIntegerField(default=0)
+    returns = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['date', 'resource_type'], name='daily_circulation_unique'),
+        ]
+
+    def __str__(self):
+        return f"{self.date} {self.resource_type}: {self.borrows} borrowed, {self.returns} returned"
+
+class StudentCirculation(models.Model):
+    student = models.OneToOneField(Student, on_delete=models.CASCADE, primary_key=True, related_name='circulation')
+    borrows = models.PositiveIntegerField(default=0)
+    returns = models.PositiveIntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.student_id}: {self.borrows} borrowed, {self.returns} returned"
+
+class ResourceTypeUtilization(models.Model):
+    resource_type = models.CharField(max_length=10, choices=Resource.RESOURCE_TYPES, unique=True)
+    total = models.IntegerField(default=0)
+    on_loan = models.IntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.resource_type}: {self.on_loan}/{self.total} on loan"
+
+def bump_counters(model, key_fields, deltas):
+    """
+    Add counter deltas to summary rows. `deltas` maps a tuple of `key_fields`
+    values to a {counter: delta} dict. Keys sharing the same deltas are
+    updated with one F() UPDATE; missing rows are created first.
+    """
+    groups = defaultdict(list)
+    for key, counts in deltas.items():
+        counts = tuple(sorted((field, delta) for field, delta in counts.items() if delta))
+        if counts:
+            groups[counts].append(key)
+
+    for counts, keys in groups.items():
+        condition = reduce(or_, (Q(**dict(zip(key_fields, key))) for key in keys))
+        increments = {field: F(field) + delta for field, delta in counts}
+        if model.objects.filter(condition).update(**increments) < len(keys):
+            existing = set(model.objects.filter(condition).values_list(*key_fields))
+            missing = [key for key in keys if key not in existing]
+            model.objects.bulk_create(
+                [model(**dict(zip(key_fields, key))) for key in missing], ignore_conflicts=True
+            )
+            missing_condition = reduce(or_, (Q(**dict(zip(key_fields, key))) for key in missing))
+            model.objects.filter(missing_condition).update(**increments)
+
+def record_circulation(borrowed=(), returned=()):
+    """
+    Fold checkouts and returns into the summary tables. Items are
+    (date, resource_type, student pk) tuples. Call it inside the
+    transaction that performs the checkout/return.
+    """
+    daily = defaultdict(Counter)
+    per_student = defaultdict(Counter)
+    on_loan = defaultdict(Counter)
+    for day, resource_type, student_pk in borrowed:
+        daily[(day, resource_type)]['borrows'] += 1
+        per_student[(student_pk,)]['borrows'] += 1
+        on_loan[(resource_type,)]['on_loan'] += 1
+    for day, resource_type, student_pk in returned:
+        daily[(day, resource_type)]['returns'] += 1
+        per_student[(student_pk,)]['returns'] += 1
+        on_loan[(resource_type,)]['on_loan'] -= 1
+
+    bump_counters(DailyCirculation, ('date', 'resource_type'), daily)
+    bump_counters(StudentCirculation, ('student_id',), per_student)
+    bump_counters(ResourceTypeUtilization, ('resource_type',), on_loan)
+
+@receiver(post_save, sender=Resource)
+def count_new_resource(sender, instance, created, **kwargs):
+    if created:
+        bump_counters(ResourceTypeUtilization, ('resource_type',), {(instance.resource_type,): {'total': 1}})
+
+@receiver(post_delete, sender=Resource)
+def count_deleted_resource(sender, instance, **kwargs):
+    bump_counters(ResourceTypeUtilization, ('resource_type',), {(instance.resource_type,): {'total': -1}})
+
+@receiver(post_save, sender=Resource)
+@receiver(post_delete, sender=Resource)
+def invalidate_cached_resource(sender, instance, **kwargs):
+    invalidate_catalogue([instance.pk])
+
+@receiver(post_save, sender=Student)
+@receiver(post_delete, sender=Student)
+def invalidate_student_list_version(sender, instance, **kwargs):
+    invalidate_student_list()
+
+# Direct edits save the Resource row, so their status changes are
+# published from here; checkouts, returns and set-based updates publish
+# themselves.
+@receiver(post_save, sender=Resource)
+def publish_saved_resource(sender, instance, **kwargs):
+    publish_resource_status({instance.pk: instance.status})
+
+@receiver(post_delete, sender=Resource)
+def publish_deleted_resource(sender, instance, **kwargs):
+    publish_resource_status({instance.pk: None})
@@ -0,0 +1,90 @@
+from django.conf import settings
+from django.core.paginator import Paginator
+from django.db import connections
+from django.utils.functional import cached_property
+from rest_framework.pagination import CursorPagination
+from rest_framework.settings import api_settings
+
+
+class LibraryCursorPagination(CursorPagination):
+    """
+    Keyset pagination for the list endpoints.
+
+    Each list view declares a stable default `ordering` on an indexed key.
+    When the client picks another ordering through `?ordering=`, the primary
+    key is appended as a tie-breaker so rows sharing the same value are
+    always returned in the same order. Full-text `?q=` results are ordered
+    by their `search_rank` unless the client asks for another ordering.
+    """
+    page_size_query_param = 'page_size'
+    max_page_size = getattr(settings, 'API_MAX_PAGE_SIZE', 500)
+
+    def get_ordering(self, request, queryset, view):
+        if 'search_rank' in queryset.query.annotations and not request.query_params.get(api_settings.ORDERING_PARAM):
+            ordering = ('-search_rank',)
+        else:
+            ordering = super().get_ordering(request, queryset, view)
+        pk_name = queryset.model._meta.pk.name
+        if any(field.lstrip('-') in (pk_name, 'pk') for field in ordering):
+            return ordering
+        descending = ordering[0].startswith('-')
+        return ordering + (('-' if descending else '') + pk_name,)
+
+
+# Below this many rows an exact COUNT(*) is cheap enough to keep
+ADMIN_EXACT_COUNT_LIMIT = getattr(settings, 'ADMIN_EXACT_COUNT_LIMIT', 10000)
+
+
+def estimated_row_count(queryset):
+    """
+    The database's own row estimate for an unfiltered queryset's table, or
+    None when the queryset is filtered or the backend keeps no estimate.
+    """
+    if queryset.query.has_filters() or queryset.query.distinct:
+        return None
+    connection = connections[queryset.db]
+    table = queryset.model._meta.db_table
+    with connection.cursor() as cursor:
+        if connection.vendor == 'mysql':
+            cursor.execute(
+                'SELECT TABLE_ROWS FROM information_schema.TABLES WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s',
+                [table],
+            )
+        elif connection.vendor == 'postgresql':
+            cursor.execute('SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass', [table])
+        else:
+            return None
+        row = cursor.fetchone()
+    # PostgreSQL reports -1 for tables that were never analyzed
+    if row is None or row[0] is None or row[0] < 0:
+        return None
+    return row[0]
+
+
+def table_row_count(model):
+    """
+    Rows in `model`'s table: counted exactly while the table is small, taken
+    from the table statistics (see estimated_row_count) once it is not.
+    """
+    queryset = model._default_manager.all()
+    estimate = estimated_row_count(queryset)
+    if estimate is None or estimate < ADMIN_EXACT_COUNT_LIMIT:
+        return queryset.count()
+    return estimate
+
+
+class EstimatedCountPaginator(Paginator):
+    """
+    Paginator for admin changelists over big tables. An unfiltered list
+    takes its total from the table statistics (InnoDB's row estimate,
+    PostgreSQL's reltuples) instead of an exact COUNT(*), which InnoDB
+    answers by scanning a whole index. Filtered, searched and small lists
+    are still counted exactly.
+    """
+
+    @cached_property
+    def count(self):
+        estimate = estimated_row_count(self.object_list)
+        if estimate is None or estimate < ADMIN_EXACT_COUNT_LIMIT:
+            return super().count
+        return estimate
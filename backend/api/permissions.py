@@ -1,4 +1,58 @@
+import threading
+import time
+
+from django.conf import settings
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
 from rest_framework import permissions
+from rest_framework_simplejwt.tokens import Token
+from .models import UserProfile
+
+# Role checks must not cost a query per request. Access tokens carry the
+# signed `user_level` claim (MyTokenObtainPairSerializer, re-stamped on each
+# refresh), so JWT requests are authorized from the token alone. Requests
+# without the claim fall back to a per-process cache of UserProfile levels
+# that expires after ROLE_CACHE_TTL seconds and is dropped when the profile
+# is saved or deleted.
+ROLE_CACHE_TTL = getattr(settings, 'ROLE_CACHE_TTL', 300)
+
+LIBRARIAN_LEVELS = ['librarian', 'admin']
+STUDENT_LEVELS = ['student', 'admin']
+
+_levels = {}
+_levels_lock = threading.Lock()
+
+
+def cached_user_level(user_id):
+    """The user's UserProfile.user_level (None without a profile), cached."""
+    # Keyed by str: token claims may carry the id as a string
+    key = str(user_id)
+    now = time.monotonic()
+    with _levels_lock:
+        entry = _levels.get(key)
+    if entry and entry[1] > now:
+        return entry[0]
+    level = UserProfile.objects.filter(user_id=user_id).values_list('user_level', flat=True).first()
+    with _levels_lock:
+        _levels[key] = (level, now + ROLE_CACHE_TTL)
+    return level
+
+
+def user_level(request):
+    user = request.user
+    if not user or not user.is_authenticated:
+        return None
+    if isinstance(request.auth, Token) and 'user_level' in request.auth:
+        return request.auth['user_level']
+    return cached_user_level(user.pk)
+
+
+@receiver(post_save, sender=UserProfile)
+@receiver(post_delete, sender=UserProfile)
+def forget_user_level(sender, instance, **kwargs):
+    with _levels_lock:
+        _levels.pop(str(instance.user_id), None)
+
 
 class IsLibrarian(permissions.BasePermission):
     """
@@ -6,12 +60,7 @@ class IsLibrarian(permissions.BasePermission):
     """
 
     def has_permission(self, request, view):
-        user = request.user
-        if not user or not user.is_authenticated:
-            return False
-        if hasattr(user, 'profile') and user.profile.user_level in ['librarian', 'admin']:
-            return True
-        return False
+        return user_level(request) in LIBRARIAN_LEVELS
 
 class IsStudent(permissions.BasePermission):
     """
@@ -19,9 +68,4 @@ class IsStudent(permissions.BasePermission):
     """
 
     def has_permission(self, request, view):
-        user = request.user
-        if not user or not user.is_authenticated:
-            return False
-        if hasattr(user, 'profile') and user.profile.user_level in ['student', 'admin']:
-            return True
-        return False
+        return user_level(request) in STUDENT_LEVELS
@@ -0,0 +1,51 @@
+from rest_framework.renderers import BaseRenderer, JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+# Optional accelerators. Without orjson, FastJSONRenderer is the stock
+# JSONRenderer; without msgpack, settings leave MessagePackRenderer out of
+# DEFAULT_RENDERER_CLASSES so it is never negotiated.
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+
+class FastJSONRenderer(JSONRenderer):
+    """
+    JSONRenderer that encodes with orjson when it is installed. Types orjson
+    does not handle itself (dates, Decimal, lazy strings) go through DRF's
+    encoder, so the output matches the stock renderer.
+    """
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if orjson is None or data is None:
+            return super().render(data, accepted_media_type, renderer_context)
+        # Indented output was asked for (e.g. `; indent=4`), leave it to the stock renderer
+        if self.get_indent(accepted_media_type, renderer_context or {}):
+            return super().render(data, accepted_media_type, renderer_context)
+        return orjson.dumps(
+            data,
+            default=JSONEncoder().default,
+            option=orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS,
+        )
+
+
+class MessagePackRenderer(BaseRenderer):
+    """
+    MessagePack bodies for clients sending `Accept: application/msgpack`
+    (or `?format=msgpack`). Needs the msgpack package.
+    """
+    media_type = 'application/msgpack'
+    format = 'msgpack'
+    charset = None
+    render_style = 'binary'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        return msgpack.packb(data, default=JSONEncoder().default, use_bin_type=True)
@@ -0,0 +1,115 @@
+import csv
+import json
+import tempfile
+
+from django.core.files import File
+from django.core.serializers.json import DjangoJSONEncoder
+from django.utils import timezone
+from .models import Borrow, Return, Report
+
+# Rows are read in primary-key chunks so memory stays flat no matter how
+# long the history is. MySQL drivers buffer whole result sets even for
+# QuerySet.iterator(), so keyset chunks are used instead of one cursor.
+CHUNK_SIZE = 2000
+
+REPORT_FORMATS = ['csv', 'jsonl']
+
+# Return rows are only ever added, so a RETURN report for a closed range
+# stays valid. BORROW reports carry the loan status, which changes on
+# return, and OVERDUE reports list loans that are still open, so those
+# are always rebuilt.
+REUSABLE_REPORT_TYPES = ['RETURN']
+
+BORROW_COLUMNS = [
+    'id', 'borrow_date', 'due_date', 'status',
+    'student__student_id', 'student__first_name', 'student__last_name',
+    'resource__resource_id', 'resource__title',
+]
+
+RETURN_COLUMNS = [
+    'id', 'return_date', 'condition_notes', 'borrow_record_id', 'borrow_record__borrow_date',
+    'borrow_record__student__student_id', 'borrow_record__student__first_name',
+    'borrow_record__student__last_name', 'borrow_record__resource__resource_id',
+    'borrow_record__resource__title',
+]
+
+
+def chunked_values(queryset, fields, chunk_size=CHUNK_SIZE):
+    """
+    Yield `queryset.values_list(*fields)` rows, walking the primary key in
+    chunks of `chunk_size`. The first field must be the primary key.
+    """
+    queryset = queryset.order_by('pk').values_list(*fields)
+    last_pk = None
+    while True:
+        chunk = queryset if last_pk is None else queryset.filter(pk__gt=last_pk)
+        rows = list(chunk[:chunk_size])
+        if not rows:
+            return
+        yield from rows
+        last_pk = rows[-1][0]
+
+
+def report_rows(report_type, start_date, end_date):
+    """
+    Return (columns, row iterator) for a report type and date range.
+    """
+    if report_type == 'BORROW':
+        queryset = Borrow.objects.filter(borrow_date__range=(start_date, end_date))
+        columns = BORROW_COLUMNS
+    elif report_type == 'RETURN':
+        queryset = Return.objects.filter(return_date__range=(start_date, end_date))
+        columns = RETURN_COLUMNS
+    elif report_type == 'OVERDUE':
+        queryset = Borrow.objects.filter(
+            status__in=Borrow.OPEN_STATUSES,
+            due_date__range=(start_date, end_date),
+            due_date__lt=timezone.localdate(),
+        )
+        columns = BORROW_COLUMNS
+    else:
+        raise ValueError(f"Unknown report type: {report_type}")
+    return columns, chunked_values(queryset, columns)
+
+
+def write_report(out, columns, rows, fmt):
+    if fmt == 'csv':
+        writer = csv.writer(out)
+        writer.writerow(columns)
+        writer.writerows(rows)
+    else:
+        encoder = DjangoJSONEncoder()
+        for row in rows:
+            out.write(encoder.encode(dict(zip(columns, row))))
+            out.write('\n')
+
+
+def generate_report(report_type, start_date, end_date, fmt='csv'):
+    """
+    Build a report file for the date range and store it on a Report row.
+
+    A RETURN report for a range that has already closed (ends before today)
+    cannot change any more, so an existing file for the same range and
+    format is reused instead of being recomputed.
+    """
+    if report_type in REUSABLE_REPORT_TYPES and end_date < timezone.localdate():
+        existing = (
+            Report.objects.filter(
+                report_type=report_type, start_date=start_date, end_date=end_date,
+                file__endswith=f'.{fmt}',
+            )
+            .order_by('-generated_at')
+            .first()
+        )
+        if existing and existing.file.storage.exists(existing.file.name):
+            return existing
+
+    columns, rows = report_rows(report_type, start_date, end_date)
+    report = Report(report_type=report_type, start_date=start_date, end_date=end_date)
+    with tempfile.TemporaryFile(mode='w+', newline='') as out:
+        write_report(out, columns, rows, fmt)
+        out.seek(0)
+        name = f"{report_type.lower()}_{start_date:%Y%m%d}_{end_date:%Y%m%d}.{fmt}"
+        report.file.save(name, File(out), save=False)
+    report.save()
+    return report
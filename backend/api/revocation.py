@@ -0,0 +1,51 @@
+import threading
+import time
+from datetime import datetime, timezone as dt_timezone
+
+from django.conf import settings
+from django.utils import timezone
+from .models import RevokedToken
+
+# Revoked sessions are checked on every authenticated request, so they are
+# kept in a per-process dict of jti -> expiry. The RevokedToken table is the
+# shared record: each process folds in rows revoked by other workers at most
+# every REVOCATION_SYNC_SECONDS, which bounds how long a logged-out session
+# stays usable on another worker.
+REVOCATION_SYNC_SECONDS = getattr(settings, 'REVOCATION_SYNC_SECONDS', 5)
+
+_revoked = {}
+_state = {'high_water': None, 'synced_at': None}
+_lock = threading.Lock()
+
+
+def _sync():
+    queryset = RevokedToken.objects.filter(expires_at__gt=timezone.now())
+    if _state['high_water'] is not None:
+        # >= re-reads rows stamped in the same tick; adding them is idempotent
+        queryset = queryset.filter(revoked_at__gte=_state['high_water'])
+    for jti, expires_at, revoked_at in queryset.values_list('jti', 'expires_at', 'revoked_at'):
+        _revoked[jti] = expires_at
+        if _state['high_water'] is None or revoked_at > _state['high_water']:
+            _state['high_water'] = revoked_at
+    now = timezone.now()
+    for jti in [jti for jti, expires_at in _revoked.items() if expires_at <= now]:
+        del _revoked[jti]
+    _state['synced_at'] = time.monotonic()
+
+
+def is_revoked(jti):
+    if not jti:
+        return False
+    with _lock:
+        if _state['synced_at'] is None or time.monotonic() - _state['synced_at'] >= REVOCATION_SYNC_SECONDS:
+            _sync()
+        return jti in _revoked
+
+
+def revoke(jti, exp):
+    """Revoke the session of refresh token `jti`, which expires at the `exp` timestamp."""
+    expires_at = datetime.fromtimestamp(exp, tz=dt_timezone.utc)
+    RevokedToken.objects.get_or_create(jti=jti, defaults={'expires_at': expires_at})
+    RevokedToken.objects.filter(expires_at__lte=timezone.now()).delete()
+    with _lock:
+        _revoked[jti] = expires_at
@@ -0,0 +1,250 @@
+import bisect
+import re
+import threading
+import time
+from collections import defaultdict
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Case, When, Value, IntegerField, FloatField
+from django.db.models.expressions import RawSQL
+from django.db.models.signals import post_delete
+from django.dispatch import receiver
+from rest_framework.filters import BaseFilterBackend
+from .reports import chunked_values
+
+# Full-text search for the list views, exposed as `?q=`.
+#
+# SEARCH_ENGINE = 'python' (default) keeps an in-process inverted index per
+# model with ranked, prefix and single-typo matching. It is built on the
+# first search and then refreshed incrementally from `updated_at`, so rows
+# changed by any worker are picked up. Deletes carry no `updated_at`: local
+# ones arrive through post_delete, and rows deleted by other workers are
+# dropped when the index is reconciled against the table's primary keys,
+# at most every SEARCH_RECONCILE_SECONDS. SEARCH_ENGINE = 'mysql' uses the
+# FULLTEXT indexes from migration 0006 instead (ranked and prefix matching,
+# no typo tolerance, no per-process memory).
+SEARCH_ENGINE = getattr(settings, 'SEARCH_ENGINE', 'python')
+SEARCH_MAX_RESULTS = getattr(settings, 'SEARCH_MAX_RESULTS', 1000)
+SEARCH_RECONCILE_SECONDS = getattr(settings, 'SEARCH_RECONCILE_SECONDS', 300)
+
+TOKEN_RE = re.compile(r'\w+')
+
+# Match weights, multiplied by the field weight
+EXACT, PREFIX, TYPO = 3, 2, 1
+MAX_PREFIX_EXPANSIONS = 50
+
+
+def tokenize(text):
+    return TOKEN_RE.findall(str(text).lower())
+
+
+def deletions(token):
+    return {token[:i] + token[i + 1:] for i in range(len(token))}
+
+
+class InvertedIndex:
+    """
+    Token -> {pk: weight} postings with a sorted vocabulary for prefix
+    lookups and a single-deletion map for typo-tolerant lookups.
+    """
+
+    def __init__(self, fields):
+        self.fields = fields
+        self.postings = defaultdict(dict)
+        self.documents = {}
+        self.vocabulary = []
+        self.typo_map = defaultdict(set)
+
+    def add(self, pk, values):
+        self.remove(pk)
+        weights = defaultdict(int)
+        for field, value in zip(self.fields, values):
+            for token in tokenize(value):
+                weights[token] = max(weights[token], self.fields[field])
+        for token, weight in weights.items():
+            if token not in self.postings:
+                bisect.insort(self.vocabulary, token)
+                for variant in deletions(token):
+                    self.typo_map[variant].add(token)
+            self.postings[token][pk] = weight
+        self.documents[pk] = list(weights)
+
+    def remove(self, pk):
+        for token in self.documents.pop(pk, ()):
+            postings = self.postings[token]
+            postings.pop(pk, None)
+            if not postings:
+                del self.postings[token]
+                self.vocabulary.pop(bisect.bisect_left(self.vocabulary, token))
+                for variant in deletions(token):
+                    self.typo_map[variant].discard(token)
+
+    def term_matches(self, term):
+        """Yield (token, match weight) for every token matching a query term."""
+        if term in self.postings:
+            yield term, EXACT
+        start = bisect.bisect_left(self.vocabulary, term)
+        for token in self.vocabulary[start:start + MAX_PREFIX_EXPANSIONS]:
+            if not token.startswith(term):
+                break
+            if token != term:
+                yield token, PREFIX
+        if len(term) >= 4:
+            candidates = set(self.typo_map.get(term, ()))
+            for variant in deletions(term):
+                candidates.add(variant)
+                candidates |= self.typo_map.get(variant, set())
+            for token in candidates:
+                if token != term and token in self.postings and not token.startswith(term):
+                    yield token, TYPO
+
+    def search(self, query, limit):
+        """
+        Return up to `limit` (pk, score) pairs, best first (all of them when
+        `limit` is None). Every query term has to match; a document scores
+        the best match of each term.
+        """
+        scores = None
+        for term in set(tokenize(query)):
+            term_scores = {}
+            for token, match_weight in self.term_matches(term):
+                for pk, field_weight in self.postings[token].items():
+                    score = match_weight * field_weight
+                    if score > term_scores.get(pk, 0):
+                        term_scores[pk] = score
+            if scores is None:
+                scores = term_scores
+            else:
+                scores = {pk: score + term_scores[pk] for pk, score in scores.items() if pk in term_scores}
+            if not scores:
+                return []
+        if not scores:
+            return []
+        return sorted(scores.items(), key=lambda item: (-item[1], str(item[0])))[:limit]
+
+
+class ModelIndex:
+    """
+    An InvertedIndex over one model, refreshed from `updated_at` before each
+    search so it follows writes from every process.
+    """
+
+    def __init__(self, model, fields):
+        self.model = model
+        self.index = InvertedIndex(fields)
+        self.lock = threading.Lock()
+        self.built = False
+        self.high_water = None
+        self.reconciled_at = time.monotonic()
+
+    def refresh(self):
+        queryset = self.model.objects.all()
+        if self.high_water is not None:
+            # >= re-reads rows stamped in the same tick; indexing is idempotent
+            queryset = queryset.filter(updated_at__gte=self.high_water)
+        fields = ['pk', 'updated_at', *self.index.fields]
+        for row in chunked_values(queryset, fields):
+            self.index.add(row[0], row[2:])
+            if self.high_water is None or row[1] > self.high_water:
+                self.high_water = row[1]
+        self.built = True
+        if time.monotonic() - self.reconciled_at >= SEARCH_RECONCILE_SECONDS:
+            self.reconcile()
+
+    def reconcile(self):
+        """Drop documents whose rows were deleted, e.g. by another worker."""
+        live = {row[0] for row in chunked_values(self.model.objects.all(), ['pk'])}
+        for pk in set(self.index.documents) - live:
+            self.index.remove(pk)
+        self.reconciled_at = time.monotonic()
+
+    def search(self, query, limit):
+        with self.lock:
+            self.refresh()
+            return self.index.search(query, limit)
+
+    def delete(self, pk):
+        with self.lock:
+            self.index.remove(pk)
+
+
+_indexes = {}
+_indexes_lock = threading.Lock()
+
+
+def get_index(model, fields):
+    with _indexes_lock:
+        if model not in _indexes:
+            _indexes[model] = ModelIndex(model, fields)
+        return _indexes[model]
+
+
+@receiver(post_delete)
+def drop_deleted_document(sender, instance, **kwargs):
+    index = _indexes.get(sender)
+    if index is not None:
+        pk = instance.pk
+        # A rolled-back delete leaves the row, and its updated_at, as it was
+        transaction.on_commit(lambda: index.delete(pk))
+
+
+def top_matches(queryset, ranked, limit):
+    """
+    The first `limit` of the ranked pks that `queryset` still selects, in
+    rank order. Candidates are checked against the database in rank-ordered
+    batches, so the other filter backends apply before the cut and a
+    selective filter cannot leave a page empty while matches exist.
+    """
+    if not queryset.query.where:
+        # Unfiltered: every candidate qualifies (deleted rows simply drop
+        # out of the final query)
+        return [pk for pk, _ in ranked[:limit]]
+    matches = []
+    for start in range(0, len(ranked), limit):
+        batch = [pk for pk, _ in ranked[start:start + limit]]
+        selected = set(queryset.filter(pk__in=batch).values_list('pk', flat=True))
+        matches.extend(pk for pk in batch if pk in selected)
+        if len(matches) >= limit:
+            break
+    return matches[:limit]
+
+
+def mysql_fulltext(queryset, fields, query):
+    """Rank with MATCH ... AGAINST over the FULLTEXT index on `fields`."""
+    terms = ' '.join(f'+{term}*' for term in tokenize(query))
+    if not terms:
+        return queryset.none()
+    columns = ', '.join(queryset.model._meta.get_field(field).column for field in fields)
+    rank = RawSQL(f"MATCH ({columns}) AGAINST (%s IN BOOLEAN MODE)", [terms], output_field=FloatField())
+    return queryset.annotate(search_rank=rank).filter(search_rank__gt=0)
+
+
+class FullTextSearchFilter(BaseFilterBackend):
+    """
+    Ranked full-text search as `?q=` for views that declare
+    `fulltext_fields = {field: weight}`. Results are annotated with
+    `search_rank`, which LibraryCursorPagination orders by.
+    """
+    search_param = 'q'
+
+    def filter_queryset(self, request, queryset, view):
+        query = request.query_params.get(self.search_param, '').strip()
+        fields = getattr(view, 'fulltext_fields', None)
+        if not query or not fields:
+            return queryset
+
+        if SEARCH_ENGINE == 'mysql' and connection.vendor == 'mysql':
+            return mysql_fulltext(queryset, fields, query)
+
+        ranked = get_index(queryset.model, fields).search(query, None)
+        matches = top_matches(queryset, ranked, SEARCH_MAX_RESULTS)
+        if not matches:
+            return queryset.none()
+        # Ranks are positions, so they are unique and give a stable cursor
+        count = len(matches)
+        rank = Case(
+            *[When(pk=pk, then=Value(count - position)) for position, pk in enumerate(matches)],
+            output_field=IntegerField(),
+        )
+        return queryset.filter(pk__in=matches).annotate(search_rank=rank)
@@ -1,6 +1,10 @@
 from rest_framework import serializers
 from django.contrib.auth.models import User
+from django.core.exceptions import ValidationError as DjangoValidationError
 from .models import Student, Resource, Borrow, Return, Report
+from . import services
+from .reports import REPORT_FORMATS
+from .imports import IMPORT_FORMATS
 
 class StudentSerializer(serializers.ModelSerializer):
     student_id = serializers.CharField()
@@ -10,15 +14,13 @@ class StudentSerializer(serializers.ModelSerializer):
         fields = ['student_id', 'first_name', 'last_name', 'phone', 'email']
 
 class ResourceSerializer(serializers.ModelSerializer):
-    year = serializers.SerializerMethodField()
+    # Kept for existing clients; the same value as publication_year
+    year = serializers.IntegerField(source='publication_year', read_only=True)
 
     class Meta:
         model = Resource
         fields = ['resource_id', 'title', 'resource_type', 'author', 'publication_year', 'status', 'year']
 
-    def get_year(self, obj):
-        return obj.publication_year
-
 class BorrowSerializer(serializers.ModelSerializer):
     student_id = serializers.CharField(write_only=True)
     resource_id = serializers.CharField(write_only=True)
@@ -27,20 +29,24 @@ class BorrowSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = Borrow
-        fields = '__all__'
+        # Listed so bookkeeping columns such as updated_at stay out of responses
+        fields = ['id', 'student_id', 'resource_id', 'student', 'resource', 'borrow_id', 'borrow_date', 'due_date',
+                  'status']
 
     def create(self, validated_data):
-        student_id = validated_data.pop('student_id')
-        resource_id = validated_data.pop('resource_id')
-        student = Student.objects.get(student_id=student_id)
-        resource = Resource.objects.get(resource_id=resource_id)
-        borrow = Borrow.objects.create(student=student, resource=resource, **validated_data)
-        return borrow
+        try:
+            return services.checkout(
+                validated_data['student_id'],
+                validated_data['resource_id'],
+                validated_data['due_date'],
+            )
+        except DjangoValidationError as e:
+            raise serializers.ValidationError(e.messages)
 
     borrow_id = serializers.CharField(read_only=True)
 
 class ReturnSerializer(serializers.ModelSerializer):
-    borrow_record_id = serializers.CharField(write_only=True)
+    borrow_record_id = serializers.IntegerField(write_only=True)
     borrow_record = BorrowSerializer(read_only=True)
 
     class Meta:
@@ -48,18 +54,51 @@ class ReturnSerializer(serializers.ModelSerializer):
         fields = '__all__'
 
     def create(self, validated_data):
-        borrow_record_id = validated_data.pop('borrow_record_id')
-
-        # Change this line to use 'id' instead of 'borrow_id'
-        borrow_record = Borrow.objects.get(id=borrow_record_id)  # Corrected line
+        try:
+            return services.return_borrow(
+                validated_data['borrow_record_id'],
+                validated_data.get('condition_notes', ''),
+            )
+        except DjangoValidationError as e:
+            raise serializers.ValidationError(e.messages)
+
+class BulkCheckoutItemSerializer(serializers.Serializer):
+    student_id = serializers.CharField()
+    resource_id = serializers.CharField()
+    due_date = serializers.DateField()
 
-        return Return.objects.create(borrow_record=borrow_record, **validated_data)
+class BulkReturnItemSerializer(serializers.Serializer):
+    borrow_record_id = serializers.IntegerField()
+    condition_notes = serializers.CharField(required=False, allow_blank=True, default='')
 
 class ReportSerializer(serializers.ModelSerializer):
     class Meta:
         model = Report
         fields = '__all__'
 
+class ReportRequestSerializer(serializers.Serializer):
+    report_type = serializers.ChoiceField(choices=Report.REPORT_TYPES)
+    start_date = serializers.DateField()
+    end_date = serializers.DateField()
+    format = serializers.ChoiceField(choices=REPORT_FORMATS, default='csv')
+
+    def validate(self, data):
+        if data['start_date'] > data['end_date']:
+            raise serializers.ValidationError("start_date must not be after end_date.")
+        return data
+
+class ImportUploadSerializer(serializers.Serializer):
+    file = serializers.FileField()
+    format = serializers.ChoiceField(choices=IMPORT_FORMATS, required=False)
+
+    def validate(self, data):
+        if 'format' not in data:
+            extension = data['file'].name.rsplit('.', 1)[-1].lower()
+            if extension not in IMPORT_FORMATS:
+                raise serializers.ValidationError({'format': 'Cannot tell the format from the file name.'})
+            data['format'] = extension
+        return data
+
 class UserSerializer(serializers.ModelSerializer):
     class Meta:
         model = User
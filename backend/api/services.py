@@ -0,0 +1,170 @@
+from django.core.exceptions import ValidationError
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from .models import Student, Resource, Borrow, Return, record_circulation
+from .catalogue_cache import invalidate_catalogue
+from .events import publish_resource_status
+
+
+def checkout(student_id, resource_id, due_date):
+    """
+    Check a resource out to a student, both given by their natural ids.
+
+    Runs in a single transaction; Borrow.save() claims the resource with a
+    conditional UPDATE so concurrent checkouts of the same resource cannot
+    both succeed. Raises django.core.exceptions.ValidationError when the
+    checkout is not allowed.
+    """
+    try:
+        with transaction.atomic():
+            student = Student.objects.filter(student_id=student_id).only('pk', 'current_borrow').first()
+            if student is None:
+                raise ValidationError('Student not found')
+            borrow = Borrow(student=student, resource_id=resource_id, due_date=due_date)
+            borrow.save()
+    except IntegrityError:
+        # The student or resource was deleted between the lookup and the insert
+        raise ValidationError('Student or resource not found')
+    return borrow
+
+
+def bulk_checkout(items):
+    """
+    Check out many (student_id, resource_id, due_date) items in one transaction.
+
+    All students and resources are locked and loaded with one query each,
+    the items are validated in memory in order (a student's current loan
+    comes from its current_borrow pointer), and the accepted ones are written
+    with a bulk insert plus one bulk UPDATE each for resources and students.
+    Returns one (borrow, error) pair per item, in input order.
+    """
+    results = [None] * len(items)
+    with transaction.atomic():
+        students = Student.objects.select_for_update().in_bulk(
+            {item['student_id'] for item in items}, field_name='student_id'
+        )
+        resources = Resource.objects.select_for_update().in_bulk({item['resource_id'] for item in items})
+        busy_students = {student.pk for student in students.values() if student.current_borrow_id is not None}
+        claimed_resources = set()
+        borrows = []
+        for index, item in enumerate(items):
+            student = students.get(item['student_id'])
+            resource = resources.get(item['resource_id'])
+            if student is None:
+                results[index] = (None, 'Student not found')
+            elif resource is None:
+                results[index] = (None, 'Resource not found')
+            elif resource.status != 'AVAILABLE' or resource.pk in claimed_resources:
+                results[index] = (None, 'This resource is already borrowed by another student')
+            elif student.pk in busy_students:
+                results[index] = (None, 'This student has unreturned books and cannot borrow more')
+            else:
+                busy_students.add(student.pk)
+                claimed_resources.add(resource.pk)
+                resource.status = 'BORROWED'
+                borrow = Borrow(student=student, resource=resource, due_date=item['due_date'])
+                borrows.append((index, borrow))
+
+        if borrows:
+            Borrow.objects.bulk_create([borrow for _, borrow in borrows])
+            if borrows[0][1].pk is None:
+                # Backends without RETURNING (MySQL) do not set primary keys
+                # on bulk inserts; each claimed resource has exactly one
+                # active loan, so map them back through it.
+                ids = dict(
+                    Borrow.objects.filter(resource_id__in=claimed_resources, status='ACTIVE')
+                    .values_list('resource_id', 'id')
+                )
+                for _, borrow in borrows:
+                    borrow.pk = ids[borrow.resource_id]
+            now = timezone.now()
+            for _, borrow in borrows:
+                borrow.student.current_borrow = borrow
+                borrow.resource.current_borrow = borrow
+                borrow.resource.updated_at = now
+            Student.objects.bulk_update([borrow.student for _, borrow in borrows], ['current_borrow'])
+            Resource.objects.bulk_update(
+                [borrow.resource for _, borrow in borrows], ['status', 'current_borrow', 'updated_at'],
+            )
+            invalidate_catalogue(claimed_resources)
+            publish_resource_status({resource_id: 'BORROWED' for resource_id in claimed_resources})
+            record_circulation(borrowed=[
+                (borrow.borrow_date, borrow.resource.resource_type, borrow.student_id) for _, borrow in borrows
+            ])
+        for index, borrow in borrows:
+            results[index] = (borrow, None)
+    return results
+
+
+def return_borrow(borrow_record_id, condition_notes=''):
+    """
+    Return a borrow, given by its id, in a single transaction.
+
+    The borrow is loaded once together with its student and resource (which
+    the response needs anyway); Return.save() then closes it with a
+    conditional UPDATE, so a second return of the same borrow, concurrent or
+    not, is rejected. Raises django.core.exceptions.ValidationError when the
+    return is not allowed.
+    """
+    with transaction.atomic():
+        borrow_record = Borrow.objects.select_related('student', 'resource').filter(pk=borrow_record_id).first()
+        if borrow_record is None:
+            raise ValidationError('Borrow record not found')
+        record = Return(borrow_record=borrow_record, condition_notes=condition_notes)
+        record.save()
+    return record
+
+
+def bulk_return(items):
+    """
+    Return many borrows, given as (borrow_record_id, condition_notes) items,
+    in one transaction.
+
+    The borrows are locked and loaded with one query; borrows that do not
+    exist, are already returned or appear twice in the batch are rejected.
+    Returns one (return, error) pair per item, in input order.
+    """
+    results = [None] * len(items)
+    with transaction.atomic():
+        borrow_records = Borrow.objects.select_for_update().select_related('resource').in_bulk(
+            {item['borrow_record_id'] for item in items}
+        )
+        seen = set()
+        returns = []
+        for index, item in enumerate(items):
+            borrow_record = borrow_records.get(item['borrow_record_id'])
+            if borrow_record is None:
+                results[index] = (None, 'Borrow record not found')
+            elif borrow_record.status not in Borrow.OPEN_STATUSES or borrow_record.pk in seen:
+                results[index] = (None, 'This borrow record has already been returned')
+            else:
+                seen.add(borrow_record.pk)
+                borrow_record.status = 'RETURNED'
+                record = Return(borrow_record=borrow_record, condition_notes=item.get('condition_notes', ''))
+                returns.append((index, record))
+
+        if returns:
+            now = timezone.now()
+            Borrow.objects.filter(pk__in=seen).update(status='RETURNED', updated_at=now)
+            returned_resources = {record.borrow_record.resource_id for _, record in returns}
+            Resource.objects.filter(pk__in=returned_resources).update(
+                status='AVAILABLE', current_borrow=None, updated_at=now,
+            )
+            Student.objects.filter(current_borrow__in=seen).update(current_borrow=None)
+            invalidate_catalogue(returned_resources)
+            publish_resource_status({resource_id: 'AVAILABLE' for resource_id in returned_resources})
+            Return.objects.bulk_create([record for _, record in returns])
+            if returns[0][1].pk is None:
+                ids = dict(
+                    Return.objects.filter(borrow_record_id__in=seen)
+                    .order_by('id').values_list('borrow_record_id', 'id')
+                )
+                for _, record in returns:
+                    record.pk = ids[record.borrow_record_id]
+            record_circulation(returned=[
+                (record.return_date, record.borrow_record.resource.resource_type, record.borrow_record.student_id)
+                for _, record in returns
+            ])
+        for index, record in returns:
+            results[index] = (record, None)
+    return results
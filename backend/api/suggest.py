@@ -0,0 +1,170 @@
+import bisect
+import threading
+import time
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from .models import Student, Resource
+from .reports import chunked_values
+
+# Typeahead suggestions served from a sorted in-process array. Lookups are a
+# bisect plus a short scan, so they never touch the database. Local writes
+# arrive through model signals once their transaction commits; writes from
+# other workers (or set-based updates that skip signals) are folded in from
+# `updated_at` at most every SUGGEST_REFRESH_SECONDS. Rows deleted by other
+# workers leave no `updated_at`, so the index is reconciled against the
+# table's primary keys at most every SUGGEST_RECONCILE_SECONDS.
+SUGGEST_REFRESH_SECONDS = getattr(settings, 'SUGGEST_REFRESH_SECONDS', 5)
+SUGGEST_RECONCILE_SECONDS = getattr(settings, 'SUGGEST_RECONCILE_SECONDS', 300)
+SUGGEST_MAX_RESULTS = 50
+
+
+class PrefixIndex:
+    """
+    Sorted (key, pk) entries over a few text fields of one model, plus a
+    small payload per pk that is returned with each suggestion. Pks are
+    stored as strings so integer and string primary keys sort alike.
+    """
+
+    def __init__(self, model, key_fields, payload_fields):
+        self.model = model
+        self.key_fields = key_fields
+        self.payload_fields = payload_fields
+        self.entries = []
+        self.keys = {}
+        self.payloads = {}
+        self.lock = threading.Lock()
+        self.built = False
+        self.high_water = None
+        self.refreshed_at = 0
+        self.reconciled_at = time.monotonic()
+
+    def _keys(self, payload):
+        return {str(payload[field]).lower() for field in self.key_fields if payload[field]}
+
+    def _add(self, pk, payload):
+        self._remove(pk)
+        keys = self._keys(payload)
+        for key in keys:
+            bisect.insort(self.entries, (key, pk))
+        self.keys[pk] = keys
+        self.payloads[pk] = payload
+
+    def _remove(self, pk):
+        for key in self.keys.pop(pk, ()):
+            index = bisect.bisect_left(self.entries, (key, pk))
+            if index < len(self.entries) and self.entries[index] == (key, pk):
+                self.entries.pop(index)
+        self.payloads.pop(pk, None)
+
+    def _load(self, queryset):
+        fields = ['pk', 'updated_at', *self.payload_fields]
+        rows = []
+        for row in chunked_values(queryset, fields):
+            rows.append(row)
+            if self.high_water is None or row[1] > self.high_water:
+                self.high_water = row[1]
+        if not self.built:
+            # Initial build: sort once instead of inserting row by row
+            for row in rows:
+                pk = str(row[0])
+                payload = dict(zip(self.payload_fields, row[2:]))
+                self.keys[pk] = self._keys(payload)
+                self.payloads[pk] = payload
+                self.entries.extend((key, pk) for key in self.keys[pk])
+            self.entries.sort()
+            self.built = True
+        else:
+            for row in rows:
+                self._add(str(row[0]), dict(zip(self.payload_fields, row[2:])))
+        self.refreshed_at = time.monotonic()
+
+    def ensure_fresh(self):
+        if not self.built:
+            self._load(self.model.objects.all())
+        elif time.monotonic() - self.refreshed_at >= SUGGEST_REFRESH_SECONDS:
+            queryset = self.model.objects.all()
+            # No watermark yet if the table was empty at the last load
+            if self.high_water is not None:
+                queryset = queryset.filter(updated_at__gte=self.high_water)
+            self._load(queryset)
+        if time.monotonic() - self.reconciled_at >= SUGGEST_RECONCILE_SECONDS:
+            self.reconcile()
+
+    def reconcile(self):
+        """Drop entries whose rows were deleted, e.g. by another worker."""
+        live = {str(row[0]) for row in chunked_values(self.model.objects.all(), ['pk'])}
+        for pk in set(self.payloads) - live:
+            self._remove(pk)
+        self.reconciled_at = time.monotonic()
+
+    def suggest(self, prefix, limit):
+        prefix = prefix.lower()
+        with self.lock:
+            self.ensure_fresh()
+            results = []
+            seen = set()
+            index = bisect.bisect_left(self.entries, (prefix, ''))
+            while index < len(self.entries) and len(results) < limit:
+                key, pk = self.entries[index]
+                if not key.startswith(prefix):
+                    break
+                if pk not in seen:
+                    seen.add(pk)
+                    results.append(self.payloads[pk])
+                index += 1
+            return results
+
+    def update(self, instance):
+        pk = str(instance.pk)
+        payload = {field: getattr(instance, field) for field in self.payload_fields}
+
+        def apply():
+            with self.lock:
+                if self.built:
+                    self._add(pk, payload)
+
+        # A rolled-back save must not leave its values behind
+        transaction.on_commit(apply)
+
+    def delete(self, instance):
+        pk = str(instance.pk)
+
+        def apply():
+            with self.lock:
+                if self.built:
+                    self._remove(pk)
+
+        transaction.on_commit(apply)
+
+
+resource_index = PrefixIndex(
+    Resource,
+    key_fields=['title', 'author', 'resource_id'],
+    payload_fields=['resource_id', 'title', 'author'],
+)
+
+student_index = PrefixIndex(
+    Student,
+    key_fields=['student_id', 'first_name', 'last_name'],
+    payload_fields=['id', 'student_id', 'first_name', 'last_name'],
+)
+
+
+@receiver(post_save, sender=Resource)
+def update_resource_suggestions(sender, instance, **kwargs):
+    resource_index.update(instance)
+
+@receiver(post_delete, sender=Resource)
+def delete_resource_suggestions(sender, instance, **kwargs):
+    resource_index.delete(instance)
+
+@receiver(post_save, sender=Student)
+def update_student_suggestions(sender, instance, **kwargs):
+    student_index.update(instance)
+
+@receiver(post_delete, sender=Student)
+def delete_student_suggestions(sender, instance, **kwargs):
+    student_index.delete(instance)
@@ -1,3 +1,345 @@
-from django.test import TestCase
+import json
+import threading
+from datetime import date, timedelta
+from io import StringIO
+from unittest import mock
 
-# Create your tests here.
+from django.core.exceptions import ValidationError
+from django.core.management import call_command
+from django.db import connection, transaction, DatabaseError
+from django.test import TestCase, TransactionTestCase
+from .models import Student, Resource, Borrow, Return, Report
+from .models import DailyCirculation, StudentCirculation, ResourceTypeUtilization
+from .services import checkout, return_borrow
+from .catalogue_cache import cache_get, cache_set, detail_key, invalidate_catalogue
+from .search import get_index
+from .suggest import PrefixIndex
+from .reports import generate_report
+from .management.commands.benchmark_api import SCENARIOS
+
+
+def make_student(n):
+    return Student(student_id=f"T{n:010d}", first_name='Test', last_name=str(n),
+                   phone='09000000000', email=f"test{n}@example.com")
+
+
+def make_resource(n, resource_type='BOOK'):
+    return Resource(resource_id=f"TEST-{n}", title=f"Test title {n}", resource_type=resource_type,
+                    author='Test Author', publication_year=2000)
+
+
+class ListQueryCountTests(TestCase):
+    """The borrow and return lists cost one query whatever the table size."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.students = Student.objects.bulk_create([make_student(n) for n in range(10)])
+        cls.resources = Resource.objects.bulk_create([make_resource(n) for n in range(10)])
+
+    def add_returned_borrows(self, count):
+        start = Borrow.objects.count()
+        today = date.today()
+        borrows = Borrow.objects.bulk_create([
+            Borrow(student=self.students[n % 10], resource=self.resources[n % 10],
+                   due_date=today + timedelta(days=14), status='RETURNED')
+            for n in range(start, start + count)
+        ], batch_size=1000)
+        Return.objects.bulk_create([Return(borrow_record=borrow) for borrow in borrows], batch_size=1000)
+
+    def test_list_queries_do_not_grow_with_rows(self):
+        for total in [1, 100, 10000]:
+            self.add_returned_borrows(total - Borrow.objects.count())
+            for path in ['/api/borrows/', '/api/returns/']:
+                with self.subTest(path=path, rows=total), self.assertNumQueries(1):
+                    response = self.client.get(path, {'page_size': 500})
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(len(response.json()['results']), min(total, 500))
+
+    def test_borrow_rows_keep_their_fields(self):
+        self.add_returned_borrows(1)
+        borrow = self.client.get('/api/borrows/').json()['results'][0]
+        self.assertEqual(set(borrow), {'id', 'student', 'resource', 'borrow_date', 'due_date', 'status'})
+
+
+class CheckoutTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.student, cls.other_student = Student.objects.bulk_create([make_student(1), make_student(2)])
+        cls.resource, cls.other_resource = Resource.objects.bulk_create([make_resource(1), make_resource(2)])
+        cls.due = date.today() + timedelta(days=14)
+
+    def test_checkout_claims_student_and_resource(self):
+        borrow = checkout(self.student.student_id, self.resource.pk, self.due)
+        self.student.refresh_from_db()
+        self.resource.refresh_from_db()
+        self.assertEqual(borrow.status, 'ACTIVE')
+        self.assertEqual(self.student.current_borrow_id, borrow.pk)
+        self.assertEqual(self.resource.current_borrow_id, borrow.pk)
+        self.assertEqual(self.resource.status, 'BORROWED')
+
+    def test_resource_on_loan_is_refused(self):
+        checkout(self.student.student_id, self.resource.pk, self.due)
+        with self.assertRaisesMessage(ValidationError, 'already borrowed'):
+            checkout(self.other_student.student_id, self.resource.pk, self.due)
+        self.assertEqual(Borrow.objects.count(), 1)
+
+    def test_student_with_open_loan_is_refused(self):
+        checkout(self.student.student_id, self.resource.pk, self.due)
+        with self.assertRaisesMessage(ValidationError, 'unreturned books'):
+            checkout(self.student.student_id, self.other_resource.pk, self.due)
+        self.other_resource.refresh_from_db()
+        self.assertEqual(self.other_resource.status, 'AVAILABLE')
+        self.assertIsNone(self.other_resource.current_borrow_id)
+
+    def test_unknown_student_or_resource_is_refused(self):
+        with self.assertRaisesMessage(ValidationError, 'Student not found'):
+            checkout('T9999999999', self.resource.pk, self.due)
+        with self.assertRaisesMessage(ValidationError, 'Resource not found'):
+            checkout(self.student.student_id, 'NO-SUCH-RESOURCE', self.due)
+        self.assertFalse(Borrow.objects.exists())
+
+    def test_unknown_resource_is_a_bad_request(self):
+        response = self.client.post('/api/borrows/', {
+            'student_id': self.student.student_id, 'resource_id': 'NO-SUCH-RESOURCE', 'due_date': self.due,
+        }, content_type='application/json')
+        self.assertEqual(response.status_code, 400)
+
+    def test_overdue_edit_cannot_take_an_open_loans_place(self):
+        checkout(self.student.student_id, self.resource.pk, self.due)
+        borrow = Borrow(student_id=self.student.pk, resource_id=self.other_resource.pk,
+                        due_date=self.due, status='OVERDUE')
+        with self.assertRaisesMessage(ValidationError, 'unreturned books'):
+            borrow.save()
+
+
+class ConcurrentCheckoutTests(TransactionTestCase):
+    """Checkouts racing for one resource: exactly one may win."""
+
+    def test_one_of_many_concurrent_checkouts_wins(self):
+        students = Student.objects.bulk_create([make_student(n) for n in range(6)])
+        resource = Resource.objects.create(resource_id='TEST-RACE', title='Race', resource_type='OTHER',
+                                           author='Test Author', publication_year=2000)
+        due = date.today() + timedelta(days=14)
+        barrier = threading.Barrier(len(students))
+        outcomes = []
+
+        def attempt(student_id):
+            barrier.wait()
+            try:
+                checkout(student_id, resource.pk, due)
+                outcomes.append(True)
+            except (ValidationError, DatabaseError):
+                outcomes.append(False)
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=attempt, args=(s.student_id,)) for s in students]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        wins = outcomes.count(True)
+        if connection.vendor == 'sqlite':
+            # SQLite locks the whole database, so every attempt may lose
+            self.assertLessEqual(wins, 1)
+        else:
+            self.assertEqual(wins, 1)
+        self.assertEqual(Borrow.objects.filter(resource=resource).count(), wins)
+        self.assertEqual(Student.objects.filter(current_borrow__resource=resource).count(), wins)
+
+
+class ReturnTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.student = Student.objects.bulk_create([make_student(1)])[0]
+        cls.resource = Resource.objects.create(resource_id='TEST-1', title='Test title', resource_type='BOOK',
+                                               author='Test Author', publication_year=2000)
+
+    def setUp(self):
+        self.borrow = checkout(self.student.student_id, self.resource.pk, date.today() + timedelta(days=14))
+
+    def test_return_closes_the_loan(self):
+        record = return_borrow(self.borrow.pk, 'Good')
+        self.borrow.refresh_from_db()
+        self.student.refresh_from_db()
+        self.resource.refresh_from_db()
+        self.assertEqual(record.condition_notes, 'Good')
+        self.assertEqual(self.borrow.status, 'RETURNED')
+        self.assertEqual(self.resource.status, 'AVAILABLE')
+        self.assertIsNone(self.resource.current_borrow_id)
+        self.assertIsNone(self.student.current_borrow_id)
+
+    def test_overdue_loan_can_be_returned(self):
+        Borrow.objects.filter(pk=self.borrow.pk).update(status='OVERDUE')
+        return_borrow(self.borrow.pk)
+        self.assertEqual(Borrow.objects.get(pk=self.borrow.pk).status, 'RETURNED')
+
+    def test_second_return_is_refused(self):
+        return_borrow(self.borrow.pk)
+        with self.assertRaisesMessage(ValidationError, 'already been returned'):
+            return_borrow(self.borrow.pk)
+        self.assertEqual(Return.objects.filter(borrow_record=self.borrow).count(), 1)
+
+    def test_unknown_borrow_is_a_bad_request(self):
+        response = self.client.post('/api/returns/', {'borrow_record_id': 0}, content_type='application/json')
+        self.assertEqual(response.status_code, 400)
+
+    def test_circulation_counters_follow_checkout_and_return(self):
+        daily = DailyCirculation.objects.get(date=self.borrow.borrow_date, resource_type='BOOK')
+        self.assertEqual((daily.borrows, daily.returns), (1, 0))
+        self.assertEqual(ResourceTypeUtilization.objects.get(resource_type='BOOK').on_loan, 1)
+
+        return_borrow(self.borrow.pk)
+        daily.refresh_from_db()
+        self.assertEqual((daily.borrows, daily.returns), (1, 1))
+        self.assertEqual(ResourceTypeUtilization.objects.get(resource_type='BOOK').on_loan, 0)
+        circulation = StudentCirculation.objects.get(student=self.student)
+        self.assertEqual((circulation.borrows, circulation.returns), (1, 1))
+
+    def test_return_queries(self):
+        # Borrow lookup, the borrow/resource/student UPDATEs and the Return
+        # INSERT, plus one UPDATE per circulation counter table; the
+        # transaction adds a savepoint and its release
+        with self.assertNumQueries(10):
+            return_borrow(self.borrow.pk)
+
+
+class DetailCacheTests(TestCase):
+    def test_read_racing_an_invalidation_cannot_recache_stale_data(self):
+        key = detail_key('TEST-1')
+        # The invalidation commits between the reader's key and its cache_set
+        with self.captureOnCommitCallbacks(execute=True):
+            invalidate_catalogue(['TEST-1'])
+        cache_set(key, {'title': 'stale'})
+        self.assertIsNone(cache_get(detail_key('TEST-1')))
+
+
+class FullTextSearchTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        Resource.objects.bulk_create([make_resource(n) for n in range(5)])
+        Resource.objects.bulk_create([make_resource(n, resource_type='MAGAZINE') for n in range(5, 7)])
+
+    def search(self, **params):
+        response = self.client.get('/api/resources/', {'q': 'test title', **params})
+        return [row['resource_id'] for row in response.json()['results']]
+
+    def test_filters_apply_before_the_result_cut(self):
+        with mock.patch('api.search.SEARCH_MAX_RESULTS', 2):
+            self.assertEqual(len(self.search()), 2)
+            self.assertEqual(sorted(self.search(resource_type='MAGAZINE')), ['TEST-5', 'TEST-6'])
+
+    def test_rows_deleted_elsewhere_leave_the_index(self):
+        self.search()
+        index = get_index(Resource, {'resource_id': 3, 'title': 3, 'author': 2})
+        # A delete from another worker sends no signal to this process
+        Resource.objects.filter(pk='TEST-1')._raw_delete(Resource.objects.db)
+        with self.captureOnCommitCallbacks(execute=True):
+            invalidate_catalogue(['TEST-1'])
+        with mock.patch('api.search.SEARCH_RECONCILE_SECONDS', 0):
+            self.assertNotIn('TEST-1', self.search())
+        self.assertNotIn('TEST-1', index.index.documents)
+
+
+class ReportReuseTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.last_week = date.today() - timedelta(days=7)
+        cls.yesterday = date.today() - timedelta(days=1)
+
+    def generate(self, report_type):
+        report = generate_report(report_type, self.last_week, self.yesterday)
+        self.addCleanup(report.file.delete, save=False)
+        return report
+
+    def test_closed_return_report_is_reused(self):
+        self.assertEqual(self.generate('RETURN').pk, self.generate('RETURN').pk)
+
+    def test_borrow_and_overdue_reports_are_rebuilt(self):
+        for report_type in ['BORROW', 'OVERDUE']:
+            with self.subTest(report_type=report_type):
+                self.assertNotEqual(self.generate(report_type).pk, self.generate(report_type).pk)
+
+
+class ListETagTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.resource = Resource.objects.bulk_create([make_resource(1)])[0]
+        cls.student = Student.objects.bulk_create([make_student(1)])[0]
+
+    def assert_etag_follows_writes(self, path, write):
+        etag = self.client.get(path).headers['ETag']
+        with self.assertNumQueries(0):
+            self.assertEqual(self.client.get(path, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        with self.captureOnCommitCallbacks(execute=True):
+            write()
+        self.assertEqual(self.client.get(path, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_resource_list_etag(self):
+        self.resource.title = 'Renamed'
+        self.assert_etag_follows_writes('/api/resources/', self.resource.save)
+
+    def test_student_list_etag(self):
+        self.assert_etag_follows_writes('/api/students/', self.student.delete)
+
+
+class BenchmarkCommandTests(TestCase):
+    def test_benchmark_run_leaves_loans_as_it_found_them(self):
+        call_command('seed_library', resources=60, students=40, borrows=200, stdout=StringIO())
+        open_loans = Borrow.objects.filter(status__in=Borrow.OPEN_STATUSES)
+        loans_before = set(open_loans.values_list('pk', flat=True))
+        borrowed = Resource.objects.filter(status='BORROWED').count()
+
+        out = StringIO()
+        call_command('benchmark_api', requests=5, warmup=1, report_requests=1, stdout=out, stderr=StringIO())
+        scenarios = json.loads(out.getvalue())['scenarios']
+        self.assertEqual(list(scenarios), SCENARIOS)
+        for name, result in scenarios.items():
+            with self.subTest(scenario=name):
+                self.assertEqual(result['errors'], 0)
+                self.assertGreater(result['requests'], 0)
+        self.assertEqual(scenarios['list']['distinct_requests'], 5)
+
+        self.assertEqual(set(open_loans.values_list('pk', flat=True)), loans_before)
+        self.assertEqual(Resource.objects.filter(status='BORROWED').count(), borrowed)
+        self.assertFalse(Report.objects.exists())
+
+
+class SuggestTests(TestCase):
+    def setUp(self):
+        # A fresh index per test instead of the process-wide one
+        patcher = mock.patch('api.suggest.student_index', PrefixIndex(
+            Student, key_fields=['student_id', 'first_name', 'last_name'],
+            payload_fields=['id', 'student_id', 'first_name', 'last_name'],
+        ))
+        self.index = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def suggest(self, prefix):
+        return [row['student_id'] for row in self.index.suggest(prefix, 10)]
+
+    def test_index_built_on_an_empty_table_picks_up_new_rows(self):
+        self.assertEqual(self.suggest('t'), [])
+        Student.objects.bulk_create([make_student(1)])
+        with mock.patch('api.suggest.SUGGEST_REFRESH_SECONDS', 0):
+            self.assertEqual(self.suggest('t'), ['T0000000001'])
+
+    def test_rolled_back_save_leaves_no_entry(self):
+        self.suggest('t')
+        with self.captureOnCommitCallbacks(execute=True):
+            try:
+                with transaction.atomic():
+                    make_student(1).save()
+                    raise DatabaseError
+            except DatabaseError:
+                pass
+        self.assertEqual(self.suggest('t'), [])
+
+    def test_rows_deleted_elsewhere_leave_the_index(self):
+        Student.objects.bulk_create([make_student(1), make_student(2)])
+        self.assertEqual(len(self.suggest('t')), 2)
+        # A delete from another worker sends no signal to this process
+        Student.objects.filter(student_id='T0000000001')._raw_delete(Student.objects.db)
+        with mock.patch('api.suggest.SUGGEST_RECONCILE_SECONDS', 0):
+            self.assertEqual(self.suggest('t'), ['T0000000002'])
@@ -1,8 +1,14 @@
 from django.urls import path
+from . import async_views
 from .views import (
     StudentListCreate, StudentRetrieveUpdate,
     ResourceListCreate, ResourceRetrieveUpdate,
     BorrowListCreate, ReturnListCreate,
+    BorrowBulkCreate, ReturnBulkCreate,
+    ReportGenerate, ReportDownload,
+    ImportUpload, Export, Metrics,
+    CirculationStats, CatalogueCacheStats,
+    ResourceSuggest, StudentSuggest,
     UserList, UserDetail,
     MyTokenObtainPairView, MyTokenRefreshView, MyTokenBlacklistView,
     # UserRegistrationView,  # Removed as registration is disabled
@@ -10,11 +16,27 @@ from .views import (
 
 urlpatterns = [
     path('students/', StudentListCreate.as_view()),
+    path('students/suggest/', StudentSuggest.as_view()),
     path('students/<int:pk>/', StudentRetrieveUpdate.as_view()),
     path('resources/', ResourceListCreate.as_view()),
+    path('resources/suggest/', ResourceSuggest.as_view()),
     path('resources/<str:pk>/', ResourceRetrieveUpdate.as_view()),
     path('borrows/', BorrowListCreate.as_view()),
+    path('borrows/bulk/', BorrowBulkCreate.as_view()),
     path('returns/', ReturnListCreate.as_view()),
+    path('returns/bulk/', ReturnBulkCreate.as_view()),
+    path('import/<str:kind>/', ImportUpload.as_view()),
+    path('export/<str:kind>/', Export.as_view()),
+    path('reports/generate/', ReportGenerate.as_view()),
+    path('reports/<int:pk>/download/', ReportDownload.as_view()),
+    path('stats/', CirculationStats.as_view()),
+    path('stats/cache/', CatalogueCacheStats.as_view()),
+    path('metrics/', Metrics.as_view()),
+    path('async/resources/', async_views.resource_list),
+    path('async/resources/<str:pk>/', async_views.resource_detail),
+    path('async/resources/<str:pk>/availability/', async_views.resource_availability),
+    path('async/students/<str:student_id>/', async_views.student_lookup),
+    path('events/resources/', async_views.resource_events),
     path('users/', UserList.as_view()),
     path('users/<int:pk>/', UserDetail.as_view()),
     path('login/', MyTokenObtainPairView.as_view(), name='token_obtain_pair'),
@@ -1,17 +1,49 @@
 from rest_framework import generics
 from django.contrib.auth.models import User
-from .models import Student, Resource, Borrow, Return
+from .models import Student, Resource, Borrow, Return, Report
+from .models import DailyCirculation, StudentCirculation, ResourceTypeUtilization
 from .serializers import StudentSerializer, ResourceSerializer, BorrowSerializer, ReturnSerializer, UserRegistrationSerializer, UserSerializer
+from .serializers import BulkCheckoutItemSerializer, BulkReturnItemSerializer, ReportSerializer, ReportRequestSerializer
+from .serializers import ImportUploadSerializer
+from . import services
+from .reports import generate_report
+from .imports import IMPORTERS, read_rows, import_records
+from .exports import EXPORTS, EXPORT_FORMATS, export_window, encode_rows, gzip_pieces
+from .catalogue_cache import cache_get, cache_set, cache_stats, list_key, detail_key
+from .catalogue_cache import catalogue_version, student_version
+from .metrics import render_metrics
+from .pagination import table_row_count
+from .conditional import list_etag, detail_etag, detail_last_modified
+from .suggest import resource_index, student_index, SUGGEST_MAX_RESULTS
+from django.utils.decorators import method_decorator
+from django.views.decorators.http import condition
+from django.http import FileResponse, Http404, HttpResponse, JsonResponse, StreamingHttpResponse
+from django.views import View
+from django.utils.dateparse import parse_date, parse_datetime
+from datetime import datetime, time as datetime_time
+from django.utils import timezone
+from datetime import timedelta
+from django.conf import settings
+from django.db.models import F
 from .filters import StudentFilter, ResourceFilter
-from .permissions import IsLibrarian, IsStudent
+from .permissions import IsLibrarian, IsStudent, LIBRARIAN_LEVELS, cached_user_level, user_level
+from .authentication import StatelessJWTAuthentication
+from .revocation import is_revoked, revoke
 from rest_framework.permissions import IsAuthenticated, SAFE_METHODS, BasePermission
 
 from rest_framework_simplejwt.views import TokenObtainPairView, TokenRefreshView, TokenBlacklistView
-from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
+from rest_framework_simplejwt.serializers import TokenObtainPairSerializer, TokenRefreshSerializer, TokenBlacklistSerializer
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.settings import api_settings as jwt_settings
+from rest_framework_simplejwt.tokens import RefreshToken
 from rest_framework.permissions import AllowAny
 from rest_framework.response import Response
 from rest_framework import status
 from rest_framework.views import APIView
+from rest_framework.negotiation import BaseContentNegotiation
+from rest_framework.exceptions import ValidationError
+from rest_framework.parsers import MultiPartParser
+import io
 
 class ReadOnlyOrIsLibrarian(BasePermission):
     """
@@ -22,176 +54,436 @@ class ReadOnlyOrIsLibrarian(BasePermission):
         if request.method in SAFE_METHODS:
             return request.user and request.user.is_authenticated
         else:
-            user = request.user
-            if not user or not user.is_authenticated:
-                return False
-            if hasattr(user, 'profile') and user.profile.user_level in ['librarian', 'admin']:
-                return True
-            return False
+            return user_level(request) in LIBRARIAN_LEVELS
+
+class SparseFieldsetMixin:
+    """
+    `?fields=a,b` limits each object to the named serializer fields.
+    """
+    def requested_fields(self):
+        fields = self.get_serializer_class().Meta.fields
+        param = self.request.query_params.get('fields')
+        if not param:
+            return list(fields)
+        requested = {field.strip() for field in param.split(',') if field.strip()}
+        unknown = requested - set(fields)
+        if unknown:
+            raise ValidationError({'fields': f"Unknown fields: {', '.join(sorted(unknown))}"})
+        return [field for field in fields if field in requested]
+
+class CompactListMixin(SparseFieldsetMixin):
+    """
+    Builds list pages straight from `.values_list()` rows, without model
+    instances or per-field serializer calls. Only for serializers whose
+    fields are all model columns (possibly under another name, via
+    `source`) with JSON-ready values.
+    """
+    def list(self, request, *args, **kwargs):
+        fields = self.requested_fields()
+        queryset = self.filter_queryset(self.get_queryset())
+        serializer_fields = self.get_serializer().fields
+        columns = [
+            name if serializer_fields[name].source == name else F(serializer_fields[name].source)
+            for name in fields
+        ]
+        # The cursor is read from the first ordering field of the last row
+        cursor_field = self.paginator.get_ordering(request, queryset, self)[0].lstrip('-')
+        if cursor_field not in columns:
+            columns.append(cursor_field)
+        page = self.paginate_queryset(queryset.values_list(*columns, named=True))
+        return self.get_paginated_response([dict(zip(fields, row)) for row in page])
+
+class SparseDetailMixin(SparseFieldsetMixin):
+    def get(self, request, *args, **kwargs):
+        response = super().get(request, *args, **kwargs)
+        if response.status_code == status.HTTP_200_OK:
+            fields = self.requested_fields()
+            response.data = {field: response.data[field] for field in fields}
+        return response
+
+# List views are paginated with LibraryCursorPagination, which needs a
+# stable `ordering` on an indexed key for each view. Catalogue and student
+# lookups use StatelessJWTAuthentication so kiosk reads skip the User query.
 
 # Student CRUD
-class StudentListCreate(generics.ListCreateAPIView):
+class StudentListCreate(CompactListMixin, generics.ListCreateAPIView):
     queryset = Student.objects.all()
     serializer_class = StudentSerializer
     filterset_class = StudentFilter
     search_fields = ['first_name', 'last_name', 'email', 'student_id']
+    fulltext_fields = {'student_id': 3, 'first_name': 2, 'last_name': 2, 'email': 1}
     ordering_fields = ['first_name', 'last_name', 'email', 'student_id']
+    ordering = ['id']
+    authentication_classes = [StatelessJWTAuthentication]
     permission_classes = [AllowAny]
 
-class StudentRetrieveUpdate(generics.RetrieveUpdateAPIView):
+    @method_decorator(condition(etag_func=list_etag(student_version)))
+    def get(self, request, *args, **kwargs):
+        return super().get(request, *args, **kwargs)
+
+class StudentRetrieveUpdate(SparseDetailMixin, generics.RetrieveUpdateAPIView):
     queryset = Student.objects.all()
     serializer_class = StudentSerializer
+    authentication_classes = [StatelessJWTAuthentication]
     permission_classes = [AllowAny]
 
+    @method_decorator(condition(etag_func=detail_etag(Student), last_modified_func=detail_last_modified(Student)))
+    def get(self, request, *args, **kwargs):
+        return super().get(request, *args, **kwargs)
+
 # Resource CRUD
-class ResourceListCreate(generics.ListCreateAPIView):
+class ResourceListCreate(CompactListMixin, generics.ListCreateAPIView):
     queryset = Resource.objects.all()
     serializer_class = ResourceSerializer
     filterset_class = ResourceFilter
     search_fields = ['title', 'author', 'resource_id']
-    ordering_fields = ['title', 'author', 'status', 'resource_type']
+    fulltext_fields = {'resource_id': 3, 'title': 3, 'author': 2}
+    ordering_fields = ['title', 'author', 'status', 'resource_type', 'resource_id']
+    ordering = ['resource_id']
+    authentication_classes = [StatelessJWTAuthentication]
     permission_classes = [AllowAny]
 
-class ResourceRetrieveUpdate(generics.RetrieveUpdateAPIView):
+    # Kiosks poll this endpoint; unchanged catalogues are answered with 304
+    @method_decorator(condition(etag_func=list_etag(catalogue_version)))
+    def get(self, request, *args, **kwargs):
+        return super().get(request, *args, **kwargs)
+
+    def list(self, request, *args, **kwargs):
+        # Pages are cached per full URL under the current catalogue version
+        key = list_key(request)
+        data = cache_get(key)
+        if data is None:
+            data = super().list(request, *args, **kwargs).data
+            cache_set(key, data)
+        return Response(data)
+
+class ResourceRetrieveUpdate(SparseDetailMixin, generics.RetrieveUpdateAPIView):
     queryset = Resource.objects.all()
     serializer_class = ResourceSerializer
+    authentication_classes = [StatelessJWTAuthentication]
     permission_classes = [AllowAny]
 
-# Borrow CRUD (optional)
-from rest_framework.exceptions import ValidationError as DRFValidationError
-from django.core.exceptions import ValidationError as DjangoValidationError
+    @method_decorator(condition(etag_func=detail_etag(Resource), last_modified_func=detail_last_modified(Resource)))
+    def get(self, request, *args, **kwargs):
+        return super().get(request, *args, **kwargs)
 
-from django_filters.rest_framework import DjangoFilterBackend
+    def retrieve(self, request, *args, **kwargs):
+        key = detail_key(kwargs['pk'])
+        data = cache_get(key)
+        if data is None:
+            data = super().retrieve(request, *args, **kwargs).data
+            cache_set(key, data)
+        return Response(data)
 
+# Borrow CRUD (optional)
 class BorrowListCreate(generics.ListCreateAPIView):
-    queryset = Borrow.objects.all()
+    # Nested student/resource representations are joined in, so a page
+    # costs a fixed number of queries regardless of its size.
+    queryset = Borrow.objects.select_related('student', 'resource')
     serializer_class = BorrowSerializer
-    filter_backends = [DjangoFilterBackend]
-    filterset_fields = ['status']
-    search_fields = ['student__name', 'resource__title']
-    ordering_fields = ['borrow_date', 'return_date']
+    filterset_fields = {'status': ['exact', 'in']}
+    search_fields = ['student__first_name', 'student__last_name', 'resource__title']
+    ordering_fields = ['borrow_date', 'due_date']
+    ordering = ['-id']
     permission_classes = [AllowAny]
 
-    import logging
-    logger = logging.getLogger(__name__)
-
-    def create(self, request, *args, **kwargs):
-        try:
-            return super().create(request, *args, **kwargs)
-        except Exception as e:
-            logger.error(f"Error creating borrow record: {e}", exc_info=True)
-            raise
-
 # Return CRUD (optional)
 class ReturnListCreate(generics.ListCreateAPIView):
-    queryset = Return.objects.all()
+    queryset = Return.objects.select_related('borrow_record__student', 'borrow_record__resource')
     serializer_class = ReturnSerializer
-    search_fields = ['student__name', 'resource__title']
+    search_fields = ['borrow_record__student__first_name', 'borrow_record__student__last_name', 'borrow_record__resource__title']
     ordering_fields = ['return_date']
+    ordering = ['-id']
     permission_classes = [AllowAny]
 
-# User CRUD
-class UserList(generics.ListAPIView):
-    queryset = User.objects.all()
-    serializer_class = UserSerializer
+# Bulk checkout / return
+def run_bulk(data, item_serializer_class, operation):
+    """
+    Validate a list of items in memory, hand the valid ones to a bulk
+    service operation and report a result for every item.
+    """
+    if not isinstance(data, list):
+        return Response({'detail': 'Expected a list of items.'}, status=status.HTTP_400_BAD_REQUEST)
+    if len(data) > settings.API_MAX_BATCH_SIZE:
+        return Response(
+            {'detail': f'At most {settings.API_MAX_BATCH_SIZE} items can be sent in one request.'},
+            status=status.HTTP_400_BAD_REQUEST,
+        )
+
+    results = [None] * len(data)
+    valid_indexes = []
+    valid_items = []
+    for index, item in enumerate(data):
+        serializer = item_serializer_class(data=item)
+        if serializer.is_valid():
+            valid_indexes.append(index)
+            valid_items.append(serializer.validated_data)
+        else:
+            results[index] = {'index': index, 'errors': serializer.errors}
+
+    for index, (obj, error) in zip(valid_indexes, operation(valid_items) if valid_items else []):
+        if error:
+            results[index] = {'index': index, 'errors': {'non_field_errors': [error]}}
+        else:
+            results[index] = {'index': index, 'id': obj.pk}
+
+    succeeded = sum(1 for result in results if 'id' in result)
+    return Response({
+        'succeeded': succeeded,
+        'failed': len(results) - succeeded,
+        'results': results,
+    })
+
+class BorrowBulkCreate(APIView):
+    """
+    Check out a list of {student_id, resource_id, due_date} items in one transaction.
+    """
     permission_classes = [AllowAny]
 
-class UserDetail(generics.RetrieveAPIView):
-    queryset = User.objects.all()
-    serializer_class = UserSerializer
+    def post(self, request, *args, **kwargs):
+        return run_bulk(request.data, BulkCheckoutItemSerializer, services.bulk_checkout)
+
+class ReturnBulkCreate(APIView):
+    """
+    Return a list of {borrow_record_id, condition_notes} items in one transaction.
+    """
     permission_classes = [AllowAny]
 
-# Student CRUD
-class StudentListCreate(generics.ListCreateAPIView):
-    queryset = Student.objects.all()
-    serializer_class = StudentSerializer
-    filterset_class = StudentFilter
-    search_fields = ['first_name', 'last_name', 'email', 'student_id']
-    ordering_fields = ['first_name', 'last_name', 'email', 'student_id']
+    def post(self, request, *args, **kwargs):
+        return run_bulk(request.data, BulkReturnItemSerializer, services.bulk_return)
+
+# Bulk import
+class ImportUpload(APIView):
+    """
+    Upsert students or resources from an uploaded CSV or JSON Lines `file`.
+    Returns counts, per-row errors and throughput; rows that fail
+    validation are skipped, the rest are imported.
+    """
     permission_classes = [AllowAny]
+    parser_classes = [MultiPartParser]
 
-from rest_framework import generics
-from django.contrib.auth.models import User
-from .models import Student, Resource, Borrow, Return
-from .serializers import StudentSerializer, ResourceSerializer, BorrowSerializer, ReturnSerializer, UserRegistrationSerializer
-from .filters import StudentFilter, ResourceFilter
-from .permissions import IsLibrarian, IsStudent
-from rest_framework.permissions import IsAuthenticated, SAFE_METHODS, BasePermission
+    def post(self, request, kind, *args, **kwargs):
+        if kind not in IMPORTERS:
+            raise Http404
+        serializer = ImportUploadSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        upload = serializer.validated_data['file']
+        # Large uploads are spooled to disk by Django and read line by line
+        stream = io.TextIOWrapper(upload.file, encoding='utf-8-sig', newline='')
+        report = import_records(kind, read_rows(stream, serializer.validated_data['format']))
+        return Response(report)
 
-from rest_framework_simplejwt.views import TokenObtainPairView, TokenRefreshView, TokenBlacklistView
-from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
-from rest_framework.permissions import AllowAny
-from rest_framework.response import Response
-from rest_framework import status
-from rest_framework.views import APIView
+# Bulk export
+class PassthroughNegotiation(BaseContentNegotiation):
+    """
+    Always the first parser and renderer: the view builds its own response,
+    and `?format=` is the export format, not a renderer choice.
+    """
+    def select_parser(self, request, parsers):
+        return parsers[0]
 
-class ReadOnlyOrIsLibrarian(BasePermission):
+    def select_renderer(self, request, renderers, format_suffix=None):
+        return renderers[0], renderers[0].media_type
+
+class Export(APIView):
     """
-    The request is authenticated as a librarian/admin for unsafe methods,
-    or is a read-only request for authenticated users.
+    Stream every resource, student or borrow as NDJSON (default) or CSV
+    (`?format=csv`), gzipped when the client sends Accept-Encoding: gzip.
+    `?updated_since=<datetime or date>` limits the dump to rows changed
+    since then; the X-Export-Watermark header is the value to pass next time.
+    Librarians only: the dumps hold students' contact details.
     """
-    def has_permission(self, request, view):
-        if request.method in SAFE_METHODS:
-            return request.user and request.user.is_authenticated
+    authentication_classes = [StatelessJWTAuthentication]
+    permission_classes = [IsLibrarian]
+    content_negotiation_class = PassthroughNegotiation
+
+    def get(self, request, kind):
+        if kind not in EXPORTS:
+            raise Http404
+        fmt = request.GET.get('format', 'ndjson')
+        if fmt not in EXPORT_FORMATS:
+            return JsonResponse({'format': [f"Must be one of: {', '.join(EXPORT_FORMATS)}."]}, status=400)
+
+        updated_since = None
+        if request.GET.get('updated_since'):
+            value = request.GET['updated_since']
+            updated_since = parse_datetime(value)
+            if updated_since is None and parse_date(value) is not None:
+                updated_since = datetime.combine(parse_date(value), datetime_time.min)
+            if updated_since is None:
+                return JsonResponse({'updated_since': ['Expected an ISO 8601 date or datetime.']}, status=400)
+            if timezone.is_naive(updated_since):
+                updated_since = timezone.make_aware(updated_since)
+
+        queryset, watermark = export_window(kind, updated_since)
+        pieces = encode_rows(kind, queryset, fmt)
+        content_type = 'text/csv' if fmt == 'csv' else 'application/x-ndjson'
+        if 'gzip' in request.headers.get('Accept-Encoding', ''):
+            response = StreamingHttpResponse(gzip_pieces(pieces), content_type=content_type)
+            response['Content-Encoding'] = 'gzip'
         else:
-            user = request.user
-            if not user or not user.is_authenticated:
-                return False
-            if hasattr(user, 'profile') and user.profile.user_level in ['librarian', 'admin']:
-                return True
-            return False
+            response = StreamingHttpResponse((piece.encode() for piece in pieces), content_type=content_type)
+        response['Vary'] = 'Accept-Encoding'
+        response['Content-Disposition'] = f'attachment; filename="{kind}.{fmt}"'
+        if watermark is not None:
+            response['X-Export-Watermark'] = watermark.isoformat()
+        return response
 
-# Student CRUD
-class StudentListCreate(generics.ListCreateAPIView):
-    queryset = Student.objects.all()
-    serializer_class = StudentSerializer
-    filterset_class = StudentFilter
-    search_fields = ['first_name', 'last_name', 'email', 'student_id']
-    ordering_fields = ['first_name', 'last_name', 'email', 'student_id']
+# Reports
+class ReportGenerate(APIView):
+    """
+    Generate (or reuse) a report file for a type and date range.
+    """
     permission_classes = [AllowAny]
 
-class StudentRetrieveUpdate(generics.RetrieveUpdateAPIView):
-    queryset = Student.objects.all()
-    serializer_class = StudentSerializer
+    def post(self, request, *args, **kwargs):
+        serializer = ReportRequestSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        data = serializer.validated_data
+        report = generate_report(data['report_type'], data['start_date'], data['end_date'], data['format'])
+        return Response(ReportSerializer(report, context={'request': request}).data, status=status.HTTP_201_CREATED)
+
+class ReportDownload(APIView):
+    """
+    Stream a generated report file in blocks instead of loading it into memory.
+    """
     permission_classes = [AllowAny]
 
-# Resource CRUD
-class ResourceListCreate(generics.ListCreateAPIView):
-    queryset = Resource.objects.all()
-    serializer_class = ResourceSerializer
-    filterset_class = ResourceFilter
-    search_fields = ['title', 'author', 'resource_id']
-    ordering_fields = ['title', 'author', 'status', 'resource_type']
+    def get(self, request, pk, *args, **kwargs):
+        report = Report.objects.filter(pk=pk).first()
+        if report is None or not report.file:
+            raise Http404
+        return FileResponse(report.file.open('rb'), as_attachment=True, filename=report.file.name.rsplit('/', 1)[-1])
+
+# Circulation statistics
+class CirculationStats(APIView):
+    """
+    Read-only dashboard numbers served from the pre-aggregated summary tables,
+    plus table totals (estimated for big tables, see table_row_count).
+
+    ?days=N limits the daily series (default 30, max 366); ?student_id=...
+    adds that student's totals.
+    """
     permission_classes = [AllowAny]
 
-class ResourceRetrieveUpdate(generics.RetrieveUpdateAPIView):
-    queryset = Resource.objects.all()
-    serializer_class = ResourceSerializer
+    def get(self, request, *args, **kwargs):
+        try:
+            days = min(max(int(request.query_params.get('days', 30)), 1), 366)
+        except ValueError:
+            return Response({'detail': 'days must be an integer.'}, status=status.HTTP_400_BAD_REQUEST)
+
+        by_type = list(ResourceTypeUtilization.objects.order_by('resource_type').values('resource_type', 'total', 'on_loan'))
+        total = sum(row['total'] for row in by_type)
+        on_loan = sum(row['on_loan'] for row in by_type)
+        since = timezone.localdate() - timedelta(days=days - 1)
+        data = {
+            'utilization': {
+                'total': total,
+                'on_loan': on_loan,
+                'rate': round(on_loan / total, 4) if total else 0,
+                'by_type': by_type,
+            },
+            'daily': list(
+                DailyCirculation.objects.filter(date__gte=since)
+                .order_by('date', 'resource_type')
+                .values('date', 'resource_type', 'borrows', 'returns')
+            ),
+            'totals': {
+                'students': table_row_count(Student),
+                'resources': table_row_count(Resource),
+                'borrows': table_row_count(Borrow),
+                'returns': table_row_count(Return),
+            },
+        }
+
+        student_id = request.query_params.get('student_id')
+        if student_id:
+            data['student'] = (
+                StudentCirculation.objects.filter(student__student_id=student_id)
+                .values('borrows', 'returns').first()
+                or {'borrows': 0, 'returns': 0}
+            )
+        return Response(data)
+
+# Typeahead
+class SuggestView(APIView):
+    """
+    Top-k prefix matches for `?prefix=` (up to `?limit=`, default 10),
+    served from an in-process PrefixIndex.
+    """
+    authentication_classes = [StatelessJWTAuthentication]
     permission_classes = [AllowAny]
+    index = None
 
-# Borrow CRUD (optional)
-class BorrowListCreate(generics.ListCreateAPIView):
-    queryset = Borrow.objects.all()
-    serializer_class = BorrowSerializer
-    search_fields = ['student__name', 'resource__title']
-    ordering_fields = ['borrow_date', 'return_date']
+    def get(self, request, *args, **kwargs):
+        prefix = request.query_params.get('prefix', '').strip()
+        try:
+            limit = min(max(int(request.query_params.get('limit', 10)), 1), SUGGEST_MAX_RESULTS)
+        except ValueError:
+            return Response({'detail': 'limit must be an integer.'}, status=status.HTTP_400_BAD_REQUEST)
+        if not prefix:
+            return Response([])
+        return Response(self.index.suggest(prefix, limit))
+
+class ResourceSuggest(SuggestView):
+    index = resource_index
+
+class StudentSuggest(SuggestView):
+    index = student_index
+
+class CatalogueCacheStats(APIView):
+    """
+    Hit and miss counters of the catalogue cache for this process.
+    """
     permission_classes = [AllowAny]
 
-# Return CRUD (optional)
-class ReturnListCreate(generics.ListCreateAPIView):
-    queryset = Return.objects.all()
-    serializer_class = ReturnSerializer
-    search_fields = ['student__name', 'resource__title']
-    ordering_fields = ['return_date']
+    def get(self, request, *args, **kwargs):
+        return Response(cache_stats())
+
+class Metrics(View):
+    """
+    Request latency, query count, DB time and response size histograms for
+    this process, in the Prometheus text format. A plain Django view so the
+    body is not run through DRF renderers.
+    """
+    def get(self, request):
+        return HttpResponse(render_metrics(), content_type='text/plain; version=0.0.4; charset=utf-8')
+
+# User CRUD
+class UserList(generics.ListAPIView):
+    queryset = User.objects.all()
+    serializer_class = UserSerializer
+    search_fields = ['username', 'first_name', 'last_name', 'email']
+    ordering = ['id']
+    permission_classes = [AllowAny]
+
+class UserDetail(generics.RetrieveAPIView):
+    queryset = User.objects.all()
+    serializer_class = UserSerializer
     permission_classes = [AllowAny]
 
+# Access tokens carry the current user_level rather than the one copied
+# from the refresh token, so a role change reaches the permission classes
+# within one access token lifetime. `sid` is the refresh token's jti, which
+# lets logging out revoke the access tokens issued from it.
+class MyRefreshToken(RefreshToken):
+    @property
+    def access_token(self):
+        access = super().access_token
+        access['user_level'] = cached_user_level(self[jwt_settings.USER_ID_CLAIM]) or 'student'
+        access['sid'] = self[jwt_settings.JTI_CLAIM]
+        return access
+
 # Custom TokenObtainPairSerializer to include user_level in token claims
 class MyTokenObtainPairSerializer(TokenObtainPairSerializer):
+    token_class = MyRefreshToken
+
     @classmethod
     def get_token(cls, user):
         token = super().get_token(user)
 
         # Add custom claims
+        token['username'] = user.username
         if hasattr(user, 'profile'):
             token['user_level'] = user.profile.user_level
         else:
@@ -204,10 +496,29 @@ class MyTokenObtainPairView(TokenObtainPairView):
     serializer_class = MyTokenObtainPairSerializer
     permission_classes = [AllowAny]
 
+class MyTokenRefreshSerializer(TokenRefreshSerializer):
+    token_class = MyRefreshToken
+
+    def validate(self, attrs):
+        if is_revoked(self.token_class(attrs['refresh'])[jwt_settings.JTI_CLAIM]):
+            raise TokenError('Token is blacklisted')
+        return super().validate(attrs)
+
 class MyTokenRefreshView(TokenRefreshView):
+    serializer_class = MyTokenRefreshSerializer
     permission_classes = [AllowAny]
 
+# Logging out revokes the refresh token and every access token issued from it
+class MyTokenBlacklistSerializer(TokenBlacklistSerializer):
+    token_class = MyRefreshToken
+
+    def validate(self, attrs):
+        refresh = self.token_class(attrs['refresh'])
+        revoke(refresh[jwt_settings.JTI_CLAIM], refresh['exp'])
+        return {}
+
 class MyTokenBlacklistView(TokenBlacklistView):
+    serializer_class = MyTokenBlacklistSerializer
     permission_classes = [AllowAny]
 
 # Removed UserRegistrationView as registration is disabled; only admin can add users
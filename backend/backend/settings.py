@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 
+from importlib.util import find_spec
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -53,6 +54,7 @@ CORS_ALLOWED_ORIGINS = [
 ]
 
 MIDDLEWARE = [
+    'api.middleware.MetricsMiddleware',  # Outermost, so it times the whole stack
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
@@ -152,6 +154,10 @@ STATICFILES_DIRS = [
 # Optionally set STATIC_ROOT for collectstatic
 STATIC_ROOT = os.path.join(Path(__file__).resolve().parent.parent, 'staticfiles')
 
+# Uploaded and generated files (report exports)
+MEDIA_URL = 'media/'
+MEDIA_ROOT = BASE_DIR / 'media'
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
 
@@ -159,18 +165,67 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 REST_FRAMEWORK = {
     'DEFAULT_RENDERER_CLASSES': [
-        'rest_framework.renderers.JSONRenderer',
-        'rest_framework.renderers.BrowsableAPIRenderer',
+        'api.renderers.FastJSONRenderer',
     ],
     'DEFAULT_FILTER_BACKENDS': [
         'django_filters.rest_framework.DjangoFilterBackend',
         'rest_framework.filters.SearchFilter',
         'rest_framework.filters.OrderingFilter',
+        'api.search.FullTextSearchFilter',
     ],
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'api.authentication.RevocableJWTAuthentication',
     ],
+    'DEFAULT_PAGINATION_CLASS': 'api.pagination.LibraryCursorPagination',
+    'PAGE_SIZE': 50,
+}
+
+# MessagePack is offered through `Accept` only when the package is
+# installed. The browsable API is expensive on large lists, so production
+# serves JSON only.
+if find_spec('msgpack'):
+    REST_FRAMEWORK['DEFAULT_RENDERER_CLASSES'].append('api.renderers.MessagePackRenderer')
+if DEBUG:
+    REST_FRAMEWORK['DEFAULT_RENDERER_CLASSES'].append('rest_framework.renderers.BrowsableAPIRenderer')
+
+# Full-text `?q=` search: 'python' (in-process index) or 'mysql' (FULLTEXT)
+SEARCH_ENGINE = 'python'
+SEARCH_MAX_RESULTS = 1000
+
+# How often the typeahead index folds in rows changed by other workers
+SUGGEST_REFRESH_SECONDS = 5
+
+# Requests slower than this (seconds) are logged to `api.metrics` with
+# their SQL statements
+SLOW_REQUEST_SECONDS = 1.0
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {'class': 'logging.StreamHandler'},
+    },
+    'loggers': {
+        'api.metrics': {'handlers': ['console'], 'level': 'WARNING', 'propagate': False},
+    },
+}
+
+# Upper bound for the `?page_size=` query parameter on list endpoints
+API_MAX_PAGE_SIZE = 500
+
+# Upper bound for the number of items in one bulk checkout/return request
+API_MAX_BATCH_SIZE = 5000
+
+# Cache framework. Local memory is per process; point CATALOGUE_CACHE_ALIAS
+# at a shared backend (Redis, Memcached) when running several workers.
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'readingroom',
+    },
 }
+CATALOGUE_CACHE_ALIAS = 'default'
+CATALOGUE_CACHE_TIMEOUT = 300
 
 # Use JSON serializer for sessions for better security and compatibility
 SESSION_SERIALIZER = 'django.contrib.sessions.serializers.JSONSerializer'
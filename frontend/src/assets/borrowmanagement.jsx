@@ -4,15 +4,15 @@ import "../resourcesmanagement.css";
 import logo from "../assets/logo.png";
 import { borrowService } from "../services/api";
 import Header from "./Header";
+import usePagedList, { PageControls } from "./usepagedlist";
 
 
 const BorrowManagement = ({ onLogout, user }) => {
   const location = useLocation(); // Get location object
-  const [borrows, setBorrows] = useState([]);
-  const [filteredBorrows, setFilteredBorrows] = useState([]);
-  const [loading, setLoading] = useState(true);
   const [error, setError] = useState(null);
   const [searchTerm, setSearchTerm] = useState("");
+  // Searched on the server (student name, title), one page at a time
+  const borrows = usePagedList(borrowService.getPage, searchTerm ? { search: searchTerm } : {});
   const [showBorrowModal, setShowBorrowModal] = useState(false);
   const [formData, setFormData] = useState({
     student: "",
@@ -22,7 +22,6 @@ const BorrowManagement = ({ onLogout, user }) => {
 
 
   useEffect(() => {
-    fetchBorrows();
     // Parse URL parameters when component mounts
     const searchParams = new URLSearchParams(location.search);
     const studentId = searchParams.get("student_id");
@@ -41,41 +40,6 @@ const BorrowManagement = ({ onLogout, user }) => {
   }, [location.search]);
 
 
-  useEffect(() => {
-    if (searchTerm === "") {
-      setFilteredBorrows(borrows);
-    } else {
-      const lowerSearchTerm = searchTerm.toLowerCase();
-      const filtered = borrows.filter(
-        (borrow) =>
-          (borrow.student.first_name + " " + borrow.student.last_name)
-            .toLowerCase()
-            .includes(lowerSearchTerm) ||
-          borrow.resource.title.toLowerCase().includes(lowerSearchTerm) ||
-          borrow.borrow_date.toLowerCase().includes(lowerSearchTerm) ||
-          borrow.due_date.toLowerCase().includes(lowerSearchTerm) ||
-          borrow.status.toLowerCase().includes(lowerSearchTerm)
-      );
-      setFilteredBorrows(filtered);
-    }
-  }, [searchTerm, borrows]);
-
-
-  const fetchBorrows = async () => {
-    try {
-      setLoading(true);
-      const data = await borrowService.getAll();
-      setBorrows(data);
-      setFilteredBorrows(data);
-      setError(null);
-    } catch (err) {
-      setError("Failed to fetch borrow records");
-    } finally {
-      setLoading(false);
-    }
-  };
-
-
   const handleBorrowModal = () => {
     setFormData({ student_id: "", resource_id: "", due_date: "" });
     setShowBorrowModal(true);
@@ -106,14 +70,14 @@ const BorrowManagement = ({ onLogout, user }) => {
 
       await borrowService.create(borrowData); // Send correct data structure
       handleCloseModal();
-      fetchBorrows();
+      borrows.reload();
     } catch (err) {
       setError("Failed to save borrow record");
     }
   };
 
 
-  if (loading) {
+  if (!borrows.loaded) {
     return <div>Loading...</div>;
   }
 
@@ -200,6 +164,7 @@ const BorrowManagement = ({ onLogout, user }) => {
           Manage <span className="highlight">Borrow Records</span>
         </h1>
         {error && <div className="error-message">{error}</div>}
+        {borrows.error && <div className="error-message">Failed to fetch borrow records</div>}
         <div className="resources-list">
           <div className="table-header">
             <h3>Borrow List</h3>
@@ -222,7 +187,7 @@ const BorrowManagement = ({ onLogout, user }) => {
               </tr>
             </thead>
             <tbody>
-              {filteredBorrows.map((borrow) => (
+              {borrows.rows.map((borrow) => (
                 <tr key={borrow.id}>
                   <td>
                     {borrow.student.first_name} {borrow.student.last_name}
@@ -235,10 +200,7 @@ const BorrowManagement = ({ onLogout, user }) => {
               ))}
             </tbody>
           </table>
-          <div className="pagination">
-            Showing 1 to {filteredBorrows.length} of {filteredBorrows.length}{" "}
-            entries
-          </div>
+          <PageControls list={borrows} />
         </div>
         <footer>
           <p>
@@ -2,7 +2,7 @@ import React, { useEffect, useState } from 'react';
 import { NavLink, useNavigate } from 'react-router-dom';
 import '../resourcesmanagement.css'; // Shared CSS
 import logo from '../assets/logo.png';
-import { studentService, resourceService, borrowService, returnService } from '../services/api';
+import { statsService } from '../services/api';
 
 const Dashboard = ({ onLogout, user }) => {
   const [counts, setCounts] = useState({
@@ -19,18 +19,9 @@ const Dashboard = ({ onLogout, user }) => {
     const fetchCounts = async () => {
       try {
         setLoading(true);
-        const [students, resources, borrows, returns] = await Promise.all([
-          studentService.getAll(),
-          resourceService.getAll(),
-          borrowService.getAll(),
-          returnService.getAll(),
-        ]);
-        setCounts({
-          students: students.length,
-          resources: resources.length,
-          borrows: borrows.length,
-          returns: returns.length,
-        });
+        // Totals come from the server instead of downloading every table
+        const stats = await statsService.get({ days: 1 });
+        setCounts(stats.totals);
         setError(null);
       } catch (err) {
         setError('Failed to fetch dashboard data');
@@ -1,71 +1,27 @@
-import React, { useEffect, useState } from "react";
+import React, { useState } from "react";
 import { Link } from "react-router-dom";
 import "../resourcesmanagement.css";
 import logo from "../assets/logo.png";
 import { returnService, borrowService } from "../services/api";
 import Header from "./Header";
+import usePagedList, { PageControls } from "./usepagedlist";
 
 const ReturnManagement = ({ onLogout, user }) => {
-  const [returns, setReturns] = useState([]);
-  const [filteredReturns, setFilteredReturns] = useState([]);
-  const [loading, setLoading] = useState(true);
   const [error, setError] = useState(null);
   const [showReturnModal, setShowReturnModal] = useState(false);
   const [formData, setFormData] = useState({
     borrow_record_id: "",
     condition_notes: "",
   });
-  const [activeBorrows, setActiveBorrows] = useState([]);
   const [searchTerm, setSearchTerm] = useState("");
-
-  useEffect(() => {
-    fetchReturns();
-    fetchActiveBorrows();
-  }, []);
-
-  const fetchActiveBorrows = async () => {
-    try {
-      const data = await borrowService.getAll({ status: 'ACTIVE' });
-      // Filter explicitly on frontend as fallback
-      const filtered = data.filter(borrow => borrow.status === 'ACTIVE');
-      setActiveBorrows(filtered);
-    } catch (err) {
-      console.error("Failed to fetch active borrows", err);
-    }
-  };
-
-  useEffect(() => {
-    if (searchTerm === "") {
-      setFilteredReturns(returns);
-    } else {
-      const lowerSearchTerm = searchTerm.toLowerCase();
-      const filtered = returns.filter((record) => {
-        const studentName = record.borrow_record ? `${record.borrow_record.student.first_name} ${record.borrow_record.student.last_name}` : "";
-        return (
-          record.return_date.toLowerCase().includes(lowerSearchTerm) ||
-          (record.borrow_record?.student?.student_id || "").toLowerCase().includes(lowerSearchTerm) ||
-          studentName.toLowerCase().includes(lowerSearchTerm) ||
-          (record.borrow_record?.resource?.resource_id || "").toLowerCase().includes(lowerSearchTerm) ||
-          (record.borrow_record?.resource?.title || "").toLowerCase().includes(lowerSearchTerm)
-        );
-      });
-      setFilteredReturns(filtered);
-    }
-  }, [searchTerm, returns]);
-
-  const fetchReturns = async () => {
-    try {
-      setLoading(true);
-      const data = await returnService.getAll();
-      setReturns(data);
-      setFilteredReturns(data);
-      setError(null);
-    } catch (err) {
-      setError("Failed to fetch returned resources");
-    } finally {
-      setLoading(false);
-    }
-  };
+  const [borrowSearchTerm, setBorrowSearchTerm] = useState("");
+  // Searched on the server (student name, title), one page at a time
+  const returns = usePagedList(returnService.getPage, searchTerm ? { search: searchTerm } : {});
+  // Overdue loans can be returned too
+  const activeBorrows = usePagedList(borrowService.getPage, {
+    status__in: 'ACTIVE,OVERDUE',
+    ...(borrowSearchTerm ? { search: borrowSearchTerm } : {}),
+  });
 
   const handleReturnModal = () => {
     setFormData({ student_id: "", resource_id: "", title: "" });
@@ -81,13 +37,14 @@ const ReturnManagement = ({ onLogout, user }) => {
     try {
       await returnService.create(formData);
       handleCloseModal();
-      fetchReturns();
+      returns.reload();
+      activeBorrows.reload();
     } catch (err) {
       setError("Failed to save return record");
     }
   };
 
-  if (loading) {
+  if (!returns.loaded) {
     return <div>Loading...</div>;
   }
 
@@ -122,18 +79,25 @@ const ReturnManagement = ({ onLogout, user }) => {
         <div className="modal">
           <div className="modal-content">
             <h2>Return Resource</h2>
+            <input
+              type="text"
+              placeholder="Search by student or title..."
+              value={borrowSearchTerm}
+              onChange={(e) => setBorrowSearchTerm(e.target.value)}
+            />
             <select
               value={formData.borrow_record_id}
               onChange={(e) => setFormData({ ...formData, borrow_record_id: e.target.value })}
               required
             >
               <option value="" disabled>Select Borrow Record</option>
-              {activeBorrows.map((borrow) => (
+              {activeBorrows.rows.map((borrow) => (
                 <option key={borrow.id} value={borrow.id}>
                   {borrow.student.first_name} {borrow.student.last_name} - {borrow.resource.title} (Due: {borrow.due_date})
                 </option>
               ))}
             </select>
+            <PageControls list={activeBorrows} />
             <textarea
               placeholder="Condition Notes (optional)"
               value={formData.condition_notes}
@@ -154,6 +118,7 @@ const ReturnManagement = ({ onLogout, user }) => {
           Manage <span className="highlight">Returned Resources</span>
         </h1>
         {error && <div className="error-message">{error}</div>}
+        {returns.error && <div className="error-message">Failed to fetch returned resources</div>}
         <div className="resources-list">
           <div className="table-header">
             <h3>Returned Resources List</h3>
@@ -176,7 +141,7 @@ const ReturnManagement = ({ onLogout, user }) => {
               </tr>
             </thead>
             <tbody>
-              {filteredReturns.map((record, index) => (
+              {returns.rows.map((record, index) => (
                 <tr key={record.id || index}>
                   <td>{record.return_date}</td>
                   <td>{record.borrow_record?.student?.student_id}</td>
@@ -187,7 +152,7 @@ const ReturnManagement = ({ onLogout, user }) => {
               ))}
             </tbody>
           </table>
-          <div className="pagination">Showing 1 to {filteredReturns.length} of {filteredReturns.length} entries</div>
+          <PageControls list={returns} />
         </div>
         <footer>
           <p>
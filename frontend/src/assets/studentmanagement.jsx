@@ -1,10 +1,11 @@
-import React, { useState, useEffect } from "react";
+import React, { useState } from "react";
 import { Link } from "react-router-dom";
 import "../resourcesmanagement.css";
 import QRCode from "react-qr-code";
 import logo from "../assets/logo.png";
 import { studentService } from "../services/api";
 import Header from "./Header";
+import usePagedList, { PageControls } from "./usepagedlist";
 
 
 const StudentManagement = ({ onLogout, user }) => {
@@ -19,50 +20,11 @@ const StudentManagement = ({ onLogout, user }) => {
     phone: "",
     email: "",
   });
-  const [students, setStudents] = useState([]);
-  const [filteredStudents, setFilteredStudents] = useState([]);
-  const [loading, setLoading] = useState(true);
   const [error, setError] = useState(null);
   const [editingStudent, setEditingStudent] = useState(null);
   const [searchTerm, setSearchTerm] = useState("");
-
-
-  useEffect(() => {
-    fetchStudents();
-  }, []);
-
-
-  useEffect(() => {
-    if (searchTerm === "") {
-      setFilteredStudents(students);
-    } else {
-      const lowerSearchTerm = searchTerm.toLowerCase();
-      const filtered = students.filter(
-        (student) =>
-          student.student_id.toLowerCase().includes(lowerSearchTerm) ||
-          student.first_name.toLowerCase().includes(lowerSearchTerm) ||
-          student.last_name.toLowerCase().includes(lowerSearchTerm) ||
-          student.phone.toLowerCase().includes(lowerSearchTerm) ||
-          student.email.toLowerCase().includes(lowerSearchTerm)
-      );
-      setFilteredStudents(filtered);
-    }
-  }, [searchTerm, students]);
-
-
-  const fetchStudents = async () => {
-    try {
-      setLoading(true);
-      const data = await studentService.getAll();
-      setStudents(data);
-      setFilteredStudents(data);
-      setError(null);
-    } catch (err) {
-      setError("Failed to fetch students");
-    } finally {
-      setLoading(false);
-    }
-  };
+  // Searched on the server (ranked full-text `q`), one page at a time
+  const students = usePagedList(studentService.getPage, searchTerm ? { q: searchTerm } : {});
 
 
   const generateQRData = (student) => {
@@ -131,7 +93,7 @@ const StudentManagement = ({ onLogout, user }) => {
 
 
       handleCloseModal();
-      fetchStudents();
+      students.reload();
 
 
       // Show QR code after successful save
@@ -145,7 +107,7 @@ const StudentManagement = ({ onLogout, user }) => {
   };
 
 
-  if (loading) {
+  if (!students.loaded) {
     return <div>Loading...</div>;
   }
 
@@ -269,6 +231,7 @@ const StudentManagement = ({ onLogout, user }) => {
           Manage <span className="highlight">Students</span>
         </h1>
         {error && <div className="error-message">{error}</div>}
+        {students.error && <div className="error-message">Failed to fetch students</div>}
         <div className="resources-list">
           <div className="table-header">
             <h3>Student List</h3>
@@ -292,7 +255,7 @@ const StudentManagement = ({ onLogout, user }) => {
               </tr>
             </thead>
             <tbody>
-              {filteredStudents.map((student) => (
+              {students.rows.map((student) => (
                 <tr key={student.student_id}>
                   <td>{student.student_id}</td>
                   <td>{student.first_name}</td>
@@ -311,10 +274,7 @@ const StudentManagement = ({ onLogout, user }) => {
               ))}
             </tbody>
           </table>
-          <div className="pagination">
-            Showing 1 to {filteredStudents.length} of {filteredStudents.length}{" "}
-            entries
-          </div>
+          <PageControls list={students} />
         </div>
         <footer>
           <p>
@@ -0,0 +1,67 @@
+import React, { useEffect, useState } from 'react';
+
+// One page of a cursor-paginated list at a time. `fetchPage(params, cursor)`
+// resolves to { results, next, previous } (see services/api.js); goNext and
+// goPrevious follow the page's cursor links, and new `params` (e.g. a
+// search term) start again from the first page. reload() fetches the
+// current page again, e.g. after a save.
+const usePagedList = (fetchPage, params = {}) => {
+  const paramsKey = JSON.stringify(params);
+  const [position, setPosition] = useState({ paramsKey, cursor: null, version: 0 });
+  const [page, setPage] = useState({ results: [], next: null, previous: null });
+  const [loading, setLoading] = useState(true);
+  const [loaded, setLoaded] = useState(false);
+  const [error, setError] = useState(null);
+
+  // Cursors belong to the query they came from
+  const cursor = position.paramsKey === paramsKey ? position.cursor : null;
+  const { version } = position;
+
+  useEffect(() => {
+    let ignore = false;
+    setLoading(true);
+    fetchPage(JSON.parse(paramsKey), cursor)
+      .then((data) => {
+        if (ignore) return;
+        setPage(data);
+        setError(null);
+      })
+      .catch((err) => {
+        if (ignore) return;
+        setError(err);
+        console.error('Error fetching page:', err);
+      })
+      .finally(() => {
+        if (ignore) return;
+        setLoading(false);
+        setLoaded(true);
+      });
+    // A newer request supersedes this one
+    return () => {
+      ignore = true;
+    };
+  }, [fetchPage, paramsKey, cursor, version]);
+
+  return {
+    rows: page.results,
+    loading,
+    loaded,
+    error,
+    hasNext: Boolean(page.next),
+    hasPrevious: Boolean(page.previous),
+    goNext: () => setPosition({ paramsKey, cursor: page.next, version }),
+    goPrevious: () => setPosition({ paramsKey, cursor: page.previous, version }),
+    reload: () => setPosition({ paramsKey, cursor, version: version + 1 }),
+  };
+};
+
+// Previous/Next buttons for a usePagedList() list
+export const PageControls = ({ list }) => (
+  <div className="pagination">
+    <button onClick={list.goPrevious} disabled={!list.hasPrevious || list.loading}>Previous</button>
+    <span> {list.loading ? 'Loading...' : `${list.rows.length} entries on this page`} </span>
+    <button onClick={list.goNext} disabled={!list.hasNext || list.loading}>Next</button>
+  </div>
+);
+
+export default usePagedList;
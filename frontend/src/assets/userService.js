@@ -27,7 +27,7 @@ const userService = {
     }
   },
 
-  // Fetch all users
+  // Fetch all users, following the cursor links through every page
   getAll: async () => {
     const token = localStorage.getItem('authToken'); // Retrieve token from localStorage
 
@@ -36,12 +36,14 @@ const userService = {
     }
 
     try {
-      const response = await axios.get('http://localhost:8000/api/users/', {
-        headers: {
-          'Authorization': `Bearer ${token}`,
-        },
-      });
-      return response.data;  // Assuming the response contains the list of users
+      const headers = { 'Authorization': `Bearer ${token}` };
+      let response = await axios.get('http://localhost:8000/api/users/', { headers });
+      const users = [...response.data.results];
+      while (response.data.next) {
+        response = await axios.get(response.data.next, { headers });
+        users.push(...response.data.results);
+      }
+      return users;
     } catch (error) {
       console.error("Error fetching users:", error);
       throw new Error("Failed to fetch users.");
@@ -1,17 +1,16 @@
-import React, { useEffect, useState } from "react";
+import React, { useState } from "react";
 import { Link } from "react-router-dom";
 import "../resourcesmanagement.css";
 import logo from "../assets/logo.png";
 import { userService } from "../services/api";
 import Header from "./Header";
 import useUsersModals from "../assets/useusersmodals"; // Import the useUsersModals hook
+import usePagedList, { PageControls } from "./usepagedlist";
 
 const UserManagement = ({ onLogout, user }) => {
-  const [users, setUsers] = useState([]);
-  const [filteredUsers, setFilteredUsers] = useState([]);
-  const [loading, setLoading] = useState(true);
-  const [error, setError] = useState(null);
   const [searchTerm, setSearchTerm] = useState("");
+  // Searched on the server (username, names, email), one page at a time
+  const users = usePagedList(userService.getPage, searchTerm ? { search: searchTerm } : {});
 
   const {
     showUserModal,
@@ -22,40 +21,7 @@ const UserManagement = ({ onLogout, user }) => {
     handleSaveUser,
   } = useUsersModals(); // Using the custom hook to handle modal logic
 
-  useEffect(() => {
-    fetchUsers();
-  }, []);
-
-  useEffect(() => {
-    if (searchTerm === "") {
-      setFilteredUsers(users);
-    } else {
-      const lowerSearchTerm = searchTerm.toLowerCase();
-      const filtered = users.filter((user) =>
-        user.id.toString().toLowerCase().includes(lowerSearchTerm) ||
-        user.last_name.toLowerCase().includes(lowerSearchTerm) ||
-        user.first_name.toLowerCase().includes(lowerSearchTerm) ||
-        user.email.toLowerCase().includes(lowerSearchTerm)
-      );
-      setFilteredUsers(filtered);
-    }
-  }, [searchTerm, users]);
-
-  const fetchUsers = async () => {
-    try {
-      setLoading(true);
-      const data = await userService.getAll();
-      setUsers(data);
-      setFilteredUsers(data);
-      setError(null);
-    } catch (err) {
-      setError("Failed to fetch users");
-    } finally {
-      setLoading(false);
-    }
-  };
-
-  if (loading) {
+  if (!users.loaded) {
     return <div>Loading...</div>;
   }
 
@@ -152,7 +118,7 @@ const UserManagement = ({ onLogout, user }) => {
         <h1>
           Manage <span className="highlight">Users</span>
         </h1>
-        {error && <div className="error-message">{error}</div>}
+        {users.error && <div className="error-message">Failed to fetch users</div>}
         <div className="resources-list">
           <div className="table-header">
             <h3>User List</h3>
@@ -176,7 +142,7 @@ const UserManagement = ({ onLogout, user }) => {
               </tr>
             </thead>
             <tbody>
-              {filteredUsers.map((user) => (
+              {users.rows.map((user) => (
                 <tr key={user.id}>
                   <td>{user.id}</td>
                   <td>{user.username}</td>
@@ -190,7 +156,7 @@ const UserManagement = ({ onLogout, user }) => {
               ))}
             </tbody>
           </table>
-          <div className="pagination">Showing 1 to {filteredUsers.length} of {filteredUsers.length} users</div>
+          <PageControls list={users} />
         </div>
         <footer>
           <p>
@@ -1,15 +1,13 @@
-import React, { useState, useEffect } from "react";
+import React, { useState } from "react";
 import { Link, useNavigate } from "react-router-dom";
 import "./resourcesmanagement.css";
 import logo from "./assets/logo.png";
 import { resourceService } from "./services/api";
 import Header from "./assets/Header";
+import usePagedList, { PageControls } from "./assets/usepagedlist";
 
 const ResourcesManagement = ({ onLogout, user }) => {
   const navigate = useNavigate();
-  const [resources, setResources] = useState([]);
-  const [filteredResources, setFilteredResources] = useState([]);
-  const [loading, setLoading] = useState(true);
   const [error, setError] = useState(null);
   const [showAddModal, setShowAddModal] = useState(false);
   const [showEditModal, setShowEditModal] = useState(false);
@@ -22,42 +20,8 @@ const ResourcesManagement = ({ onLogout, user }) => {
   });
   const [editingResource, setEditingResource] = useState(null);
   const [searchTerm, setSearchTerm] = useState("");
-
-  useEffect(() => {
-    fetchResources();
-  }, []);
-
-  useEffect(() => {
-    if (searchTerm === "") {
-      setFilteredResources(resources);
-    } else {
-      const lowerSearchTerm = searchTerm.toLowerCase();
-      const filtered = resources.filter((resource) =>
-        resource.resource_id.toString().toLowerCase().includes(lowerSearchTerm) ||
-        resource.title.toLowerCase().includes(lowerSearchTerm) ||
-        resource.author.toLowerCase().includes(lowerSearchTerm) ||
-        resource.resource_type.toLowerCase().includes(lowerSearchTerm) ||
-        resource.publication_year.toString().toLowerCase().includes(lowerSearchTerm) ||
-        resource.status.toLowerCase().includes(lowerSearchTerm)
-      );
-      setFilteredResources(filtered);
-    }
-  }, [searchTerm, resources]);
-
-  const fetchResources = async () => {
-    try {
-      setLoading(true);
-      const data = await resourceService.getAll();
-      setResources(data);
-      setFilteredResources(data);
-      setError(null);
-    } catch (err) {
-      setError("Failed to fetch resources");
-      console.error("Error fetching resources:", err);
-    } finally {
-      setLoading(false);
-    }
-  };
+  // Searched on the server (ranked full-text `q`), one page at a time
+  const resources = usePagedList(resourceService.getPage, searchTerm ? { q: searchTerm } : {});
 
   const handleAddResourceModal = () => {
     setFormData({
@@ -103,7 +67,7 @@ const ResourcesManagement = ({ onLogout, user }) => {
         await resourceService.update(editingResource.resource_id, formData);
       }
       handleCloseModal();
-      fetchResources();
+      resources.reload();
     } catch (err) {
       if (err.response && err.response.status === 403) {
         setError("Permission denied: You do not have rights to add or edit resources.");
@@ -120,7 +84,7 @@ const ResourcesManagement = ({ onLogout, user }) => {
     if (window.confirm("Are you sure you want to delete this resource?")) {
       try {
         await resourceService.delete(resourceId);
-        fetchResources();
+        resources.reload();
       } catch (err) {
         setError("Failed to delete resource");
         console.error("Error deleting resource:", err);
@@ -128,7 +92,7 @@ const ResourcesManagement = ({ onLogout, user }) => {
     }
   };
 
-  if (loading) {
+  if (!resources.loaded) {
     return <div>Loading...</div>;
   }
 
@@ -225,6 +189,7 @@ const ResourcesManagement = ({ onLogout, user }) => {
           Manage <span className="highlight">Resources</span>
         </h1>
         {error && <div className="error-message">{error}</div>}
+        {resources.error && <div className="error-message">Failed to fetch resources</div>}
         <div className="resources-list">
           <div className="table-header">
             <h3>Resources List</h3>
@@ -249,7 +214,7 @@ const ResourcesManagement = ({ onLogout, user }) => {
               </tr>
             </thead>
             <tbody>
-              {filteredResources.map((resource) => (
+              {resources.rows.map((resource) => (
                 <tr key={resource.resource_id}>
                   <td>{resource.resource_id}</td>
                   <td>{resource.title}</td>
@@ -267,7 +232,7 @@ const ResourcesManagement = ({ onLogout, user }) => {
               ))}
             </tbody>
           </table>
-          <div className="pagination">Showing 1 to {filteredResources.length} of {filteredResources.length} entries</div>
+          <PageControls list={resources} />
         </div>
         <footer>
           <p>
@@ -25,6 +25,26 @@ api.interceptors.request.use(
   }
 );
 
+// List endpoints are cursor-paginated ({ next, previous, results }).
+// fetchPage returns one page; `cursor` is the `next` or `previous` link of
+// an earlier page, which already carries the query parameters.
+const fetchPage = async (url, params, cursor) => {
+  const response = cursor ? await api.get(cursor) : await api.get(url, { params });
+  return response.data;
+};
+
+// Follow the `next` links and return every row as a single array. Only for
+// callers that really need the whole table; list views page with fetchPage.
+const fetchAllPages = async (url, params) => {
+  let response = await api.get(url, { params });
+  const rows = [...response.data.results];
+  while (response.data.next) {
+    response = await api.get(response.data.next);
+    rows.push(...response.data.results);
+  }
+  return rows;
+};
+
 // Auth services
 export const authService = {
   login: async (username, password) => {
@@ -53,10 +73,7 @@ export const authService = {
 
 // Student services
 export const studentService = {
-  getAll: async (params) => {
-    const response = await api.get('/students/', { params });
-    return response.data;
-  },
+  getPage: async (params, cursor) => fetchPage('/students/', params, cursor),
 
   getById: async (id) => {
     const response = await api.get(`/students/${id}/`);
@@ -80,10 +97,7 @@ export const studentService = {
 
 // Resource services
 export const resourceService = {
-  getAll: async (params) => {
-    const response = await api.get('/resources/', { params });
-    return response.data;
-  },
+  getPage: async (params, cursor) => fetchPage('/resources/', params, cursor),
 
   getById: async (id) => {
     const response = await api.get(`/resources/${id}/`);
@@ -103,14 +117,27 @@ export const resourceService = {
   delete: async (id) => {
     await api.delete(`/resources/${id}/`);
   },
+
+  // Push updates instead of re-polling the list: onStatus({ resource_id, status })
+  // runs for each change (status is null when a resource is deleted), and
+  // onResync() when events were missed and the list should be reloaded.
+  // Returns a function that closes the stream.
+  subscribeStatus: (onStatus, onResync) => {
+    const source = new EventSource(`${API_BASE_URL}/events/resources/`);
+    source.addEventListener('status', (event) => onStatus(JSON.parse(event.data)));
+    source.addEventListener('resync', () => {
+      if (onResync) onResync();
+    });
+    return () => source.close();
+  },
 };
 
 // Borrow services
 export const borrowService = {
-  getAll: async (params) => {
-    const response = await api.get('/borrows/', { params });
-    return response.data;
-  },
+  getPage: async (params, cursor) => fetchPage('/borrows/', params, cursor),
+
+  // The whole history, for the PDF report
+  getAll: async (params) => fetchAllPages('/borrows/', params),
 
   getById: async (id) => {
     const response = await api.get(`/borrows/${id}/`);
@@ -134,10 +161,10 @@ export const borrowService = {
 
 // Return services
 export const returnService = {
-  getAll: async (params) => {
-    const response = await api.get('/returns/', { params });
-    return response.data;
-  },
+  getPage: async (params, cursor) => fetchPage('/returns/', params, cursor),
+
+  // The whole history, for the PDF report
+  getAll: async (params) => fetchAllPages('/returns/', params),
 
   getById: async (id) => {
     const response = await api.get(`/returns/${id}/`);
@@ -159,6 +186,14 @@ export const returnService = {
   },
 };
 
+// Dashboard numbers from the pre-aggregated summary tables
+export const statsService = {
+  get: async (params) => {
+    const response = await api.get('/stats/', { params });
+    return response.data;
+  },
+};
+
 // Report services
 export const reportService = {
   generate: async (data) => {
@@ -169,10 +204,7 @@ export const reportService = {
 
 // User services
 export const userService = {
-  getAll: async (params) => {
-    const response = await api.get('/users/', { params });
-    return response.data;
-  },
+  getPage: async (params, cursor) => fetchPage('/users/', params, cursor),
 
   getById: async (id) => {
     const response = await api.get(`/users/${id}/`);